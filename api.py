@@ -1,31 +1,87 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+_PROCESS_STARTED_AT = time.time()
+
 import os
-import boto3
+import threading
+from typing import Optional
+from contextlib import asynccontextmanager
 import hmac
 import hashlib
 import base64
-import requests
 from jose import jwt, ExpiredSignatureError, JWTError
 from fastapi import FastAPI, HTTPException, Depends, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import PlainTextResponse, JSONResponse
 from pydantic import BaseModel
 import uvicorn
-from orchestrator.cloud_orchestrator import process_patient_video
+from aws_client.clients import get_client
+from aws_client.jwks_cache import get_jwks_cache
+from aws_client.alert_outbox import close_all_outboxes
+from orchestrator.job_manager import JobManager, QueueFullError
+from orchestrator.warmup import ModelWarmup, WARMUP_PENDING
+from monitoring.metrics import render_metrics, FIRST_ANALYSIS_SECONDS
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Pool limitado de análises: o event loop nunca executa o pipeline diretamente
+job_manager = JobManager(
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", "2")),
+    max_queue=int(os.getenv("ANALYSIS_QUEUE_DEPTH", "8")),
+)
+
+model_warmup = ModelWarmup(started_at=_PROCESS_STARTED_AT)
+_first_analysis_lock = threading.Lock()
+_first_analysis_done = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Os modelos carregam em background: /health responde desde o início e /ready sinaliza quando estão quentes
+    if os.getenv("WARMUP_MODELS", "true").lower() == "true":
+        model_warmup.start()
+    else:
+        model_warmup.disable()
+    yield
+    job_manager.shutdown()
+    # Tenta entregar os alertas que ainda estão no outbox antes de encerrar
+    close_all_outboxes()
+
+
 app = FastAPI(
     title="AI Patient Monitor API",
     description="API Multimodal para detecção de quedas e emergências em vídeos de pacientes.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
+def run_analysis(**kwargs):
+    """Executa o pipeline em uma thread do pool (import pesado feito sob demanda)."""
+    global _first_analysis_done
+
+    # Evita carregar os modelos em paralelo com o warm-up
+    if model_warmup.status != WARMUP_PENDING:
+        model_warmup.wait()
+
+    from orchestrator.cloud_orchestrator import process_patient_video
+
+    inicio = time.perf_counter()
+    result = process_patient_video(**kwargs)
+    with _first_analysis_lock:
+        if not _first_analysis_done:
+            _first_analysis_done = True
+            FIRST_ANALYSIS_SECONDS.set(round(time.perf_counter() - inicio, 3))
+    return result
+
+
 class VideoAnalysisRequest(BaseModel):
     video_key: str
     use_s3: bool = True
     use_localstack: bool = False
+    patient_id: Optional[str] = None
+    location: Optional[str] = None
 
 
 class LoginRequest(BaseModel):
@@ -52,15 +108,15 @@ def verify_cognito_token(credentials: HTTPAuthorizationCredentials = Security(se
             status_code=500, detail="Configuração de Auth (User Pool ID) ausente.")
 
     try:
-        # 1. Busca as chaves públicas (JWKS) do Cognito
-        # DICA: Em produção, implemente cache para não fazer request a cada chamada
-        jwks_url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
-        jwks = requests.get(jwks_url).json()
+        # 1. Chaves públicas (JWKS) do Cognito, mantidas em cache por `kid`
+        jwks_url = os.getenv(
+            "COGNITO_JWKS_URL",
+            f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json")
+        jwks_cache = get_jwks_cache(jwks_url, ttl=int(os.getenv("JWKS_CACHE_TTL", "3600")))
 
         # 2. Encontra a chave correta usada para assinar este token
         header = jwt.get_unverified_header(token)
-        rsa_key = next(
-            (key for key in jwks["keys"] if key["kid"] == header["kid"]), None)
+        rsa_key = jwks_cache.get_key(header.get("kid"))
 
         if not rsa_key:
             raise HTTPException(
@@ -100,6 +156,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 somente após o warm-up dos modelos (503 enquanto carregam)."""
+    snapshot = model_warmup.snapshot()
+    return JSONResponse(status_code=200 if model_warmup.ready else 503, content=snapshot)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Métricas de latência e volume do pipeline no formato do Prometheus."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/auth/login")
 async def login(request: LoginRequest):
     """
@@ -116,7 +185,7 @@ async def login(request: LoginRequest):
         raise HTTPException(
             status_code=500, detail="COGNITO_CLIENT_ID não configurado.")
 
-    client = boto3.client('cognito-idp', region_name=region)
+    client = get_client('cognito-idp', region_name=region)
 
     auth_params = {
         'USERNAME': request.username,
@@ -147,16 +216,19 @@ async def login(request: LoginRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/analyze-video", status_code=200)
+@app.post("/analyze-video", status_code=202)
 async def analyze_video_endpoint(
     request: VideoAnalysisRequest,
     user_claims: dict = Depends(verify_cognito_token)
 ):
     """
-    Endpoint para processar um vídeo.
+    Agenda o processamento de um vídeo e retorna imediatamente o id do job.
     - **video_key**: Nome do arquivo no S3 ou localmente.
     - **use_s3**: Se deve tentar baixar do S3.
     - **use_localstack**: Se deve usar o LocalStack (ambiente dev).
+    - **patient_id** / **location**: Paciente e local informados no alerta (cooldown por paciente).
+
+    Consulte o andamento em `GET /jobs/{job_id}`. Retorna 429 se a fila estiver cheia.
     """
     # Log para confirmar que o Cognito identificou o usuário
     user_id = user_claims.get("sub") or user_claims.get("username", "unknown")
@@ -164,17 +236,37 @@ async def analyze_video_endpoint(
 
     try:
         # headless=True é mandatório para APIs (não abre janela do OpenCV)
-        result = process_patient_video(
+        job_id = job_manager.submit(
+            run_analysis,
             video_key=request.video_key,
             use_s3=request.use_s3,
             use_localstack=request.use_localstack,
-            headless=False
+            headless=True,
+            patient_id=request.patient_id,
+            location=request.location,
+            owner=user_id
         )
-        return result
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {"job_id": job_id, "status": "queued"}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: str,
+    user_claims: dict = Depends(verify_cognito_token)
+):
+    """Retorna o status e, quando finalizado, o resultado de um job de análise."""
+    user_id = user_claims.get("sub") or user_claims.get("username", "unknown")
+    job = job_manager.get(job_id)
+
+    # Jobs de outros usuários são tratados como inexistentes
+    if not job or job["owner"] != user_id:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+    job.pop("owner")
+    return job
 
 if __name__ == "__main__":
     # Roda o servidor na porta 8000
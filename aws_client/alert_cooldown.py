@@ -0,0 +1,130 @@
+"""
+Cooldown/deduplicação de alertas por (paciente, tipo de alerta).
+
+Cada par tem seu próprio cooldown: uma queda no quarto 101 não silencia o
+quarto 102. O registro local é um dicionário ordenado por expiração (checagem
+O(1), memória limitada por `max_entries`). Com `ALERT_COOLDOWN_TABLE`, uma
+tabela DynamoDB compartilhada garante que apenas um worker envie o alerta de
+um mesmo evento (put condicional). Se o DynamoDB falhar (throttling, tabela
+ausente, credenciais), a decisão cai para o registro local: é preferível um
+alerta duplicado a uma queda sem alerta.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from aws_client.clients import get_client
+from monitoring.metrics import ALERT_COOLDOWN_BACKEND_ERRORS
+
+COOLDOWN_SECONDS = float(os.getenv("ALERT_COOLDOWN_SECONDS", "60"))
+MAX_ENTRIES = int(os.getenv("ALERT_COOLDOWN_MAX_ENTRIES", "10000"))
+
+
+class DynamoDBCooldownBackend:
+    """
+    Cooldown compartilhado entre processos via `put_item` condicional.
+
+    Tabela com chave de partição `pk` (string); habilite o TTL no atributo
+    `expires_at` para que o DynamoDB remova os itens vencidos.
+    """
+
+    def __init__(self, table_name, use_localstack=False):
+        self.table_name = table_name
+        self.dynamodb = get_client('dynamodb', use_localstack=use_localstack)
+
+    def try_acquire(self, key, cooldown, now):
+        """True se este processo ganhou o direito de enviar o alerta."""
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item={
+                    'pk': {'S': key},
+                    'expires_at': {'N': str(int(now + cooldown))},
+                },
+                ConditionExpression="attribute_not_exists(pk) OR expires_at <= :now",
+                ExpressionAttributeValues={':now': {'N': str(int(now))}},
+            )
+            return True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            return False
+
+
+class AlertCooldown:
+    """
+    - **cooldown**: segundos entre dois alertas do mesmo (paciente, tipo).
+    - **max_entries**: pares mantidos em memória (os mais antigos são descartados).
+    - **backend**: backend compartilhado opcional (ex.: `DynamoDBCooldownBackend`).
+    """
+
+    def __init__(self, cooldown=COOLDOWN_SECONDS, max_entries=MAX_ENTRIES, backend=None):
+        self.cooldown = cooldown
+        self.max_entries = max_entries
+        self.backend = backend
+        # chave -> instante de expiração; o cooldown é fixo, então a ordem de
+        # inserção é também a ordem de expiração
+        self._expira_em = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _chave(patient_id, alert_type):
+        return f"{patient_id}#{alert_type}"
+
+    def _expirar(self, now):
+        while self._expira_em:
+            chave, expira_em = next(iter(self._expira_em.items()))
+            if expira_em > now and len(self._expira_em) <= self.max_entries:
+                break
+            self._expira_em.popitem(last=False)
+
+    def _backend_permite(self, chave, now):
+        """Consulta o backend compartilhado; em caso de erro, libera o alerta (fail-open)."""
+        try:
+            return self.backend.try_acquire(chave, self.cooldown, now)
+        except Exception as e:
+            ALERT_COOLDOWN_BACKEND_ERRORS.inc()
+            print(f"⚠️ Backend de cooldown indisponível, usando apenas o registro local: {e}")
+            return True
+
+    def try_acquire(self, patient_id, alert_type, now=None):
+        """
+        Registra o alerta se o par estiver fora do cooldown.
+
+        Retorna `(permitido, segundos_restantes)`.
+        """
+        now = time.time() if now is None else now
+        chave = self._chave(patient_id, alert_type)
+
+        with self._lock:
+            self._expirar(now)
+            expira_em = self._expira_em.get(chave)
+            if expira_em is not None:
+                return False, expira_em - now
+
+        # Outro worker pode já ter enviado o alerta deste evento
+        if self.backend is not None and not self._backend_permite(chave, now):
+            with self._lock:
+                self._expira_em[chave] = now + self.cooldown
+            return False, self.cooldown
+
+        with self._lock:
+            expira_em = self._expira_em.get(chave)
+            if expira_em is not None and expira_em > now:
+                # Corrida entre threads do mesmo processo: a primeira vence
+                return False, expira_em - now
+            self._expira_em[chave] = now + self.cooldown
+            self._expirar(now)
+        return True, 0.0
+
+    def __len__(self):
+        return len(self._expira_em)
+
+
+@lru_cache(maxsize=2)
+def get_alert_cooldown(use_localstack=False):
+    """Registro de cooldown compartilhado pelo processo (DynamoDB se ALERT_COOLDOWN_TABLE)."""
+    table_name = os.getenv("ALERT_COOLDOWN_TABLE")
+    backend = None
+    if table_name:
+        backend = DynamoDBCooldownBackend(table_name, use_localstack=use_localstack)
+    return AlertCooldown(backend=backend)
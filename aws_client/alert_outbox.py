@@ -0,0 +1,322 @@
+"""
+Outbox de alertas: o pipeline apenas enfileira o alerta em memória e uma
+thread em background o entrega ao SQS com `send_message_batch` (até 10 por
+chamada e 256 KB por requisição), retry com backoff exponencial e chave de
+idempotência por alerta. Um alerta que sozinho excede o limite do SQS vai
+para `dead_letters` em vez de bloquear a fila.
+
+Com `persist_path`, cada alerta e cada confirmação de entrega são gravados
+em um log JSONL: alertas pendentes sobrevivem a um reinício do processo. Os
+alertas rejeitados vão para um segundo JSONL (`<persist_path>.dead`) antes de
+saírem do log, então nenhum alerta é perdido em silêncio.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache, partial
+from aws_client.aws_integration import (
+    SQSClient, get_sqs_client, SQS_MAX_MESSAGE_BYTES, SQS_MAX_BATCH_BYTES,
+)
+from monitoring.metrics import ALERTS_SENT, ALERTS_FAILED, ALERT_OUTBOX_PENDING, ALERT_DEAD_LETTERS
+
+SQS_MAX_BATCH = 10
+
+
+def _lote_grande_demais(erro):
+    """BatchRequestTooLong é um erro da chamada inteira, não de uma entrada."""
+    codigo = getattr(erro, "response", {}).get("Error", {}).get("Code", "")
+    return "BatchRequestTooLong" in codigo or "BatchRequestTooLong" in type(erro).__name__
+
+
+def _falha(payload, erro, sender_fault):
+    return {"Id": payload["idempotency_key"], "SenderFault": sender_fault, "Message": str(erro)}
+
+
+class AlertOutbox:
+    """
+    - **sqs_client**: `SQSClient` de destino, ou função sem argumentos que o cria. A função
+      é chamada na thread de envio (o `get_queue_url` não roda no caminho da análise) e
+      repetida com backoff enquanto falhar.
+    - **persist_path**: log JSONL opcional para durabilidade local.
+    - **dead_letter_path**: JSONL dos alertas rejeitados (padrão: `<persist_path>.dead`).
+    - **linger_ms**: espera máxima para completar um lote antes de enviá-lo.
+    - **base_backoff** / **max_backoff**: limites (s) do backoff exponencial entre tentativas.
+    """
+
+    def __init__(self, sqs_client, persist_path=None, linger_ms=50, base_backoff=0.5, max_backoff=60.0,
+                 dead_letter_path=None):
+        self.sqs_client = None if callable(sqs_client) else sqs_client
+        self._criar_cliente = sqs_client if callable(sqs_client) else None
+        self.persist_path = persist_path
+        self.dead_letter_path = dead_letter_path or (f"{persist_path}.dead" if persist_path else None)
+        self.linger = linger_ms / 1000.0
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.dead_letters = []
+        self._pending = OrderedDict()
+        self._acked_since_compaction = 0
+        self._falhas_seguidas = 0
+        self._cond = threading.Condition()
+        self._closing = False
+        # Só `close()` interrompe o backoff; novos alertas não antecipam a próxima tentativa
+        self._interromper_backoff = threading.Event()
+
+        if persist_path:
+            self._restaurar()
+        if self.dead_letter_path:
+            self._restaurar_dead_letters()
+
+        self._thread = threading.Thread(target=self._loop, name="alert-outbox", daemon=True)
+        self._thread.start()
+
+    # --- API pública ---
+    def enqueue(self, alert_type, message, metadata=None, idempotency_key=None):
+        """Enfileira o alerta e retorna sua chave de idempotência (não bloqueia em I/O de rede)."""
+        key = idempotency_key or uuid.uuid4().hex
+        payload = SQSClient.build_payload(alert_type, message, metadata, idempotency_key=key)
+        with self._cond:
+            if key in self._pending:
+                return key
+            self._pending[key] = payload
+            self._registrar({"op": "add", "payload": payload})
+            ALERT_OUTBOX_PENDING.set(len(self._pending))
+            self._cond.notify_all()
+        return key
+
+    def send_alert(self, alert_type, message, metadata=None):
+        """Mesma assinatura de `SQSClient.send_alert` (ex.: `alert_with_cooldown`)."""
+        return self.enqueue(alert_type, message, metadata)
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self, timeout=10.0):
+        """Aguarda a entrega dos alertas pendentes. Retorna True se o outbox esvaziou."""
+        prazo = time.monotonic() + timeout
+        with self._cond:
+            while self._pending and time.monotonic() < prazo:
+                self._cond.wait(prazo - time.monotonic())
+            return not self._pending
+
+    def close(self, timeout=10.0):
+        """Tenta entregar os alertas pendentes antes de encerrar."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._interromper_backoff.set()
+        self.flush(timeout)
+        if self._pending:
+            print(f"⚠️ Outbox encerrado com {len(self._pending)} alerta(s) pendente(s)"
+                  + (f" salvos em {self.persist_path}" if self.persist_path else ""))
+
+    # --- Envio em background ---
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if self._closing:
+                        return
+                    self._cond.wait()
+                # Rajadas de alertas viram um único send_message_batch
+                prazo = time.monotonic() + self.linger
+                while len(self._pending) < SQS_MAX_BATCH and not self._closing:
+                    restante = prazo - time.monotonic()
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+                lote = self._proximo_lote()
+                if not lote:
+                    continue
+
+            try:
+                self._cliente()
+                response = self._enviar(lote)
+            except Exception as e:
+                self._aguardar_backoff(f"erro ao chamar o SQS: {e}")
+                continue
+
+            enviados = {entry["Id"] for entry in response.get("Successful", [])}
+            falhas = response.get("Failed", [])
+            with self._cond:
+                for key in enviados:
+                    payload = self._pending.pop(key, None)
+                    if payload:
+                        ALERTS_SENT.inc(alert_type=payload["alert_type"])
+                        self._registrar({"op": "ack", "key": key})
+                for falha in falhas:
+                    if falha.get("SenderFault"):
+                        # Erro do próprio alerta (ex.: tamanho): não adianta repetir
+                        self._descartar(falha["Id"], falha.get("Message"))
+                ALERT_OUTBOX_PENDING.set(len(self._pending))
+                self._compactar_se_necessario()
+                self._cond.notify_all()
+
+            if any(not f.get("SenderFault") for f in falhas):
+                self._aguardar_backoff(f"{len(falhas)} alerta(s) com falha temporária")
+            else:
+                self._falhas_seguidas = 0
+                print(f"📤 Outbox: {len(enviados)} alerta(s) entregues ao SQS.")
+
+    def _cliente(self):
+        """Cria o SQSClient na primeira tentativa de envio (resolve a URL da fila)."""
+        if self.sqs_client is None:
+            self.sqs_client = self._criar_cliente()
+        return self.sqs_client
+
+    def _proximo_lote(self):
+        """Alertas do início da fila que cabem em uma requisição (chamado com o lock)."""
+        lote, tamanho_lote = [], 0
+        for key, payload in list(self._pending.items()):
+            tamanho = SQSClient.message_size(payload)
+            if tamanho > SQS_MAX_MESSAGE_BYTES:
+                self._descartar(key, f"mensagem de {tamanho} bytes excede o limite do SQS")
+                continue
+            if len(lote) == SQS_MAX_BATCH or tamanho_lote + tamanho > SQS_MAX_BATCH_BYTES:
+                break
+            lote.append(payload)
+            tamanho_lote += tamanho
+        ALERT_OUTBOX_PENDING.set(len(self._pending))
+        return lote
+
+    def _enviar(self, lote):
+        """send_message_batch; um lote recusado por tamanho é dividido ao meio."""
+        try:
+            return self.sqs_client.send_alert_batch(lote)
+        except Exception as e:
+            if not _lote_grande_demais(e):
+                raise
+            if len(lote) == 1:
+                return {"Failed": [_falha(lote[0], e, sender_fault=True)]}
+
+        meio = len(lote) // 2
+        response = {"Successful": [], "Failed": []}
+        for parte in (lote[:meio], lote[meio:]):
+            try:
+                parcial = self._enviar(parte)
+            except Exception as e:
+                # A outra metade pode já ter sido entregue: só esta volta para a fila
+                parcial = {"Failed": [_falha(payload, e, sender_fault=False) for payload in parte]}
+            response["Successful"] += parcial.get("Successful", [])
+            response["Failed"] += parcial.get("Failed", [])
+        return response
+
+    def _descartar(self, key, erro):
+        """Move um alerta que o SQS nunca aceitará para `dead_letters` (chamado com o lock)."""
+        payload = self._pending.pop(key, None)
+        if payload is None:
+            return
+        print(f"❌ Alerta {key} rejeitado pelo SQS: {erro}")
+        ALERTS_FAILED.inc(alert_type=payload["alert_type"])
+        dead_letter = {"payload": payload, "error": erro}
+        self.dead_letters.append(dead_letter)
+        ALERT_DEAD_LETTERS.inc()
+        # Gravado antes do ack: um reinício entre as duas escritas reenvia, mas não perde
+        self._gravar_jsonl(self.dead_letter_path, dead_letter)
+        self._registrar({"op": "ack", "key": key})
+        self._cond.notify_all()
+
+    def _aguardar_backoff(self, motivo):
+        self._falhas_seguidas += 1
+        espera = min(self.max_backoff, self.base_backoff * 2 ** (self._falhas_seguidas - 1))
+        espera *= random.uniform(0.5, 1.0)
+        print(f"⚠️ Outbox: {motivo}. Nova tentativa em {espera:.1f}s.")
+        if self._interromper_backoff.wait(espera):
+            # Uma última tentativa antes de encerrar; as seguintes voltam a esperar
+            self._interromper_backoff.clear()
+
+    # --- Persistência local ---
+    @staticmethod
+    def _gravar_jsonl(path, registro):
+        if not path:
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _registrar(self, registro):
+        if not self.persist_path:
+            return
+        self._gravar_jsonl(self.persist_path, registro)
+        if registro["op"] == "ack":
+            self._acked_since_compaction += 1
+
+    def _restaurar(self):
+        if not os.path.exists(self.persist_path):
+            return
+        with open(self.persist_path, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue  # linha parcial de uma escrita interrompida
+                if registro["op"] == "add":
+                    payload = registro["payload"]
+                    self._pending[payload["idempotency_key"]] = payload
+                elif registro["op"] == "ack":
+                    self._pending.pop(registro["key"], None)
+        if self._pending:
+            print(f"🔄 Outbox: {len(self._pending)} alerta(s) pendente(s) restaurados de {self.persist_path}")
+        self._reescrever()
+
+    def _restaurar_dead_letters(self):
+        if not os.path.exists(self.dead_letter_path):
+            return
+        with open(self.dead_letter_path, encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    self.dead_letters.append(json.loads(linha))
+                except json.JSONDecodeError:
+                    continue
+        # Um alerta descartado e ainda não confirmado no log não deve ser reenviado
+        for dead_letter in self.dead_letters:
+            self._pending.pop(dead_letter["payload"]["idempotency_key"], None)
+        ALERT_DEAD_LETTERS.inc(len(self.dead_letters))
+        if self.dead_letters:
+            print(f"⚠️ Outbox: {len(self.dead_letters)} alerta(s) rejeitado(s) pelo SQS em {self.dead_letter_path}")
+
+    def _compactar_se_necessario(self):
+        if self.persist_path and self._acked_since_compaction >= 1000:
+            self._reescrever()
+
+    def _reescrever(self):
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for payload in self._pending.values():
+                f.write(json.dumps({"op": "add", "payload": payload}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.persist_path)
+        self._acked_since_compaction = 0
+
+
+_outboxes = []
+
+
+@lru_cache(maxsize=16)
+def get_alert_outbox(queue_url, use_localstack=False, persist_path=None):
+    """
+    Outbox compartilhado por fila. `persist_path` padrão vem de ALERT_OUTBOX_PATH.
+
+    Não faz I/O de rede: a URL da fila é resolvida pela thread de envio.
+    """
+    persist_path = persist_path or os.getenv("ALERT_OUTBOX_PATH") or None
+    outbox = AlertOutbox(partial(get_sqs_client, queue_url, use_localstack=use_localstack),
+                         persist_path=persist_path)
+    _outboxes.append(outbox)
+    return outbox
+
+
+def flush_all_outboxes(timeout=10.0):
+    """Aguarda a entrega em todos os outboxes do processo (ex.: workers de um pool)."""
+    return all(outbox.flush(timeout=timeout) for outbox in _outboxes)
+
+
+@atexit.register
+def close_all_outboxes(timeout=10.0):
+    for outbox in _outboxes:
+        outbox.close(timeout=timeout)
@@ -1,7 +1,18 @@
-import boto3
 import json
-import os
 import datetime
+from functools import lru_cache
+from monitoring.metrics import ALERTS_SENT, ALERTS_FAILED
+from aws_client.clients import get_client, get_cached_queue_url, cache_queue_url, is_localstack
+
+# Limite do SQS para uma mensagem e para a requisição send_message_batch inteira
+SQS_MAX_MESSAGE_BYTES = 256 * 1024
+SQS_MAX_BATCH_BYTES = 256 * 1024
+
+
+@lru_cache(maxsize=16)
+def get_sqs_client(queue_url, use_localstack=False, region_name='us-east-1'):
+    """SQSClient reutilizado por fila (evita o get_queue_url a cada alerta)."""
+    return SQSClient(queue_url, useLocalStack=use_localstack, region_name=region_name)
 
 
 class SQSClient:
@@ -16,57 +27,107 @@ class SQSClient:
         
         # Lógica inteligente: Resolve URL ou cria fila no LocalStack
         if not queue_url.startswith("http"):
+            cached_url = get_cached_queue_url(queue_url, useLocalStack, region_name)
+            if cached_url:
+                self.queue_url = cached_url
+                return
             try:
                 self.queue_url = self.sqs.get_queue_url(QueueName=queue_url)['QueueUrl']
             except Exception:
                 # Se falhar e for LocalStack, cria a fila automaticamente
-                if str(self.useLocalStack).lower() == "true" or self.useLocalStack is True:
+                if is_localstack(self.useLocalStack):
                     print(f"⚠️ [LocalStack] Fila '{queue_url}' não encontrada. Criando automaticamente...")
                     self.queue_url = self.sqs.create_queue(QueueName=queue_url)['QueueUrl']
                 else:
                     # Em produção (AWS), deve falhar se a fila não existir (Terraform deve criar)
                     raise Exception(f"Fila '{queue_url}' não encontrada na AWS.")
+            cache_queue_url(queue_url, self.queue_url, useLocalStack, region_name)
         else:
             self.queue_url = queue_url
 
     def _get_client(self):
         """
         Retorna o cliente SQS para uso direto, se necessário.
+        O client é compartilhado pelo processo (ver aws_client.clients).
         """
-        if str(self.useLocalStack).lower() == "true" or self.useLocalStack is True:
-            os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
-            os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
-            os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
-            self.sqs = boto3.client('sqs', endpoint_url="http://localhost:4566", region_name=self.region_name)
-        else:
-            self.sqs = boto3.client('sqs', region_name=self.region_name)
+        self.sqs = get_client('sqs', use_localstack=self.useLocalStack, region_name=self.region_name)
         return self.sqs
 
-    def send_alert(self, alert_type, message, metadata=None):
-        """
-        Envia uma mensagem de alerta para a fila SQS.
-        """
+    @staticmethod
+    def build_payload(alert_type, message, metadata=None, idempotency_key=None):
         payload = {
             "alert_type": alert_type,
             "message": message,
             "timestamp": datetime.datetime.utcnow().isoformat() + "Z",
             "metadata": metadata or {}
         }
+        if idempotency_key:
+            payload["idempotency_key"] = idempotency_key
+        return payload
+
+    @staticmethod
+    def _message_attributes(payload):
+        attributes = {
+            'AlertType': {
+                'StringValue': payload["alert_type"],
+                'DataType': 'String'
+            }
+        }
+        if payload.get("idempotency_key"):
+            attributes['IdempotencyKey'] = {
+                'StringValue': payload["idempotency_key"],
+                'DataType': 'String'
+            }
+        return attributes
+
+    @classmethod
+    def message_size(cls, payload):
+        """Tamanho em bytes contado pelo SQS: corpo + nome, tipo e valor de cada atributo."""
+        tamanho = len(json.dumps(payload).encode("utf-8"))
+        for nome, atributo in cls._message_attributes(payload).items():
+            tamanho += len(nome.encode("utf-8")) + len(atributo['DataType']) + len(atributo['StringValue'].encode("utf-8"))
+        return tamanho
+
+    def send_alert(self, alert_type, message, metadata=None):
+        """
+        Envia uma mensagem de alerta para a fila SQS.
+        """
+        payload = self.build_payload(alert_type, message, metadata)
 
         try:
             response = self.sqs.send_message(
                 QueueUrl=self.queue_url,
                 MessageBody=json.dumps(payload),
-                MessageAttributes={
-                    'AlertType': {
-                        'StringValue': alert_type,
-                        'DataType': 'String'
-                    }
-                }
+                MessageAttributes=self._message_attributes(payload)
             )
             print(
                 f"Alerta enviado com sucesso! MessageId: {response.get('MessageId')}")
+            ALERTS_SENT.inc(alert_type=alert_type)
             return response
         except Exception as e:
             print(f"Erro ao enviar mensagem para o SQS: {e}")
+            ALERTS_FAILED.inc(alert_type=alert_type)
             return None
+
+    def send_alert_batch(self, payloads):
+        """
+        Envia até 10 alertas em uma única chamada `send_message_batch`.
+
+        Cada payload deve ter `idempotency_key` (usado como Id da entrada e,
+        em filas FIFO, como MessageDeduplicationId). Retorna a resposta do SQS
+        com as listas `Successful` e `Failed`; erros de rede são propagados.
+        """
+        fifo = self.queue_url.endswith(".fifo")
+        entries = []
+        for payload in payloads:
+            entry = {
+                'Id': payload["idempotency_key"],
+                'MessageBody': json.dumps(payload),
+                'MessageAttributes': self._message_attributes(payload)
+            }
+            if fifo:
+                entry['MessageDeduplicationId'] = payload["idempotency_key"]
+                entry['MessageGroupId'] = str(payload["metadata"].get("patient_id", payload["alert_type"]))
+            entries.append(entry)
+
+        return self.sqs.send_message_batch(QueueUrl=self.queue_url, Entries=entries)
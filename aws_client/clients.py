@@ -0,0 +1,62 @@
+import os
+import threading
+import boto3
+from botocore.config import Config
+
+LOCALSTACK_ENDPOINT = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
+
+# Conexões HTTP mantidas por client (botocore usa 10 por padrão)
+MAX_POOL_CONNECTIONS = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "32"))
+
+_clients = {}
+_queue_urls = {}
+_lock = threading.Lock()
+
+
+def is_localstack(use_localstack):
+    """Aceita bool ou string vinda do .env ("true"/"false")."""
+    return use_localstack is True or str(use_localstack).lower() == "true"
+
+
+def get_client(service_name, use_localstack=False, region_name=None):
+    """
+    Retorna um client boto3 compartilhado pelo processo.
+
+    Clients boto3 são thread-safe; criá-los é caro (resolução de credenciais,
+    carregamento de endpoints) e cada instância nova perde o pool de conexões.
+    """
+    localstack = is_localstack(use_localstack)
+    region_name = region_name or os.getenv("AWS_DEFAULT_REGION", "us-east-1")
+    chave = (service_name, localstack, region_name)
+
+    client = _clients.get(chave)
+    if client is None:
+        # A sessão padrão do boto3 não é thread-safe durante a criação de clients
+        with _lock:
+            client = _clients.get(chave)
+            if client is None:
+                client = _clients[chave] = _criar_client(service_name, localstack, region_name)
+    return client
+
+
+def _criar_client(service_name, localstack, region_name):
+    config = Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+    )
+    if localstack:
+        os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+        os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        return boto3.client(service_name, endpoint_url=LOCALSTACK_ENDPOINT,
+                            region_name=region_name, config=config)
+    return boto3.client(service_name, region_name=region_name, config=config)
+
+
+def get_cached_queue_url(queue_name, use_localstack=False, region_name=None):
+    """URL da fila resolvida anteriormente, ou None."""
+    return _queue_urls.get((queue_name, is_localstack(use_localstack), region_name))
+
+
+def cache_queue_url(queue_name, queue_url, use_localstack=False, region_name=None):
+    _queue_urls[(queue_name, is_localstack(use_localstack), region_name)] = queue_url
@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+import requests
+from jose import jwk
+
+
+class JWKSCache:
+    """
+    Cache em memória das chaves públicas (JWKS) indexadas por `kid`.
+
+    - As chaves já são entregues construídas (`jose.jwk`), prontas para o `jwt.decode`.
+    - Após `ttl` segundos o JWKS é recarregado na próxima consulta.
+    - Um `kid` desconhecido força um refresh imediato (rotação de chaves do Cognito),
+      limitado a um a cada `min_refresh_interval` segundos.
+    - Apenas uma thread busca o JWKS por vez; as demais reutilizam o resultado.
+
+    `jwks_url` aceita URLs http(s), `file://` ou um caminho local (útil em testes).
+    """
+
+    def __init__(self, jwks_url, ttl=3600, min_refresh_interval=30, algorithm="RS256", timeout=5):
+        self.jwks_url = jwks_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.algorithm = algorithm
+        self.timeout = timeout
+        self._keys = {}
+        self._fetched_at = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_key(self, kid):
+        """Retorna a chave construída para o `kid`, ou None se não existir."""
+        if self._idade() >= self.ttl:
+            self._refresh(self._generation)
+
+        key = self._keys.get(kid)
+        if key is None and self._idade() >= self.min_refresh_interval:
+            self._refresh(self._generation)
+            key = self._keys.get(kid)
+        return key
+
+    def _idade(self):
+        if self._fetched_at is None:
+            return float("inf")
+        return time.monotonic() - self._fetched_at
+
+    def _refresh(self, generation_vista):
+        with self._lock:
+            # Outra thread já atualizou enquanto esperávamos o lock
+            if self._generation != generation_vista:
+                return
+
+            try:
+                jwks = self._fetch()
+                self._keys = {
+                    key["kid"]: jwk.construct(key, key.get("alg", self.algorithm))
+                    for key in jwks.get("keys", [])
+                }
+            except Exception as e:
+                if not self._keys:
+                    raise
+                print(f"⚠️ Falha ao atualizar JWKS, mantendo chaves em cache: {e}")
+
+            self._fetched_at = time.monotonic()
+            self._generation += 1
+
+    def _fetch(self):
+        if self.jwks_url.startswith(("http://", "https://")):
+            response = requests.get(self.jwks_url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+        path = self.jwks_url[len("file://"):] if self.jwks_url.startswith("file://") else self.jwks_url
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=8)
+def get_jwks_cache(jwks_url, ttl=3600):
+    """Instância única de cache por URL de JWKS."""
+    return JWKSCache(jwks_url, ttl=ttl)
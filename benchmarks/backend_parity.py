@@ -0,0 +1,168 @@
+"""
+Paridade e desempenho dos backends de inferência (ONNX / INT8) contra o PyTorch.
+
+Para cada modelo, compara as saídas do backend com as do PyTorch nas mesmas
+entradas (divergência de rótulos, scores e keypoints) e mede a latência.
+
+Exemplo:
+    python -m benchmarks.backend_parity --backends onnx int8 --video video.mp4 --output parity.json
+"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+import cv2
+import numpy as np
+from benchmarks.synthetic_media import generate_video
+from processors.audio_decode import decode_audio, SAMPLE_RATE
+from processors.fall_detection import FallDetector, extrair_pessoas
+from singletons.backends import BACKEND_PYTORCH, BACKENDS
+from singletons.singletons import (
+    config, get_pose_model, get_text_analysis_model, get_audio_analysis_model,
+)
+
+TEXTOS_PADRAO = [
+    "help me, I fell and I can't get up",
+    "I am so scared, please somebody come",
+    "I feel very sad and lonely today",
+    "thank you, I am feeling fine",
+    "this is unacceptable, I am angry",
+    "what a lovely morning",
+]
+
+
+def _cronometrar(fn, entradas):
+    saidas, latencias = [], []
+    for entrada in entradas:
+        inicio = time.perf_counter()
+        saidas.append(fn(entrada))
+        latencias.append(time.perf_counter() - inicio)
+    return saidas, float(np.median(latencias))
+
+
+def _desempenho(base_s, cand_s):
+    return {
+        "p50_ms_pytorch": round(base_s * 1000, 2),
+        "p50_ms": round(cand_s * 1000, 2),
+        "speedup": round(base_s / cand_s, 2) if cand_s > 0 else None,
+    }
+
+
+def _ler_frames(video_path, max_frames):
+    cap = cv2.VideoCapture(str(video_path))
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _estados(pessoas, frame_height):
+    detector = FallDetector(frame_height=frame_height)
+    return [detector.update(keypoints, boxes) for keypoints, boxes in pessoas]
+
+
+def comparar_pose(frames, backend):
+    def inferir(modelo):
+        return lambda frame: extrair_pessoas(modelo(frame, conf=0.6, iou=0.4, verbose=False)[0])
+
+    base, base_s = _cronometrar(inferir(get_pose_model(config.pose_model, BACKEND_PYTORCH)), frames)
+    cand, cand_s = _cronometrar(inferir(get_pose_model(config.pose_model, backend)), frames)
+
+    mesma_contagem, erros_px = 0, []
+    for (kp_b, box_b), (kp_c, box_c) in zip(base, cand):
+        if len(box_b) != len(box_c):
+            continue
+        mesma_contagem += 1
+        if len(kp_b) and len(kp_c):
+            # Pareia as pessoas pela posição horizontal da caixa
+            ordem_b, ordem_c = np.argsort(box_b[:, 0]), np.argsort(box_c[:, 0])
+            erros_px.append(float(np.abs(kp_b[ordem_b] - kp_c[ordem_c]).mean()))
+
+    altura = frames[0].shape[0]
+    estados_b, estados_c = _estados(base, altura), _estados(cand, altura)
+    return dict(
+        frames=len(frames),
+        detection_count_agreement=round(mesma_contagem / len(frames), 4),
+        keypoint_mean_abs_error_px=round(float(np.mean(erros_px)), 3) if erros_px else None,
+        state_agreement=round(float(np.mean([a == b for a, b in zip(estados_b, estados_c)])), 4),
+        **_desempenho(base_s, cand_s))
+
+
+def _comparar_classificador(base_fn, cand_fn, entradas):
+    base, base_s = _cronometrar(base_fn, entradas)
+    cand, cand_s = _cronometrar(cand_fn, entradas)
+
+    def top(saida):
+        # text-classification retorna [{...}], audio-classification retorna o top-k ordenado
+        return saida[0]
+
+    rotulos = [top(b)["label"] == top(c)["label"] for b, c in zip(base, cand)]
+    diffs = [abs(top(b)["score"] - top(c)["score"]) for b, c in zip(base, cand)]
+    return dict(
+        inputs=len(entradas),
+        label_agreement=round(float(np.mean(rotulos)), 4),
+        max_score_drift=round(float(np.max(diffs)), 4),
+        **_desempenho(base_s, cand_s))
+
+
+def comparar_texto(textos, backend):
+    return _comparar_classificador(
+        get_text_analysis_model(BACKEND_PYTORCH), get_text_analysis_model(backend), textos)
+
+
+def comparar_audio(janelas, backend):
+    return _comparar_classificador(
+        get_audio_analysis_model(BACKEND_PYTORCH), get_audio_analysis_model(backend), janelas)
+
+
+def _janelas(audio, segundos=4.0):
+    tamanho = int(segundos * SAMPLE_RATE)
+    return [audio[i:i + tamanho] for i in range(0, max(1, len(audio) - tamanho + 1), tamanho)]
+
+
+def run(args):
+    workdir = Path(tempfile.mkdtemp(prefix="parity-"))
+    video_path = args.video or generate_video(workdir / "synthetic.mp4", seconds=args.seconds)
+    frames = _ler_frames(video_path, args.frames)
+    janelas = _janelas(decode_audio(video_path))
+    textos = TEXTOS_PADRAO
+    if args.texts:
+        textos = [linha.strip() for linha in args.texts.read_text(encoding="utf-8").splitlines() if linha.strip()]
+
+    relatorio = {"video": str(video_path), "backends": {}}
+    for backend in args.backends:
+        print(f"🔬 Comparando backend '{backend}' com o PyTorch...")
+        relatorio["backends"][backend] = {
+            "pose": comparar_pose(frames, backend),
+            "text_analysis": comparar_texto(textos, backend),
+            "audio_analysis": comparar_audio(janelas, backend),
+        }
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paridade dos backends ONNX/INT8 contra o PyTorch.")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "int8"],
+                        choices=[b for b in BACKENDS if b != BACKEND_PYTORCH])
+    parser.add_argument("--video", type=Path, help="Vídeo de referência (padrão: vídeo sintético)")
+    parser.add_argument("--seconds", type=float, default=10, help="Duração do vídeo sintético")
+    parser.add_argument("--frames", type=int, default=120, help="Frames comparados no modelo de pose")
+    parser.add_argument("--texts", type=Path, help="Arquivo com uma frase por linha")
+    parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    relatorio = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(relatorio, encoding="utf-8")
+        print(f"📊 Relatório salvo em {args.output}")
+    else:
+        print(relatorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark offline e reprodutível do pipeline.
+
+Exemplo:
+    python -m benchmarks.run_benchmark --seconds 30 --width 640 --height 480 --fps 30 \\
+        --repeats 5 --stub-models --aws moto --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo (MB)."""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta em KB, macOS em bytes
+    return round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _resumo(latencias, itens_por_execucao=1):
+    arr = np.asarray(latencias)
+    return {
+        "runs": len(arr),
+        "p50_ms": round(float(np.percentile(arr, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(arr, 99)) * 1000, 2),
+        "mean_ms": round(float(arr.mean()) * 1000, 2),
+        "throughput_per_s": round(itens_por_execucao / float(np.median(arr)), 2),
+    }
+
+
+def _medir(fn, repeats):
+    latencias, resultado = [], None
+    for _ in range(repeats):
+        inicio = time.perf_counter()
+        resultado = fn()
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, resultado
+
+
+def _iniciar_aws(modo, video_path, bucket, queue_name):
+    """Prepara S3/SQS locais (moto em memória ou LocalStack) e envia o vídeo ao bucket."""
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    mock = None
+    if modo == "moto":
+        from moto import mock_aws
+        mock = mock_aws()
+        mock.start()
+
+    from aws_client.clients import get_client
+    use_localstack = modo == "localstack"
+    s3 = get_client("s3", use_localstack=use_localstack, region_name="us-east-1")
+    sqs = get_client("sqs", use_localstack=use_localstack, region_name="us-east-1")
+    s3.create_bucket(Bucket=bucket)
+    sqs.create_queue(QueueName=queue_name)
+    s3.upload_file(str(video_path), bucket, video_path.name)
+    return mock, use_localstack
+
+
+def run(args):
+    from benchmarks.synthetic_media import generate_video
+    if args.stub_models:
+        from benchmarks.stub_models import install_stub_models
+        install_stub_models()
+
+    import orchestrator.cloud_orchestrator as orchestrator
+    from aws_client.aws_integration import get_sqs_client
+    from processors.fall_detection import analyze_video
+    from processors.audio_decode import decode_audio, SAMPLE_RATE
+    from processors.analyze_multimodal_ai import analyze_multimodal_ai
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench-"))
+    inicio = time.perf_counter()
+    video_path = generate_video(workdir / "synthetic.mp4", seconds=args.seconds, width=args.width,
+                                height=args.height, fps=args.fps, seed=args.seed)
+    geracao = time.perf_counter() - inicio
+
+    mock, use_localstack = _iniciar_aws(args.aws, video_path, orchestrator.BUCKET_NAME,
+                                        orchestrator.QUEUE_URL)
+    total_frames = int(args.seconds * args.fps)
+    stages = {}
+    try:
+        download_dir = workdir / "download"
+        download_dir.mkdir()
+        latencias, baixado = _medir(lambda: orchestrator.download_video(
+            video_path.name, use_s3=True, use_localstack=use_localstack, dest_dir=download_dir
+        ), args.repeats)
+        stages["download_video"] = _resumo(latencias)
+
+        latencias, video = _medir(lambda: analyze_video(
+            str(baixado), headless=True, stride=args.stride, batch_size=args.batch_size,
+            model_name=orchestrator.config.pose_model, motion_threshold=args.motion_threshold),
+            args.repeats)
+        stages["analyze_video_file"] = dict(_resumo(latencias, total_frames), unit="frames")
+
+        latencias, audio = _medir(lambda: decode_audio(baixado), args.repeats)
+        stages["extract_audio"] = dict(_resumo(latencias, len(audio) / SAMPLE_RATE), unit="audio_seconds")
+
+        texto_path = workdir / "transcription.txt"
+        latencias, texto = _medir(lambda: orchestrator.transcrever(audio, str(texto_path)),
+                                  args.repeats)
+        stages["transcription"] = dict(_resumo(latencias, len(audio) / SAMPLE_RATE), unit="audio_seconds")
+
+        latencias, _ = _medir(lambda: analyze_multimodal_ai(texto, audio), args.repeats)
+        stages["analyze_multimodal_ai"] = _resumo(latencias)
+
+        sqs = get_sqs_client(orchestrator.QUEUE_URL, use_localstack=use_localstack)
+        latencias, _ = _medir(lambda: sqs.send_alert("BENCHMARK", "benchmark", {"patient_id": "bench"}),
+                              args.repeats)
+        stages["alert_send"] = _resumo(latencias)
+    finally:
+        if mock:
+            mock.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "seconds": args.seconds, "width": args.width, "height": args.height, "fps": args.fps,
+            "repeats": args.repeats, "stride": args.stride, "batch_size": args.batch_size,
+            "motion_threshold": args.motion_threshold,
+            "stub_models": args.stub_models, "aws": args.aws, "seed": args.seed,
+        },
+        "media_generation_s": round(geracao, 3),
+        "video_fps": video["fps"] if video else None,
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline do pipeline de monitoramento.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duração do vídeo sintético")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3, help="Execuções por etapa")
+    parser.add_argument("--stride", type=int, default=1, help="INFERENCE_STRIDE do YOLO")
+    parser.add_argument("--batch-size", type=int, default=1, help="INFERENCE_BATCH_SIZE do YOLO")
+    parser.add_argument("--motion-threshold", type=float, default=0.0, help="MOTION_GATE_THRESHOLD (0 desativa)")
+    parser.add_argument("--stub-models", action="store_true",
+                        help="Usa modelos substitutos leves (sem downloads nem rede)")
+    parser.add_argument("--aws", choices=["moto", "localstack"], default="moto",
+                        help="Backend local para S3/SQS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    relatorio = json.dumps(run(args), indent=2)
+    if args.output:
+        args.output.write_text(relatorio, encoding="utf-8")
+        print(f"📊 Relatório salvo em {args.output}")
+    else:
+        print(relatorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import subprocess
+import wave
+from pathlib import Path
+import cv2
+import numpy as np
+from processors.audio_decode import get_ffmpeg_exe
+
+AUDIO_SAMPLE_RATE = 16000
+
+
+def _desenhar_pessoa(frame, progresso):
+    """Desenha uma 'pessoa' em pé que cai para a horizontal na segunda metade do vídeo."""
+    h, w = frame.shape[:2]
+    cx = w // 2
+    if progresso < 0.5:
+        x0, y0, x1, y1 = cx - w // 16, h // 5, cx + w // 16, int(h * 0.9)
+    else:
+        x0, y0, x1, y1 = cx - w // 4, int(h * 0.75), cx + w // 4, int(h * 0.9)
+    cv2.rectangle(frame, (x0, y0), (x1, y1), (180, 140, 120), -1)
+    cv2.circle(frame, ((x0 + x1) // 2, max(0, y0 - h // 20)), max(4, h // 25), (200, 170, 150), -1)
+
+
+def generate_audio(path, seconds, sample_rate=AUDIO_SAMPLE_RATE, seed=0):
+    """Ruído de fundo com um impacto curto e um grito sustentado (WAV PCM 16 bits mono)."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    t = np.arange(n) / sample_rate
+    audio = 0.005 * rng.standard_normal(n)
+
+    impacto = slice(int(n * 0.5), int(n * 0.5) + int(0.1 * sample_rate))
+    audio[impacto] += 0.6 * rng.standard_normal(impacto.stop - impacto.start)
+
+    grito = slice(int(n * 0.7), min(n, int(n * 0.7) + int(1.5 * sample_rate)))
+    audio[grito] += 0.3 * np.sin(2 * np.pi * 880 * t[grito])
+
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+    return Path(path)
+
+
+def generate_video(path, seconds=10, width=640, height=480, fps=30, with_audio=True, seed=0):
+    """
+    Gera um vídeo sintético reprodutível (mp4) com duração, resolução e fps configuráveis.
+    Com `with_audio`, a trilha de `generate_audio` é multiplexada via ffmpeg.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    video_only = path.with_name(path.stem + "_video_only.mp4")
+
+    writer = cv2.VideoWriter(str(video_only), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    total = int(seconds * fps)
+    fundo = rng.integers(40, 80, size=(height, width, 3), dtype=np.uint8)
+    for i in range(total):
+        frame = fundo.copy()
+        _desenhar_pessoa(frame, i / max(1, total - 1))
+        writer.write(frame)
+    writer.release()
+
+    if not with_audio:
+        video_only.replace(path)
+        return path
+
+    audio_path = path.with_suffix(".wav")
+    generate_audio(audio_path, seconds, seed=seed)
+    cmd = [
+        get_ffmpeg_exe(), "-nostdin", "-v", "error", "-y",
+        "-i", str(video_only), "-i", str(audio_path),
+        "-c:v", "copy", "-c:a", "aac", "-shortest", str(path),
+    ]
+    subprocess.run(cmd, check=True)
+    video_only.unlink(missing_ok=True)
+    audio_path.unlink(missing_ok=True)
+    return path
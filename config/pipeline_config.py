@@ -1,5 +1,32 @@
+import os
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_str(name: str, default: str) -> str:
+    return os.getenv(name, default)
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() == "true"
+
+
+# Campos que não alteram o resultado da análise (não entram na chave do cache)
+_FINGERPRINT_EXCLUDE = {
+    "base_dir", "text_output_path", "translated_output_path", "inference_batch_size",
+    "result_cache_dir", "result_cache_max_entries", "result_cache_max_age",
+    "s3_download_concurrency", "s3_download_chunk_mb", "s3_streaming",
+    "video_cache_dir", "video_cache_max_mb", "model_export_dir", "keypoint_log_dir",
+    "keypoint_log_max_mb", "audio_emotion_batch_size",
+}
 
 
 @dataclass(frozen=True)
@@ -8,5 +35,77 @@ class PipelineConfig:
     base_dir: Path = Path(".")
     text_output_path: Path = Path("transcription.txt")
     translated_output_path: Path = Path("transcription_pt.txt")
-    whisper_model: str = "base"
+    whisper_model: str = field(
+        default_factory=lambda: _env_str("WHISPER_MODEL", "base"))
+    # Motor de transcrição: whisper (local, com VAD) ou google (API web)
+    transcription_engine: str = field(
+        default_factory=lambda: _env_str("TRANSCRIPTION_ENGINE", "whisper"))
+    transcription_language: str = field(
+        default_factory=lambda: _env_str("TRANSCRIPTION_LANGUAGE", "en-US"))
     translate_target: str = "pt"
+    pose_model: str = "yolov8n-pose.pt"
+    # Backend de inferência por modelo: pytorch, onnx ou int8 (ver singletons/backends.py)
+    pose_backend: str = field(
+        default_factory=lambda: _env_str("POSE_BACKEND", "pytorch"))
+    text_backend: str = field(
+        default_factory=lambda: _env_str("TEXT_BACKEND", "pytorch"))
+    audio_backend: str = field(
+        default_factory=lambda: _env_str("AUDIO_BACKEND", "pytorch"))
+    # Modelos exportados (ONNX / INT8) reaproveitados entre execuções
+    model_export_dir: str = field(
+        default_factory=lambda: _env_str("MODEL_EXPORT_DIR", "exported_models"))
+    # Analisa 1 a cada N frames (1 = todos). Os limiares da máquina de estados são escalados.
+    inference_stride: int = field(
+        default_factory=lambda: _env_int("INFERENCE_STRIDE", 1))
+    # Quantidade de frames enviados ao YOLO em um único forward pass
+    inference_batch_size: int = field(
+        default_factory=lambda: _env_int("INFERENCE_BATCH_SIZE", 1))
+    # Motion gate: diferença média mínima (0-1) entre frames para rodar o YOLO (0 desativa)
+    motion_threshold: float = field(
+        default_factory=lambda: _env_float("MOTION_GATE_THRESHOLD", 0.0))
+    # Máximo de frames analisados seguidos reaproveitando a última detecção
+    motion_max_skip: int = field(
+        default_factory=lambda: _env_int("MOTION_GATE_MAX_SKIP", 30))
+    # Emoção acústica por janelas (ver processors/audio_emotion.py)
+    audio_emotion_window_seconds: float = field(
+        default_factory=lambda: _env_float("AUDIO_EMOTION_WINDOW_SECONDS", 4.0))
+    audio_emotion_hop_seconds: float = field(
+        default_factory=lambda: _env_float("AUDIO_EMOTION_HOP_SECONDS", 2.0))
+    # Classifica apenas as janelas com voz (VAD por energia)
+    audio_emotion_voiced_only: bool = field(
+        default_factory=lambda: _env_bool("AUDIO_EMOTION_VOICED_ONLY", True))
+    audio_emotion_batch_size: int = field(
+        default_factory=lambda: _env_int("AUDIO_EMOTION_BATCH_SIZE", 8))
+    # Log de keypoints por vídeo analisado, ~18 MB por hora a 30 fps (vazio desativa)
+    keypoint_log_dir: str = field(
+        default_factory=lambda: _env_str("KEYPOINT_LOG_DIR", ""))
+    # Tamanho máximo do diretório de logs; os mais antigos são removidos
+    keypoint_log_max_mb: int = field(
+        default_factory=lambda: _env_int("KEYPOINT_LOG_MAX_MB", 10240))
+    # Cache de resultados por conteúdo (vazio desativa)
+    result_cache_dir: str = field(
+        default_factory=lambda: _env_str("RESULT_CACHE_DIR", "temp_processing/result_cache"))
+    result_cache_max_entries: int = field(
+        default_factory=lambda: _env_int("RESULT_CACHE_MAX_ENTRIES", 1000))
+    result_cache_max_age: int = field(
+        default_factory=lambda: _env_int("RESULT_CACHE_MAX_AGE", 7 * 24 * 3600))
+    # Download do S3 em partes paralelas (ranged GETs)
+    s3_download_concurrency: int = field(
+        default_factory=lambda: _env_int("S3_DOWNLOAD_CONCURRENCY", 10))
+    s3_download_chunk_mb: int = field(
+        default_factory=lambda: _env_int("S3_DOWNLOAD_CHUNK_MB", 8))
+    # Decodifica direto de uma URL pré-assinada, sem esperar o download completo
+    s3_streaming: bool = field(
+        default_factory=lambda: _env_bool("S3_STREAMING", False))
+    # Cache local de vídeos baixados, limitado por tamanho (vazio desativa)
+    video_cache_dir: str = field(
+        default_factory=lambda: _env_str("VIDEO_CACHE_DIR", ""))
+    video_cache_max_mb: int = field(
+        default_factory=lambda: _env_int("VIDEO_CACHE_MAX_MB", 2048))
+
+    def fingerprint(self) -> dict:
+        """Parâmetros que influenciam o resultado da análise."""
+        return {
+            chave: valor for chave, valor in asdict(self).items()
+            if chave not in _FINGERPRINT_EXCLUDE
+        }
@@ -0,0 +1,182 @@
+"""
+Métricas do pipeline em memória, expostas no formato texto do Prometheus.
+
+Implementação mínima e sem dependências: cada observação é uma busca em
+dicionário e um incremento sob lock, custo desprezível mesmo no loop por
+frame da detecção de quedas.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_registry = []
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pares = list(key) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{nome}="{valor}"' for nome, valor in pares) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self):
+        linhas = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        linhas.extend(self._samples())
+        return "\n".join(linhas)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, description):
+        super().__init__(name, description)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, buckets=LATENCY_BUCKETS):
+        super().__init__(name, description)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, count=1, **labels):
+        """Registra `count` observações de `value` (ex.: latência por frame de um lote)."""
+        key = _label_key(labels)
+        indice = bisect_left(self.buckets, value)
+        with self._lock:
+            serie = self._series.get(key)
+            if serie is None:
+                serie = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += count
+            serie[1] += value * count
+            serie[2] += count
+
+    @contextmanager
+    def time(self, **labels):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - inicio, **labels)
+
+    def _samples(self):
+        linhas = []
+        with self._lock:
+            for key, (contagens, soma, total) in self._series.items():
+                acumulado = 0
+                for limite, contagem in zip(self.buckets, contagens):
+                    acumulado += contagem
+                    linhas.append(f"{self.name}_bucket{_format_labels(key, [('le', limite)])} {acumulado}")
+                linhas.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {total}")
+                linhas.append(f"{self.name}_sum{_format_labels(key)} {soma}")
+                linhas.append(f"{self.name}_count{_format_labels(key)} {total}")
+        return linhas
+
+
+def render_metrics():
+    """Todas as métricas registradas no formato de exposição do Prometheus."""
+    return "\n".join(metrica.render() for metrica in _registry) + "\n"
+
+
+# --- Métricas do pipeline ---
+S3_DOWNLOAD_SECONDS = Histogram(
+    "s3_download_seconds", "Duração do download do vídeo no S3")
+YOLO_INFERENCE_SECONDS = Histogram(
+    "yolo_inference_seconds_per_frame", "Tempo de inferência do YOLO-Pose por frame",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1))
+AUDIO_EXTRACTION_SECONDS = Histogram(
+    "audio_extraction_seconds", "Duração da decodificação do áudio")
+TRANSCRIPTION_SECONDS = Histogram(
+    "transcription_seconds", "Duração da transcrição (label engine)")
+TRANSCRIPTION_SPEECH_RATIO = Histogram(
+    "transcription_speech_ratio", "Fração do áudio com voz (VAD) enviada ao Whisper",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1.0))
+DIARIZATION_SECONDS = Histogram(
+    "diarization_seconds", "Duração da diarização de locutores")
+EMOTION_INFERENCE_SECONDS = Histogram(
+    "emotion_inference_seconds", "Duração da inferência de emoção (label modality=text|audio)")
+EMOTION_BATCH_SIZE = Histogram(
+    "emotion_batch_size", "Entradas por forward pass dos classificadores de emoção (label modality)",
+    buckets=(1, 2, 4, 8, 16, 32, 64))
+
+FRAMES_PROCESSED = Counter(
+    "frames_processed_total", "Frames analisados pelo modelo de pose")
+FRAMES_SKIPPED = Counter(
+    "frames_skipped_total", "Frames sem inferência do YOLO (cena estática, motion gate)")
+ALERTS_SENT = Counter(
+    "alerts_sent_total", "Alertas enviados ao SQS (label alert_type)")
+ALERTS_FAILED = Counter(
+    "alerts_failed_total", "Falhas ao enviar alertas ao SQS (label alert_type)")
+ALERTS_SUPPRESSED = Counter(
+    "alerts_suppressed_total", "Alertas suprimidos (label reason)")
+JOBS_IN_FLIGHT = Gauge(
+    "pipeline_jobs_in_flight", "Vídeos em processamento no momento")
+STARTUP_SECONDS = Gauge(
+    "startup_seconds", "Duração das fases de inicialização: imports, carga de modelos, time_to_ready (label phase)")
+FIRST_ANALYSIS_SECONDS = Gauge(
+    "first_analysis_seconds", "Latência da primeira análise atendida pelo processo")
+STREAM_FRAME_LATENCY_SECONDS = Histogram(
+    "stream_frame_latency_seconds", "Tempo entre a captura de um frame ao vivo e a atualização do estado")
+FRAME_TO_ALERT_SECONDS = Histogram(
+    "stream_frame_to_alert_seconds", "Tempo entre a captura do frame que confirmou a queda e o envio do alerta")
+STREAM_FRAMES_DROPPED = Counter(
+    "stream_frames_dropped_total", "Frames ao vivo descartados porque a inferência ficou para trás")
+STREAM_RECONNECTS = Counter(
+    "stream_reconnects_total", "Reconexões de fontes ao vivo (RTSP/HTTP) após falha de leitura")
+ALERT_COOLDOWN_BACKEND_ERRORS = Counter(
+    "alert_cooldown_backend_errors_total", "Falhas do backend compartilhado de cooldown (alerta liberado pelo registro local)")
+ALERT_OUTBOX_PENDING = Gauge(
+    "alert_outbox_pending", "Alertas aguardando entrega ao SQS no outbox")
+ALERT_DEAD_LETTERS = Gauge(
+    "alert_dead_letters", "Alertas rejeitados pelo SQS guardados para reprocessamento manual")
+VIDEO_CACHE_REQUESTS = Counter(
+    "video_cache_requests_total", "Consultas ao cache local de vídeos baixados do S3 (label result: hit/miss)")
@@ -0,0 +1,201 @@
+"""
+Processamento em lote de um manifesto de vídeos (backfill de gravações).
+
+O manifesto tem um vídeo por linha: apenas a chave (caminho local ou chave do
+S3) ou um objeto JSON com `video_key` e, opcionalmente, `patient_id` e
+`location`. Os vídeos são distribuídos em um pool de processos (modelos
+carregados uma vez por worker) e cada resultado é gravado como uma linha
+JSONL assim que fica pronto. As chaves concluídas vão para um checkpoint:
+uma execução interrompida retoma de onde parou.
+
+Exemplo:
+    python -m orchestrator.batch_runner noite.txt --output resultados.jsonl --use-s3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+# Memória estimada por worker com os três modelos carregados
+WORKER_MEMORY_MB = 2048
+
+
+def ler_manifesto(path):
+    """Retorna a lista de itens `{"video_key", "patient_id", "location"}` do manifesto."""
+    itens = []
+    with open(path, encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha or linha.startswith("#"):
+                continue
+            item = json.loads(linha) if linha.startswith("{") else {"video_key": linha}
+            itens.append(item)
+    return itens
+
+
+def ler_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {linha.rstrip("\n") for linha in f if linha.strip()}
+
+
+def _memoria_disponivel_mb():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def dimensionar_pool(worker_memory_mb=WORKER_MEMORY_MB):
+    """Workers limitados pelos núcleos e pela memória disponível."""
+    workers = os.cpu_count() or 1
+    memoria = _memoria_disponivel_mb()
+    if memoria:
+        workers = min(workers, max(1, memoria // worker_memory_mb))
+    return workers
+
+
+# --- Worker ---
+_opcoes_worker = {}
+
+
+def _iniciar_worker(opcoes, threads):
+    """Executado uma vez por processo: limita as threads de cada worker e aquece os modelos."""
+    # Sem isso, cada worker usaria todos os núcleos e eles disputariam a CPU
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    _opcoes_worker.update(opcoes)
+    if opcoes["warmup"]:
+        from orchestrator.cloud_orchestrator import config
+        from singletons.singletons import warmup_models
+        print(f"🔥 [worker {os.getpid()}] Modelos prontos: {warmup_models(config.pose_model)}")
+
+
+def _processar(item):
+    inicio = time.perf_counter()
+    registro = {"video_key": item["video_key"], "worker": os.getpid()}
+    try:
+        from orchestrator.cloud_orchestrator import process_patient_video
+        registro["result"] = process_patient_video(
+            item["video_key"],
+            use_s3=_opcoes_worker["use_s3"],
+            use_localstack=_opcoes_worker["use_localstack"],
+            headless=True,
+            patient_id=item.get("patient_id"),
+            location=item.get("location"),
+            send_alerts=_opcoes_worker["send_alerts"])
+        registro["status"] = "done"
+
+        if _opcoes_worker["send_alerts"]:
+            from aws_client.alert_outbox import flush_all_outboxes
+            # Workers do pool não executam atexit: o alerta precisa sair antes de retornar.
+            # Sem a entrega, o vídeo fica fora do checkpoint e é refeito na próxima execução.
+            if not flush_all_outboxes():
+                registro["status"] = "failed"
+                registro["error"] = "alertas não entregues ao SQS"
+    except Exception as e:
+        registro["status"] = "failed"
+        registro["error"] = str(e)
+    registro["seconds"] = round(time.perf_counter() - inicio, 3)
+    return registro
+
+
+# --- Processo principal ---
+def run_batch(itens, output_path, checkpoint_path, workers, opcoes, max_in_flight=None):
+    """
+    Processa os itens ainda não concluídos e retorna o resumo da execução.
+
+    No máximo `max_in_flight` vídeos ficam submetidos ao pool ao mesmo tempo,
+    então manifestos grandes não são carregados inteiros na fila do executor.
+    """
+    concluidos = ler_checkpoint(checkpoint_path)
+    pendentes = [item for item in itens if item["video_key"] not in concluidos]
+    resumo = {
+        "total": len(itens), "skipped": len(itens) - len(pendentes),
+        "done": 0, "failed": 0, "workers": workers,
+    }
+    print(f"📋 {len(itens)} vídeos no manifesto, {resumo['skipped']} já concluídos, "
+          f"{len(pendentes)} a processar com {workers} workers.")
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    max_in_flight = max_in_flight or workers * 2
+    inicio = time.perf_counter()
+
+    # spawn: cada worker começa limpo, sem herdar threads do processo principal
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                             initializer=_iniciar_worker, initargs=(opcoes, threads)) as pool, \
+            open(output_path, "a", encoding="utf-8") as saida, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+        fila = iter(pendentes)
+        em_andamento = set()
+        while True:
+            for item in fila:
+                em_andamento.add(pool.submit(_processar, item))
+                if len(em_andamento) >= max_in_flight:
+                    break
+            if not em_andamento:
+                break
+
+            prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                registro = futuro.result()
+                saida.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                saida.flush()
+                resumo[registro["status"]] += 1
+                # Falhas não entram no checkpoint: são tentadas de novo na próxima execução
+                if registro["status"] == "done":
+                    checkpoint.write(registro["video_key"] + "\n")
+                    checkpoint.flush()
+                    os.fsync(checkpoint.fileno())
+
+                feitos = resumo["done"] + resumo["failed"]
+                horas = (time.perf_counter() - inicio) / 3600
+                print(f"{'✅' if registro['status'] == 'done' else '❌'} [{feitos}/{len(pendentes)}] "
+                      f"{registro['video_key']} ({registro['seconds']}s, {feitos / horas:.0f} vídeos/hora)")
+
+    elapsed = time.perf_counter() - inicio
+    processados = resumo["done"] + resumo["failed"]
+    resumo["elapsed_seconds"] = round(elapsed, 3)
+    resumo["videos_per_hour"] = round(processados / (elapsed / 3600), 1) if elapsed > 0 and processados else 0.0
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa um manifesto de vídeos em lote.")
+    parser.add_argument("manifest", type=Path, help="Um vídeo por linha (chave ou JSON com video_key)")
+    parser.add_argument("--output", type=Path, default=Path("batch_results.jsonl"), help="Resultados (JSONL)")
+    parser.add_argument("--checkpoint", type=Path, help="Chaves concluídas (padrão: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, help="Processos do pool (padrão: núcleos e memória disponíveis)")
+    parser.add_argument("--worker-memory-mb", type=int, default=WORKER_MEMORY_MB,
+                        help="Memória estimada por worker, usada no dimensionamento automático")
+    parser.add_argument("--use-s3", action="store_true", help="Baixa os vídeos do S3")
+    parser.add_argument("--localstack", action="store_true", help="Usa o LocalStack")
+    parser.add_argument("--send-alerts", action="store_true",
+                        help="Envia os alertas ao SQS (desativado por padrão em reprocessamentos)")
+    parser.add_argument("--no-warmup", action="store_true", help="Não pré-carrega os modelos nos workers")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.output.with_name(args.output.name + ".checkpoint")
+    workers = args.workers or dimensionar_pool(args.worker_memory_mb)
+    opcoes = {
+        "use_s3": args.use_s3, "use_localstack": args.localstack,
+        "send_alerts": args.send_alerts, "warmup": not args.no_warmup,
+    }
+
+    resumo = run_batch(ler_manifesto(args.manifest), args.output, checkpoint_path, workers, opcoes)
+    print(f"📊 {json.dumps(resumo)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,48 @@
 import os
+import re
 import json
-import boto3
+import shutil
+import tempfile
+from functools import lru_cache
 from pathlib import Path
-from aws_client.aws_integration import SQSClient
-from processors.fall_detection import analyze_video_file
+from boto3.s3.transfer import TransferConfig
+from aws_client.alert_cooldown import get_alert_cooldown
+from aws_client.alert_outbox import get_alert_outbox
+from aws_client.clients import get_client
+from config.pipeline_config import PipelineConfig
+from monitoring.metrics import S3_DOWNLOAD_SECONDS, JOBS_IN_FLIGHT, ALERTS_SUPPRESSED, VIDEO_CACHE_REQUESTS
+from orchestrator.result_cache import ResultCache, build_cache_key, file_sha256
+from orchestrator.stage_executor import StageTimer, run_branches
+from orchestrator.video_cache import VideoCache
+from processors.acoustic_events import summarize_events
+from processors.fall_detection import analyze_video
 from processors.analyze_multimodal_ai import analyze_multimodal_ai
-from processors.transcribe_video import extract_audio_from_video
-from processors.transcribe_video import transcribe_audio_to_text
+from processors.audio_decode import decode_audio
+from processors.keypoint_log import prune_logs
+from processors.transcribe_video import transcribe_audio_to_text, transcribe_speech
+from singletons.singletons import model_versions
 # Configurações
 QUEUE_URL = os.getenv("QUEUE_URL", "FILA-MONITORAMENTO-IDOSOS")
 BUCKET_NAME = "bucket-videos-monitoramento"
 TEMP_DIR = Path("./temp_processing")
+config = PipelineConfig()
+PRESIGNED_URL_EXPIRATION = 3600
 
 
-def download_video(video_filename, use_s3=False, use_localstack=False):
+@lru_cache(maxsize=1)
+def get_transfer_config():
+    """Download em partes paralelas: ranged GETs de `s3_download_chunk_mb` em `s3_download_concurrency` threads."""
+    chunk_size = config.s3_download_chunk_mb * 1024 * 1024
+    return TransferConfig(
+        multipart_threshold=chunk_size,
+        multipart_chunksize=chunk_size,
+        max_concurrency=config.s3_download_concurrency,
+        use_threads=True)
 
-    target_path = TEMP_DIR / video_filename
+
+def download_video(video_filename, use_s3=False, use_localstack=False, dest_dir=TEMP_DIR):
+
+    target_path = Path(dest_dir) / Path(video_filename).name
 
     if use_s3:
         try:
@@ -24,11 +51,11 @@ def download_video(video_filename, use_s3=False, use_localstack=False):
             
             if use_localstack:
                 print(f"📥 Using Local stack...")
-                s3 = boto3.client('s3', region_name='us-east-1', endpoint_url="http://localhost:4566")
-            else:
-                s3 = boto3.client('s3', region_name='us-east-1')
+            s3 = get_client('s3', use_localstack=use_localstack, region_name='us-east-1')
 
-            s3.download_file(BUCKET_NAME, video_filename, str(target_path))
+            with S3_DOWNLOAD_SECONDS.time():
+                s3.download_file(BUCKET_NAME, video_filename, str(target_path),
+                                 Config=get_transfer_config())
             print("✅ Download do S3 concluído com sucesso.")
             return target_path
         except Exception as e:
@@ -43,99 +70,340 @@ def download_video(video_filename, use_s3=False, use_localstack=False):
         return local_path
     elif target_path.exists():
         return target_path
+    elif (TEMP_DIR / video_filename).exists():
+        return TEMP_DIR / video_filename
 
     raise FileNotFoundError(
         f"Arquivo {video_filename} não encontrado localmente nem no S3.")
 
 
-def process_patient_video(video_key, use_s3=False, use_localstack=False, headless=True):
+def transcrever(audio_data, text_output_path):
+    """Transcrição local (Whisper + VAD) ou pela API do Google, conforme TRANSCRIPTION_ENGINE."""
+    if config.transcription_engine == "google":
+        return transcribe_audio_to_text(
+            audio_data, text_output_path, language=config.transcription_language)
+    return transcribe_speech(
+        audio_data, text_output_path, model_name=config.whisper_model,
+        language=config.transcription_language)
+
+
+def keypoint_log_path(video_key, job_id):
+    """
+    Caminho do log de keypoints de um job (None se desativado).
+
+    O id do job torna o nome único: jobs simultâneos do mesmo vídeo (ou de
+    chaves que viram o mesmo nome) não escrevem no mesmo arquivo.
+    """
+    if not config.keypoint_log_dir:
+        return None
+    nome = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(video_key)).strip("_")
+    return Path(config.keypoint_log_dir) / f"{nome}.{job_id}.kplog"
+
+
+def get_s3_etag(video_key, use_localstack=False):
+    """ETag do objeto no S3 (identifica o conteúdo sem baixá-lo), ou None."""
     try:
+        s3 = get_client('s3', use_localstack=use_localstack, region_name='us-east-1')
+        return s3.head_object(Bucket=BUCKET_NAME, Key=video_key)["ETag"].strip('"')
+    except Exception as e:
+        print(f"⚠️ [S3] ETag indisponível para {video_key}: {e}")
+        return None
 
-        TEMP_DIR.mkdir(exist_ok=True)
-        video_path = download_video(video_key, use_s3=use_s3, use_localstack=use_localstack)
-        audio_path = TEMP_DIR / "extracted_audio.wav"
 
-        print(f"⚙️ Iniciando análise multimodal para: {video_key}")
+def get_video_url(video_key, use_localstack=False, expires_in=PRESIGNED_URL_EXPIRATION):
+    """URL pré-assinada do objeto: o ffmpeg/OpenCV leem o vídeo por HTTP enquanto ele chega."""
+    s3 = get_client('s3', use_localstack=use_localstack, region_name='us-east-1')
+    return s3.generate_presigned_url(
+        'get_object', Params={'Bucket': BUCKET_NAME, 'Key': video_key}, ExpiresIn=expires_in)
 
-        fall_detected = analyze_video_file(
-            str(video_path), headless=headless)
-        print(
-            f"📹 [VIDEO] Resultado da Análise Visual: {'🚨 QUEDA DETECTADA' if fall_detected else '✅ Movimento Normal'}")
 
+@lru_cache(maxsize=1)
+def get_video_cache():
+    """Cache local de vídeos compartilhado pelo processo (None se desativado)."""
+    if not config.video_cache_dir:
+        return None
+    return VideoCache(config.video_cache_dir, max_bytes=config.video_cache_max_mb * 1024 * 1024)
+
+
+def _obter_video(video_key, etag, use_s3, use_localstack, workspace):
+    """
+    Caminho (ou URL) do vídeo a analisar.
+
+    Ordem: cache local de vídeos, URL pré-assinada (`S3_STREAMING=true`) ou
+    download paralelo para o diretório do job (também adicionado ao cache, se ativo).
+
+    Em streaming, os ramos de vídeo e de áudio abrem a URL cada um: o objeto é
+    lido duas vezes do S3. O modo compensa quando a latência importa mais que
+    o tráfego; caso contrário, prefira o download (lido uma única vez).
+    """
+    video_cache = get_video_cache() if use_s3 and etag else None
+    if video_cache:
+        cached = video_cache.get(f"s3:{etag}", Path(video_key).suffix, dest_dir=workspace)
+        VIDEO_CACHE_REQUESTS.inc(result="hit" if cached else "miss")
+        if cached:
+            print(f"⚡ [CACHE] Vídeo {video_key} reutilizado do cache local.")
+            return cached
+
+    if use_s3 and config.s3_streaming:
+        try:
+            url = get_video_url(video_key, use_localstack=use_localstack)
+            print(f"📡 [S3] Analisando {video_key} direto do S3 (streaming).")
+            return url
+        except Exception as e:
+            print(f"⚠️ [S3] URL pré-assinada indisponível: {e}")
+
+    video_path = download_video(
+        video_key, use_s3=use_s3, use_localstack=use_localstack, dest_dir=workspace)
+    if video_cache and Path(video_path).parent == workspace:
+        video_path = video_cache.put(f"s3:{etag}", video_path)
+    return video_path
 
-        extract_audio_from_video(str(video_path), str(audio_path))
+
+@lru_cache(maxsize=1)
+def get_result_cache():
+    """Cache de resultados compartilhado pelo processo (None se desativado)."""
+    if not config.result_cache_dir:
+        return None
+    return ResultCache(
+        config.result_cache_dir,
+        max_entries=config.result_cache_max_entries,
+        max_age=config.result_cache_max_age)
+
+
+def _buscar_em_cache(cache, content_id, timer):
+    with timer.stage("cache_lookup"):
+        cache_key = build_cache_key(
+            content_id, {"config": config.fingerprint(), "models": model_versions()})
+        cached = cache.get(cache_key)
+
+    if cached is not None:
+        print(f"⚡ [CACHE] Análise reutilizada ({content_id}).")
+    return cache_key, cached
+
+
+def process_patient_video(video_key, use_s3=False, use_localstack=False, headless=True,
+                          patient_id=None, location=None, send_alerts=True):
+    """
+    Analisa o vídeo de um paciente e envia o alerta correspondente.
+
+    - **patient_id** / **location**: identificam o paciente no alerta. O cooldown
+      é por (paciente, tipo de alerta); sem `patient_id`, o próprio `video_key` é a chave.
+    - **send_alerts**: com False o alerta é apenas montado e retornado (status
+      `alert_not_sent`), útil para reprocessar gravações antigas.
+    """
+    with JOBS_IN_FLIGHT.track_inprogress():
+        return _process_patient_video(
+            video_key, use_s3, use_localstack, headless, patient_id or video_key, location,
+            send_alerts)
+
+
+def _process_patient_video(video_key, use_s3, use_localstack, headless, patient_id, location,
+                           send_alerts):
+    timer = StageTimer()
+
+    TEMP_DIR.mkdir(exist_ok=True)
+    # Cada job tem seu próprio diretório de trabalho (jobs simultâneos não colidem)
+    workspace = Path(tempfile.mkdtemp(prefix="job-", dir=TEMP_DIR))
+
+    try:
+        analise, cached = _obter_analise(video_key, use_s3, use_localstack, headless, workspace, timer)
+        if analise is None:
+            return None
+
+        # A decisão de alerta (prioridade, cooldown, outbox) roda em todo job, inclusive
+        # quando a análise vem do cache: ela depende do paciente e de send_alerts
+        resultado = _decidir_alerta(
+            analise, timer, use_localstack, patient_id, location, send_alerts)
+        if cached:
+            resultado["cached"] = True
+        return resultado
+
+    except Exception as e:
+        print(f"❌ Erro no processamento: {e}")
+        raise e
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
 
 
-        text_content = transcribe_audio_to_text(
-            str(audio_path), str(TEMP_DIR / "transcription.txt"))
+def _obter_analise(video_key, use_s3, use_localstack, headless, workspace, timer):
+    """
+    Resultado da análise do vídeo, do cache quando possível.
+
+    Retorna `(analise, cached)`. Apenas a análise (queda visual e análise de
+    áudio) é armazenada; nada ligado ao paciente ou ao envio do alerta.
+    """
+    cache = get_result_cache()
+    cache_key = None
+    etag = None
+    if use_s3 and (cache or get_video_cache()):
+        etag = get_s3_etag(video_key, use_localstack=use_localstack)
+    if cache and etag:
+        cache_key, cached = _buscar_em_cache(cache, f"s3:{etag}", timer)
+        if cached is not None:
+            return cached, True
+
+    with timer.stage("download"):
+        video_path = _obter_video(video_key, etag, use_s3, use_localstack, workspace)
+
+    # Em streaming não há arquivo local para calcular o hash
+    if cache and cache_key is None and isinstance(video_path, Path):
+        with timer.stage("content_hash"):
+            content_id = f"sha256:{file_sha256(video_path)}"
+        cache_key, cached = _buscar_em_cache(cache, content_id, timer)
+        if cached is not None:
+            return cached, True
+
+    analise = _analisar_video(video_key, video_path, workspace, headless, timer)
+    if cache and cache_key and analise:
+        cache.put(cache_key, analise)
+    return analise, False
+
+
+def _analisar_video(video_key, video_path, workspace, headless, timer):
+    print(f"⚙️ Iniciando análise multimodal para: {video_key}")
+
+    def ramo_visual():
+        with timer.stage("video_analysis"):
+            return analyze_video(
+                str(video_path), headless=headless,
+                stride=config.inference_stride,
+                batch_size=config.inference_batch_size,
+                model_name=config.pose_model,
+                motion_threshold=config.motion_threshold,
+                motion_max_skip=config.motion_max_skip,
+                keypoint_log_path=keypoint_log_path(video_key, workspace.name))
+
+    def ramo_audio():
+        # O ramo de áudio não depende do resultado visual
+        # Decodificação única: o mesmo buffer 16 kHz alimenta todos os consumidores
+        with timer.stage("audio_extraction"):
+            audio_data = decode_audio(video_path)
+
+        with timer.stage("transcription"):
+            text_content = transcrever(audio_data, str(workspace / "transcription.txt"))
 
         # 4. Análise de Áudio e Emoção
-        ai_analysis = analyze_multimodal_ai(text_content, audio_path)
-
-        if not ai_analysis:
-            print("❌ Falha na análise de áudio.")
-            return
-
-
-        alert_payload = {}
-        priority = "low"
-
-        if fall_detected or ai_analysis['is_impact'] or ai_analysis['is_sustained_emergency']:
-            priority = "critical"
-            reason = []
-            if fall_detected:
-                reason.append("QUEDA VISUAL (YOLO)")
-            if ai_analysis['is_impact']:
-                reason.append("IMPACTO SONORO")
-            if ai_analysis['is_sustained_emergency']:
-                reason.append("GRITO/SOCORRO")
-
-            alert_payload = {
-                "alert_type": "EMERGENCY_FALL",
-                "message": f"🚨 SOCORRO: Evento crítico detectado! Motivos: {', '.join(reason)}",
-                "metadata": {
-                    "patient_id": "12345",
-                    "location": "Quarto 101",
-                    "evidence": ai_analysis
-                }
+        with timer.stage("multimodal_analysis"):
+            return analyze_multimodal_ai(text_content, audio_data)
+
+    with timer.stage("parallel_branches"):
+        resultados = run_branches({"video": ramo_visual, "audio": ramo_audio})
+
+    fall_detected = resultados["video"]["fall_detected"]
+    if resultados["video"]["keypoint_log"]:
+        print(f"🦴 [VIDEO] Keypoints salvos em {resultados['video']['keypoint_log']}")
+        prune_logs(config.keypoint_log_dir, config.keypoint_log_max_mb * 1024 * 1024,
+                   manter=Path(resultados["video"]["keypoint_log"]))
+    ai_analysis = resultados["audio"]
+    print(
+        f"📹 [VIDEO] Resultado da Análise Visual: {'🚨 QUEDA DETECTADA' if fall_detected else '✅ Movimento Normal'}")
+
+    if not ai_analysis:
+        print("❌ Falha na análise de áudio.")
+        return None
+    return {"fall_detected": fall_detected, "ai_analysis": ai_analysis}
+
+
+def _evidencia(ai_analysis):
+    """
+    Evidência do alerta com tamanho limitado (mensagem do SQS: 256 KB): sem a
+    linha do tempo de emoção e com os eventos acústicos resumidos. As listas
+    completas ficam apenas no resultado do job.
+    """
+    evidencia = {k: v for k, v in ai_analysis.items() if k not in ("audio_emotion_timeline", "acoustic_events")}
+    evidencia["acoustic_events"] = summarize_events(ai_analysis.get("acoustic_events", []))
+    return evidencia
+
+
+def _decidir_alerta(analise, timer, use_localstack, patient_id, location, send_alerts):
+    """Prioridade, cooldown e envio do alerta de um job (nunca armazenado no cache)."""
+    fall_detected = analise["fall_detected"]
+    ai_analysis = analise["ai_analysis"]
+
+    alert_payload = {}
+    priority = "low"
+
+    if fall_detected or ai_analysis['is_impact'] or ai_analysis['is_sustained_emergency']:
+        priority = "critical"
+        reason = []
+        if fall_detected:
+            reason.append("QUEDA VISUAL (YOLO)")
+        if ai_analysis['is_impact']:
+            reason.append("IMPACTO SONORO")
+        if ai_analysis['is_sustained_emergency']:
+            reason.append("GRITO/SOCORRO")
+
+        alert_payload = {
+            "alert_type": "EMERGENCY_FALL",
+            "message": f"🚨 SOCORRO: Evento crítico detectado! Motivos: {', '.join(reason)}",
+            "metadata": {
+                "patient_id": patient_id,
+                "location": location,
+                "evidence": _evidencia(ai_analysis)
             }
+        }
 
 
-        elif ai_analysis['has_emotional_risk']:
-            priority = "medium"
-            alert_payload = {
-                "alert_type": "EMOTIONAL_DISTRESS",
-                "message": f"⚠️ ATENÇÃO: Paciente demonstra {ai_analysis['text_emotion']} / {ai_analysis['audio_emotion']}",
-                "metadata": {
-                    "patient_id": "12345",
-                    "transcription": ai_analysis['transcription']
-                }
+    elif ai_analysis['has_emotional_risk']:
+        priority = "medium"
+        alert_payload = {
+            "alert_type": "EMOTIONAL_DISTRESS",
+            "message": f"⚠️ ATENÇÃO: Paciente demonstra {ai_analysis['text_emotion']} / {ai_analysis['audio_emotion']}",
+            "metadata": {
+                "patient_id": patient_id,
+                "location": location,
+                "transcription": ai_analysis['transcription']
             }
+        }
 
 
-        if alert_payload:
-            print(
-                f"📤 Enviando alerta [{priority.upper()}]: {alert_payload['message']}")
+    if alert_payload and not send_alerts:
+        print(f"📝 Alerta [{priority.upper()}] detectado (envio desativado): {alert_payload['message']}")
+        return {
+            "status": "alert_not_sent",
+            "priority": priority,
+            "data": alert_payload,
+            "timings": timer.timings
+        }
 
-            sqs = SQSClient(QUEUE_URL, useLocalStack=use_localstack)
-            sqs.send_alert(
-                alert_payload['alert_type'], 
-                alert_payload['message'], 
-                alert_payload['metadata']
-            )
-            
+    if alert_payload:
+        # Um mesmo evento reprocessado (retry, vários workers) não gera alertas repetidos
+        cooldown = get_alert_cooldown(use_localstack=use_localstack)
+        permitido, restante = cooldown.try_acquire(patient_id, alert_payload['alert_type'])
+        if not permitido:
+            ALERTS_SUPPRESSED.inc(reason="cooldown")
+            print(f"🔕 Alerta {alert_payload['alert_type']} suprimido para o paciente {patient_id} "
+                  f"({int(restante)}s de cooldown restantes)")
             return {
-                "status": "alert_sent",
+                "status": "alert_suppressed",
                 "priority": priority,
-                "data": alert_payload
-            }
-        else:
-            print("✅ Situação Normal. Nenhum alerta enviado.")
-            return {
-                "status": "normal",
-                "message": "Nenhum risco detectado."
+                "data": alert_payload,
+                "timings": timer.timings
             }
 
-    except Exception as e:
-        print(f"❌ Erro no processamento: {e}")
-        raise e
+        print(
+            f"📤 Enviando alerta [{priority.upper()}]: {alert_payload['message']}")
+
+        # O alerta entra no outbox (entrega assíncrona com retry); o job não espera o SQS
+        with timer.stage("alert"):
+            outbox = get_alert_outbox(QUEUE_URL, use_localstack=use_localstack)
+            alert_id = outbox.enqueue(
+                alert_payload['alert_type'],
+                alert_payload['message'],
+                alert_payload['metadata']
+            )
+
+        return {
+            "status": "alert_sent",
+            "priority": priority,
+            "alert_id": alert_id,
+            "data": alert_payload,
+            "timings": timer.timings
+        }
+    else:
+        print("✅ Situação Normal. Nenhum alerta enviado.")
+        return {
+            "status": "normal",
+            "message": "Nenhum risco detectado.",
+            "timings": timer.timings
+        }
@@ -0,0 +1,100 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Levantada quando o pool de análise está saturado."""
+
+
+class JobManager:
+    """
+    Executa análises em um pool de workers limitado.
+
+    - **max_workers**: quantidade de análises executadas ao mesmo tempo.
+    - **max_queue**: quantidade de jobs aguardando na fila além dos que estão rodando.
+    - **result_ttl**: tempo (segundos) que jobs finalizados ficam disponíveis para consulta.
+    """
+
+    def __init__(self, max_workers=2, max_queue=8, result_ttl=3600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._jobs = {}
+        self._ativos = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, owner=None, **kwargs):
+        """Agenda `fn(*args, **kwargs)` e retorna o id do job."""
+        with self._lock:
+            self._remover_expirados()
+            if self._ativos >= self.max_workers + self.max_queue:
+                raise QueueFullError(
+                    f"Fila de análise cheia ({self._ativos} jobs em andamento).")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": JOB_QUEUED,
+                "owner": owner,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._ativos += 1
+
+        self._executor.submit(self._executar, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """Retorna uma cópia do estado do job, ou None se não existir."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "active": self._ativos,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _executar(self, job_id, fn, args, kwargs):
+        self._atualizar(job_id, status=JOB_RUNNING, started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._atualizar(job_id, status=JOB_DONE, result=result)
+        except Exception as e:
+            print(f"❌ Job {job_id} falhou: {e}")
+            self._atualizar(job_id, status=JOB_FAILED, error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._jobs[job_id]["finished_at"] = time.time()
+                self._ativos -= 1
+
+    def _atualizar(self, job_id, **campos):
+        with self._lock:
+            self._jobs[job_id].update(campos)
+
+    def _remover_expirados(self):
+        limite = time.time() - self.result_ttl
+        expirados = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < limite
+        ]
+        for job_id in expirados:
+            del self._jobs[job_id]
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# Incrementar quando a lógica do pipeline mudar de forma a invalidar resultados antigos
+CACHE_VERSION = 2
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash do conteúdo de um arquivo local, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(chunk_size), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def build_cache_key(content_id, fingerprint):
+    """
+    Chave endereçada por conteúdo.
+
+    - **content_id**: ETag do objeto no S3 ou hash do arquivo local.
+    - **fingerprint**: configuração do pipeline e versões dos modelos.
+    """
+    material = json.dumps(
+        {"version": CACHE_VERSION, "content": content_id, "fingerprint": fingerprint},
+        sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache de resultados de análise em disco (um JSON por chave).
+
+    Sobrevive a reinícios do processo. A expiração é por idade (`max_age`, em
+    segundos) e o tamanho é limitado a `max_entries`, removendo as entradas
+    acessadas há mais tempo.
+    """
+
+    def __init__(self, cache_dir, max_entries=1000, max_age=7 * 24 * 3600):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+
+        # mtime marca o último acesso, usado na remoção por tamanho
+        os.utime(path, (stat.st_atime, time.time()))
+        return entry["result"]
+
+    def put(self, key, result):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "result": result}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entradas = list(self.cache_dir.glob("*.json"))
+            excesso = len(entradas) - self.max_entries
+            if excesso <= 0:
+                return
+
+            entradas.sort(key=lambda p: p.stat().st_mtime if p.exists() else 0)
+            for path in entradas[:excesso]:
+                path.unlink(missing_ok=True)
@@ -0,0 +1,43 @@
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StageTimer:
+    """Registra a duração (em segundos) de cada etapa do pipeline."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - inicio, 3)
+
+
+def run_branches(branches):
+    """
+    Executa ramos independentes do pipeline em paralelo.
+
+    - **branches**: dicionário {nome: callable sem argumentos}.
+
+    O primeiro ramo roda na thread chamadora (mantém o OpenCV/imshow fora de
+    threads auxiliares) e os demais em um pool de threads. Retorna
+    {nome: resultado}; a primeira exceção de qualquer ramo é propagada.
+    """
+    nomes = list(branches)
+    if not nomes:
+        return {}
+
+    principal, *paralelos = nomes
+    with ThreadPoolExecutor(max_workers=max(1, len(paralelos)),
+                            thread_name_prefix="pipeline-stage") as pool:
+        futures = {nome: pool.submit(branches[nome]) for nome in paralelos}
+        resultados = {principal: branches[principal]()}
+        for nome, future in futures.items():
+            resultados[nome] = future.result()
+
+    return resultados
@@ -0,0 +1,101 @@
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+
+class VideoCache:
+    """
+    Cache local de vídeos baixados do S3, endereçado pelo ETag do objeto.
+
+    O tamanho total é limitado a `max_bytes`, removendo os vídeos acessados há
+    mais tempo; vídeos maiores que o próprio limite não são armazenados. Cada
+    job recebe um hardlink (ou cópia, entre sistemas de arquivos) no seu
+    diretório de trabalho: uma remoção do cache nunca apaga o arquivo de um
+    job que ainda vai abri-lo.
+    """
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, content_id, suffix=""):
+        nome = hashlib.sha256(content_id.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{nome}{suffix}"
+
+    @staticmethod
+    def _vincular(origem, destino):
+        """Hardlink de `origem` em `destino`; cópia se estiverem em sistemas de arquivos diferentes."""
+        try:
+            os.link(origem, destino)
+        except FileNotFoundError:
+            raise  # origem removida: não é caso de cópia
+        except OSError:
+            shutil.copy2(origem, destino)
+
+    def get(self, content_id, suffix="", dest_dir=None):
+        """
+        Retorna o vídeo em cache, ou None.
+
+        Com `dest_dir`, o vídeo é vinculado nesse diretório e o caminho
+        retornado é o do job (não o do cache).
+        """
+        entrada = self._path(content_id, suffix)
+        path = entrada
+        try:
+            stat = entrada.stat()
+            if dest_dir is not None:
+                path = Path(dest_dir) / entrada.name
+                self._vincular(entrada, path)
+        except FileNotFoundError:
+            # Removido por outro job entre a consulta e o vínculo
+            return None
+        try:
+            # mtime marca o último acesso, usado na remoção por tamanho
+            os.utime(entrada, (stat.st_atime, time.time()))
+        except FileNotFoundError:
+            # Removido depois do vínculo: o arquivo do job continua válido
+            if dest_dir is None:
+                return None
+        return path
+
+    def put(self, content_id, src_path):
+        """
+        Adiciona o arquivo baixado ao cache e retorna `src_path`.
+
+        O arquivo do job continua onde está (o cache recebe um hardlink).
+        """
+        src_path = Path(src_path)
+        if src_path.stat().st_size > self.max_bytes:
+            return src_path
+        path = self._path(content_id, src_path.suffix)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._vincular(src_path, tmp_path)
+        os.replace(tmp_path, path)
+        self._evict(manter=path)
+        return src_path
+
+    def _evict(self, manter=None):
+        with self._lock:
+            entradas = []
+            for path in self.cache_dir.iterdir():
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entradas.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(tamanho for _, tamanho, _ in entradas)
+            for _, tamanho, path in sorted(entradas, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                if path == manter:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= tamanho
@@ -0,0 +1,72 @@
+import threading
+import time
+from monitoring.metrics import STARTUP_SECONDS
+
+WARMUP_PENDING = "pending"
+WARMUP_RUNNING = "warming_up"
+WARMUP_READY = "ready"
+WARMUP_FAILED = "failed"
+WARMUP_DISABLED = "disabled"
+
+
+class ModelWarmup:
+    """
+    Pré-carrega em background os módulos pesados do pipeline e os modelos.
+
+    `started_at` marca o início do processo (import da API); `time_to_ready`
+    mede o cold start completo até os modelos estarem prontos.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at or time.time()
+        self.status = WARMUP_PENDING
+        self.durations = {}
+        self.error = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        """Warm-up desativado: modelos carregam sob demanda e a API é considerada pronta."""
+        self.status = WARMUP_DISABLED
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Bloqueia até o warm-up terminar (com sucesso ou falha)."""
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self):
+        return self.status in (WARMUP_READY, WARMUP_DISABLED)
+
+    def snapshot(self):
+        return {"status": self.status, "durations": dict(self.durations), "error": self.error}
+
+    def _run(self):
+        self.status = WARMUP_RUNNING
+        try:
+            inicio = time.perf_counter()
+            # Importa ultralytics, cv2, librosa, transformers... fora do caminho das rotas
+            from orchestrator.cloud_orchestrator import config
+            from singletons.singletons import warmup_models
+            self._registrar("imports", time.perf_counter() - inicio)
+
+            for modelo, duracao in warmup_models(config.pose_model).items():
+                self._registrar(f"model_{modelo}", duracao)
+
+            self._registrar("time_to_ready", time.time() - self.started_at)
+            self.status = WARMUP_READY
+            print(f"🔥 Modelos prontos em {self.durations['time_to_ready']:.1f}s: {self.durations}")
+        except Exception as e:
+            self.status = WARMUP_FAILED
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"❌ Falha no warm-up dos modelos: {e}")
+        finally:
+            self._done.set()
+
+    def _registrar(self, fase, duracao):
+        self.durations[fase] = round(duracao, 3)
+        STARTUP_SECONDS.set(round(duracao, 3), phase=fase)
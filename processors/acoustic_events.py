@@ -0,0 +1,182 @@
+"""
+Detecção de eventos acústicos (impacto / grito sustentado) por blocos.
+
+O áudio é processado bloco a bloco com memória limitada: apenas o final do
+bloco anterior (para completar a janela) e os valores de RMS do evento em
+andamento ficam guardados. O RMS de cada janela é calculado de forma
+vetorizada por soma acumulada dos quadrados, com o mesmo enquadramento do
+`librosa.feature.rms` (janelas centradas, padding com zeros).
+"""
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+LIMIAR_RMS = 0.05
+DURACAO_MAX_IMPACTO = 0.3  # segundos
+DURACAO_MIN_EMERGENCIA = 0.5  # segundos
+INTERVALO_MAX_SILENCIO = 0.15  # pausas menores não encerram o evento
+
+EVENTO_IMPACTO = "impact"
+EVENTO_EMERGENCIA = "sustained_emergency"
+
+MAX_EVENTOS_RESUMO = 10  # eventos de maior pico mantidos no resumo do alerta
+
+
+class AcousticEventDetector:
+    """
+    Detector incremental: chame `feed(bloco)` para cada bloco de amostras e
+    `finish()` ao final para obter a lista de eventos com timestamps.
+
+    Um evento é uma sequência de janelas com RMS acima de `rms_threshold`
+    (pausas de até `max_gap` segundos são toleradas). Assim como na análise
+    original, a duração do pico é o tempo com RMS acima de 50% do pico do
+    próprio evento: < 0.3 s é impacto, >= 0.5 s é emergência sustentada.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH,
+                 rms_threshold=LIMIAR_RMS, max_gap=INTERVALO_MAX_SILENCIO):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.rms_threshold = rms_threshold
+        self.max_gap_frames = int(round(max_gap * sample_rate / hop_length))
+
+        # Padding inicial equivalente ao center=True do librosa
+        self._tail = np.zeros(frame_length // 2, dtype=np.float32)
+        self._proximo_frame = 0
+        self._evento = None  # [primeiro_frame, ultimo_frame_ativo, [rms...]]
+        self._pausa = []  # RMS após a última janela ativa do evento em aberto
+        self.max_rms = 0.0
+        self.events = []
+
+    def feed(self, bloco):
+        bloco = np.asarray(bloco, dtype=np.float32)
+        buf = np.concatenate((self._tail, bloco)) if len(self._tail) else bloco
+        if len(buf) < self.frame_length:
+            self._tail = buf
+            return
+
+        n_frames = 1 + (len(buf) - self.frame_length) // self.hop_length
+        self._processar_rms(self._rms(buf, n_frames))
+        self._tail = buf[n_frames * self.hop_length:]
+
+    def finish(self):
+        """Processa as últimas janelas (padding final) e fecha o evento em aberto."""
+        pad = np.zeros(self.frame_length // 2, dtype=np.float32)
+        buf = np.concatenate((self._tail, pad))
+        if len(buf) >= self.frame_length:
+            n_frames = 1 + (len(buf) - self.frame_length) // self.hop_length
+            self._processar_rms(self._rms(buf, n_frames))
+        self._tail = np.zeros(0, dtype=np.float32)
+
+        if self._evento is not None:
+            self._fechar_evento()
+        return self.events
+
+    def _rms(self, buf, n_frames):
+        quadrados = np.concatenate(([0.0], np.cumsum(np.square(buf, dtype=np.float64))))
+        inicios = np.arange(n_frames) * self.hop_length
+        somas = quadrados[inicios + self.frame_length] - quadrados[inicios]
+        return np.sqrt(np.maximum(somas, 0.0) / self.frame_length)
+
+    def _processar_rms(self, rms):
+        base = self._proximo_frame
+        self._proximo_frame += len(rms)
+        if len(rms):
+            self.max_rms = max(self.max_rms, float(rms.max()))
+
+        ativos = np.flatnonzero(rms > self.rms_threshold)
+        if len(ativos) == 0:
+            if self._evento is not None:
+                self._pausa.append(rms)
+                if self._proximo_frame - 1 - self._evento[1] > self.max_gap_frames:
+                    self._fechar_evento()
+            return
+
+        # Quebra as janelas ativas em sequências separadas por pausas maiores que max_gap
+        quebras = np.flatnonzero(np.diff(ativos) > self.max_gap_frames + 1)
+        inicios = np.concatenate(([0], quebras + 1))
+        fins = np.concatenate((quebras, [len(ativos) - 1]))
+
+        for i, j in zip(inicios, fins):
+            primeiro, ultimo = base + ativos[i], base + ativos[j]
+            if self._evento is not None and primeiro - self._evento[1] > self.max_gap_frames + 1:
+                self._fechar_evento()
+
+            if self._evento is None:
+                self._evento = [primeiro, ultimo, [rms[ativos[i]:ativos[j] + 1]]]
+            else:
+                # Continua o evento em aberto, incluindo as janelas da pausa
+                desde = max(0, self._evento[1] + 1 - base)
+                self._evento[2].extend(self._pausa)
+                self._evento[2].append(rms[desde:ativos[j] + 1])
+                self._evento[1] = ultimo
+            self._pausa = []
+
+        if self._evento is not None:
+            if self._proximo_frame - 1 - self._evento[1] > self.max_gap_frames:
+                self._fechar_evento()
+            else:
+                self._pausa = [rms[self._evento[1] + 1 - base:]]
+
+    def _fechar_evento(self):
+        primeiro, ultimo, partes = self._evento
+        self._evento = None
+        self._pausa = []
+        rms = np.concatenate(partes)
+        pico = float(rms.max())
+        duracao_pico = float(np.sum(rms > pico * 0.5)) * self.hop_length / self.sample_rate
+
+        if duracao_pico < DURACAO_MAX_IMPACTO:
+            tipo = EVENTO_IMPACTO
+        elif duracao_pico >= DURACAO_MIN_EMERGENCIA:
+            tipo = EVENTO_EMERGENCIA
+        else:
+            return
+
+        segundos_por_frame = self.hop_length / self.sample_rate
+        self.events.append({
+            "type": tipo,
+            "start": round(float(primeiro) * segundos_por_frame, 3),
+            "end": round(float(ultimo + 1) * segundos_por_frame, 3),
+            "peak_rms": round(pico, 4),
+            "peak_duration": round(duracao_pico, 3),
+        })
+
+
+def detect_acoustic_events(audio, block_seconds=10.0, sample_rate=SAMPLE_RATE, **kwargs):
+    """
+    Detecta eventos em um buffer (processado em fatias, sem cópias) ou em um
+    iterável de blocos (ex.: `processors.audio_decode.iter_audio_chunks`).
+    """
+    detector = AcousticEventDetector(sample_rate=sample_rate, **kwargs)
+    if isinstance(audio, np.ndarray):
+        passo = max(1, int(block_seconds * sample_rate))
+        blocos = (audio[i:i + passo] for i in range(0, len(audio), passo))
+    else:
+        blocos = audio
+
+    for bloco in blocos:
+        detector.feed(bloco)
+    return detector.finish()
+
+
+def summarize_events(events, top_n=MAX_EVENTOS_RESUMO):
+    """
+    Resumo de tamanho limitado da lista de eventos, para payloads como o alerta
+    no SQS (256 KB): contagem por tipo, primeiro/último instante e os `top_n`
+    eventos de maior `peak_rms`, em ordem cronológica.
+    """
+    por_tipo = {}
+    for evento in events:
+        por_tipo[evento["type"]] = por_tipo.get(evento["type"], 0) + 1
+    maiores = sorted(events, key=lambda e: e["peak_rms"], reverse=True)[:top_n]
+    return {
+        "count": len(events),
+        "count_by_type": por_tipo,
+        "first_start": events[0]["start"] if events else None,
+        "last_end": events[-1]["end"] if events else None,
+        "top_events": sorted(maiores, key=lambda e: e["start"]),
+    }
@@ -1,24 +1,34 @@
 import numpy as np
 import librosa
 from pathlib import Path
-from singletons.singletons import get_text_analysis_model, get_audio_analysis_model
+from typing import Union
+from monitoring.metrics import EMOTION_INFERENCE_SECONDS
+from processors.acoustic_events import detect_acoustic_events, EVENTO_IMPACTO, EVENTO_EMERGENCIA
+from processors.audio_emotion import classify_audio_emotion
+from singletons.singletons import get_text_analysis_batcher
 
 
-def analyze_multimodal_ai(text: str, audio_path: Path):
+def analyze_multimodal_ai(text: str, audio: Union[Path, np.ndarray]):
+    """
+    - **audio**: caminho do arquivo ou buffer float32 mono em 16 kHz já decodificado.
+    """
     print("🧠 Iniciando Processamento de Sinais e Fusão de Dados...")
-    audio_data, _ = librosa.load(str(audio_path), sr=16000)
+    if isinstance(audio, np.ndarray):
+        audio_data = audio
+    else:
+        audio_data, _ = librosa.load(str(audio), sr=16000)
     if audio_data.size == 0:
         return None
-    frame_length = 2048
-    hop_length = 512
-    rmse = librosa.feature.rms(
-        y=audio_data, frame_length=frame_length, hop_length=hop_length)[0]
-    peak_duration = np.sum(rmse > (np.max(rmse) * 0.5)) * (hop_length / 16000)
-    is_impact = (np.max(rmse) > 0.05) and (peak_duration < 0.3)
-    is_sustained_emergency = (np.max(rmse) > 0.05) and (peak_duration >= 0.5)
+    # Eventos com timestamp, processados em blocos (memória limitada)
+    acoustic_events = detect_acoustic_events(audio_data)
+    is_impact = any(e["type"] == EVENTO_IMPACTO for e in acoustic_events)
+    is_sustained_emergency = any(e["type"] == EVENTO_EMERGENCIA for e in acoustic_events)
     t_input = text if text.strip() else "Neutral silence"
-    t_pred = get_text_analysis_model()(t_input)[0]
-    a_pred = get_audio_analysis_model()(audio_data)[0]
+    with EMOTION_INFERENCE_SECONDS.time(modality="text"):
+        t_pred = get_text_analysis_batcher()(t_input)[0]
+    with EMOTION_INFERENCE_SECONDS.time(modality="audio"):
+        # Janelas com sobreposição: memória constante independente da duração
+        a_pred = classify_audio_emotion(audio_data)
     risk_emotions = ["fear", "sadness", "sad", "anger", "disgust"]
     has_emotional_risk = t_pred['label'] in risk_emotions or a_pred['label'] in risk_emotions
     result = {
@@ -27,6 +37,8 @@ def analyze_multimodal_ai(text: str, audio_path: Path):
         "has_emotional_risk": bool(has_emotional_risk),
         "text_emotion": t_pred['label'],
         "audio_emotion": a_pred['label'],
+        "acoustic_events": acoustic_events,
+        "audio_emotion_timeline": a_pred['timeline'],
         "transcription": text
     }
     print(f"\n📊 LAUDO TÉCNICO MULTIMODAL")
@@ -0,0 +1,72 @@
+import subprocess
+import numpy as np
+from monitoring.metrics import AUDIO_EXTRACTION_SECONDS
+
+SAMPLE_RATE = 16000
+
+
+def get_ffmpeg_exe():
+    """Binário do ffmpeg distribuído com o moviepy (imageio-ffmpeg) ou o do PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def decode_audio(source, sample_rate=SAMPLE_RATE):
+    """
+    Decodifica a trilha de áudio de um vídeo (ou arquivo de áudio) direto para memória.
+
+    O ffmpeg faz o demux, o downmix para mono e o resample em um único passo e
+    escreve PCM float32 em um pipe; nenhum arquivo temporário é criado.
+    Retorna um `np.ndarray` float32 mono (somente leitura, sem cópia do buffer do pipe)
+    compartilhado por todos os consumidores de áudio do pipeline.
+    """
+    cmd = [
+        get_ffmpeg_exe(), "-nostdin", "-v", "error",
+        "-i", str(source),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "pipe:1",
+    ]
+    with AUDIO_EXTRACTION_SECONDS.time():
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"Falha ao decodificar o áudio de '{source}': {proc.stderr.decode(errors='ignore').strip()}")
+
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def to_pcm16(audio):
+    """Converte o buffer float32 para PCM 16 bits (formato exigido pelo SpeechRecognition)."""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def iter_audio_chunks(source, chunk_seconds=10.0, sample_rate=SAMPLE_RATE):
+    """
+    Versão em streaming de `decode_audio`: produz blocos float32 de
+    `chunk_seconds` lidos do pipe do ffmpeg, com memória constante
+    independente da duração da gravação.
+    """
+    cmd = [
+        get_ffmpeg_exe(), "-nostdin", "-v", "error",
+        "-i", str(source),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "pipe:1",
+    ]
+    bytes_por_bloco = int(chunk_seconds * sample_rate) * 4
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            dados = proc.stdout.read(bytes_por_bloco)
+            if not dados:
+                break
+            # Leituras do pipe podem terminar no meio de uma amostra
+            sobra = len(dados) % 4
+            if sobra:
+                dados += proc.stdout.read(4 - sobra)
+            yield np.frombuffer(dados, dtype=np.float32)
+    finally:
+        proc.stdout.close()
+        proc.wait()
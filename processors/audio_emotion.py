@@ -0,0 +1,82 @@
+"""
+Emoção acústica (Wav2Vec2) por janelas com memória limitada.
+
+Em vez de uma única passada sobre o clipe inteiro (custo de atenção e
+ativações crescendo com a duração), o áudio é dividido em janelas fixas com
+sobreposição. Opcionalmente só as janelas com voz são classificadas. As
+janelas são enviadas em grupos de `batch_size` ao micro-batcher e os scores
+são agregados em um rótulo do clipe e em uma linha do tempo por janela.
+"""
+from config.pipeline_config import PipelineConfig
+from processors.vad import detect_voiced_regions
+from singletons.singletons import get_audio_analysis_batcher
+
+SAMPLE_RATE = 16000
+# Janela, passo e VAD vêm da PipelineConfig: fazem parte da chave do cache de resultados
+config = PipelineConfig()
+
+
+def _janelas(n_amostras, janela, passo):
+    if n_amostras <= janela:
+        return [(0, n_amostras)]
+    inicios = list(range(0, n_amostras - janela + 1, passo))
+    # Garante que o final do áudio seja coberto
+    if inicios[-1] + janela < n_amostras:
+        inicios.append(n_amostras - janela)
+    return [(i, i + janela) for i in inicios]
+
+
+def _sobreposicao_com_voz(inicio, fim, regioes):
+    return sum(max(0.0, min(fim, r_fim) - max(inicio, r_inicio)) for r_inicio, r_fim in regioes)
+
+
+def classify_audio_emotion(audio, sample_rate=SAMPLE_RATE,
+                           window_seconds=config.audio_emotion_window_seconds,
+                           hop_seconds=config.audio_emotion_hop_seconds,
+                           batch_size=config.audio_emotion_batch_size,
+                           voiced_only=config.audio_emotion_voiced_only):
+    """
+    Classifica a emoção do áudio por janelas.
+
+    Retorna {"label", "score", "scores", "timeline"}: `label`/`score` são o
+    rótulo agregado do clipe (mesmo papel de `pipeline(audio)[0]`), `scores`
+    a média ponderada por rótulo e `timeline` o resultado de cada janela.
+    """
+    janela = max(1, int(window_seconds * sample_rate))
+    passo = max(1, int(hop_seconds * sample_rate))
+    janelas = _janelas(len(audio), janela, passo)
+    pesos = [1.0] * len(janelas)
+
+    if voiced_only:
+        regioes = detect_voiced_regions(audio, sample_rate)
+        com_voz = [
+            (j, _sobreposicao_com_voz(j[0] / sample_rate, j[1] / sample_rate, regioes))
+            for j in janelas
+        ]
+        com_voz = [(j, peso) for j, peso in com_voz if peso > 0]
+        # Sem voz detectada: classifica todas as janelas, como antes
+        if com_voz:
+            janelas, pesos = [j for j, _ in com_voz], [peso for _, peso in com_voz]
+
+    batcher = get_audio_analysis_batcher()
+    timeline = []
+    somas = {}
+    for i in range(0, len(janelas), max(1, batch_size)):
+        grupo = janelas[i:i + batch_size]
+        # Fatias são views do buffer original; no máximo `batch_size` janelas em voo
+        futures = [batcher.submit(audio[inicio:fim]) for inicio, fim in grupo]
+        for (inicio, fim), peso, future in zip(grupo, pesos[i:i + batch_size], futures):
+            predicoes = future.result()
+            for pred in predicoes:
+                somas[pred["label"]] = somas.get(pred["label"], 0.0) + pred["score"] * peso
+            timeline.append({
+                "start": round(inicio / sample_rate, 3),
+                "end": round(fim / sample_rate, 3),
+                "label": predicoes[0]["label"],
+                "score": round(float(predicoes[0]["score"]), 4),
+            })
+
+    peso_total = sum(pesos)
+    scores = {label: round(soma / peso_total, 4) for label, soma in somas.items()}
+    label = max(scores, key=scores.get)
+    return {"label": label, "score": scores[label], "scores": scores, "timeline": timeline}
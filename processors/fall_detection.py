@@ -1,201 +1,421 @@
-from ultralytics import YOLO
 import cv2
+import math
+import numpy as np
+import threading
 from collections import deque
 import time
-from aws_client.aws_integration import SQSClient
+from aws_client.alert_cooldown import get_alert_cooldown
+from monitoring.metrics import YOLO_INFERENCE_SECONDS, FRAMES_PROCESSED, FRAMES_SKIPPED, ALERTS_SUPPRESSED
+from processors.keypoint_log import KeypointLogWriter, build_records
+from singletons.singletons import get_pose_model
 
 QUEUE_URL = "FILA-TEST"
 
 
-model = None
-cap = None
 client = None
 
+# O predictor do ultralytics não é thread-safe: o modelo é compartilhado
+# pelo processo, mas cada forward pass é serializado.
+pose_lock = threading.Lock()
+
 
 ESTADO_NORMAL = "NORMAL"
 ESTADO_SUSPEITA = "SUSPEITA"
 ESTADO_CAIU = "CAIU"
 
-COOLDOWN_SECONDS = 60  
-last_alert_time = 0
-estado_atual = ESTADO_NORMAL
-
 HISTORICO_TAMANHO = 10
-historico_nariz_y = deque(maxlen=HISTORICO_TAMANHO)
-
-frames_suspeita = 0
 FRAMES_PARA_CONFIRMAR = 5
-
-frames_recuperacao = 0
 FRAMES_PARA_RECUPERAR = 60
 
-# Variáveis auxiliares
-prev_y_nariz = 0
-frame_height = None
-
-
-def alert_with_cooldown(client, message="Queda detectada"):
-    global last_alert_time
-    now = time.time()
-    if now - last_alert_time >= COOLDOWN_SECONDS:
-        try:
-            client.send_alert(
-                alert_type="FALL_DETECTION",
-                message=message,
-                metadata={"priority": "high", "patient_id": "12345"}
-            )
-            last_alert_time = now
-        except Exception as e:
-            print(f"Falha ao enviar alerta: {e}")
-    else:
-        remaining = int(COOLDOWN_SECONDS - (now - last_alert_time))
-        print(f"Alerta suprimido por cooldown ({remaining}s restantes)")
+LIMIAR_VELOCIDADE = 25  # px/frame
+RAZAO_POSICAO_BAIXA = 0.6  # nariz abaixo de 60% da altura do frame
+RAZAO_CORPO_HORIZONTAL = 0.08  # ombros e quadril quase na mesma altura
+CONFIANCA_MINIMA = 0.6
+
+# Motion gate: resolução da comparação entre frames e intervalo máximo sem inferência
+MOTION_GATE_SIZE = (64, 48)
+MOTION_GATE_MAX_SKIP = 30
+
+# Índices dos keypoints no formato COCO (YOLOv8-Pose)
+KP_NARIZ = 0
+KP_OMBRO_ESQ, KP_OMBRO_DIR = 5, 6
+KP_QUADRIL_ESQ, KP_QUADRIL_DIR = 11, 12
+
+
+class FallDetector:
+    """
+    Máquina de estados NORMAL -> SUSPEITA -> CAIU para um único fluxo de vídeo.
+
+    Todo o estado fica na instância, então um mesmo processo pode acompanhar
+    vários vídeos/câmeras em paralelo (uma instância por fluxo).
+    """
+
+    __slots__ = (
+        "frame_height", "frames_para_confirmar", "frames_para_recuperar",
+        "limiar_velocidade", "razao_posicao_baixa", "razao_corpo_horizontal",
+        "estado", "frames_suspeita", "frames_recuperacao", "prev_y_nariz",
+        "historico_nariz_y", "fall_detected", "stride", "limiares_base",
+    )
+
+    def __init__(self, frame_height, stride=1,
+                 frames_para_confirmar=FRAMES_PARA_CONFIRMAR,
+                 frames_para_recuperar=FRAMES_PARA_RECUPERAR,
+                 limiar_velocidade=LIMIAR_VELOCIDADE,
+                 razao_posicao_baixa=RAZAO_POSICAO_BAIXA,
+                 razao_corpo_horizontal=RAZAO_CORPO_HORIZONTAL):
+        self.frame_height = frame_height
+        self.limiares_base = (frames_para_confirmar, frames_para_recuperar, limiar_velocidade)
+        self.razao_posicao_baixa = razao_posicao_baixa
+        self.razao_corpo_horizontal = razao_corpo_horizontal
+        self.stride = None
+        self.set_stride(stride)
+        self.reset()
+
+    def set_stride(self, stride):
+        """
+        Escala os limiares definidos em frames para a taxa de amostragem usada
+        (1 a cada `stride` frames da fonte). Pode ser chamado durante o fluxo:
+        o estado da máquina é mantido.
+        """
+        stride = max(1, int(stride))
+        if stride == self.stride:
+            return
+        frames_para_confirmar, frames_para_recuperar, limiar_velocidade = self.limiares_base
+        self.stride = stride
+        self.frames_para_confirmar = max(1, math.ceil(frames_para_confirmar / stride))
+        self.frames_para_recuperar = max(1, math.ceil(frames_para_recuperar / stride))
+        self.limiar_velocidade = limiar_velocidade * stride
+
+    def reset(self):
+        self.estado = ESTADO_NORMAL
+        self.frames_suspeita = 0
+        self.frames_recuperacao = 0
+        self.prev_y_nariz = 0
+        self.historico_nariz_y = deque(maxlen=HISTORICO_TAMANHO)
+        self.fall_detected = False
+
+    def _indicadores_queda(self, keypoints, box):
+        nariz_y = float(keypoints[KP_NARIZ][1])
+        media_ombros_y = (float(keypoints[KP_OMBRO_ESQ][1]) + float(keypoints[KP_OMBRO_DIR][1])) / 2
+        media_quadril_y = (float(keypoints[KP_QUADRIL_ESQ][1]) + float(keypoints[KP_QUADRIL_DIR][1])) / 2
+
+        w, h = float(box[2]), float(box[3])
+        aspect_ratio = w / h if h > 0 else 0
+        eh_deitado = aspect_ratio > 1.0
+
+        diff_ombro_quadril = abs(media_ombros_y - media_quadril_y)
+        corpo_horizontal = diff_ombro_quadril < (self.frame_height * self.razao_corpo_horizontal)
+
+        self.historico_nariz_y.append(nariz_y)
+        velocidade = nariz_y - self.prev_y_nariz if self.prev_y_nariz > 0 else 0
+        queda_rapida = velocidade > self.limiar_velocidade
+
+        esta_baixo = nariz_y > (self.frame_height * self.razao_posicao_baixa)
+        self.prev_y_nariz = nariz_y
+
+        return esta_baixo and (eh_deitado or corpo_horizontal or queda_rapida)
+
+    def update(self, keypoints, boxes):
+        """
+        Avança a máquina de estados com as detecções de um frame.
+
+        - **keypoints**: keypoints (x, y) de cada pessoa detectada, formato (N, 17, 2).
+        - **boxes**: caixas xywh de cada pessoa detectada, formato (N, 4).
+
+        Retorna o estado atual (NORMAL, SUSPEITA ou CAIU).
+        """
+        if len(boxes) > 1:
+            # Regra de segurança: paciente acompanhado
+            self.estado = ESTADO_NORMAL
+            self.frames_suspeita = 0
+            self.frames_recuperacao = 0
+            return self.estado
+
+        if len(boxes) == 0:
+            return self.estado
+
+        indicadores_queda = False
+        if len(keypoints) > 0 and len(keypoints[0]) > 0:
+            indicadores_queda = self._indicadores_queda(keypoints[0], boxes[0])
+
+        if self.estado == ESTADO_CAIU:
+            if not indicadores_queda:
+                self.frames_recuperacao += 1
+                if self.frames_recuperacao >= self.frames_para_recuperar:
+                    self.estado = ESTADO_NORMAL
+                    self.frames_recuperacao = 0
+            else:
+                self.frames_recuperacao = 0
+
+        elif indicadores_queda:
+            self.frames_suspeita += 1
+            if self.frames_suspeita >= self.frames_para_confirmar:
+                self.estado = ESTADO_CAIU
+                self.fall_detected = True
+                self.frames_suspeita = 0
+                self.frames_recuperacao = 0
+            else:
+                self.estado = ESTADO_SUSPEITA
+
+        else:
+            self.frames_suspeita = 0
+            self.estado = ESTADO_NORMAL
+
+        return self.estado
+
+
+def extrair_pessoas(result, return_conf=False):
+    """
+    Extrai (keypoints, boxes) das pessoas detectadas com confiança suficiente.
+
+    Com `return_conf`, retorna também a confiança de cada pessoa.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return ([], [], []) if return_conf else ([], [])
+
+    cls = boxes.cls.cpu().numpy()
+    conf = boxes.conf.cpu().numpy()
+    indices = [i for i in range(len(cls)) if cls[i] == 0 and conf[i] >= CONFIANCA_MINIMA]
+
+    pessoas_boxes = boxes.xywh.cpu().numpy()[indices]
+    pessoas_keypoints = []
+    if result.keypoints is not None and len(result.keypoints.xy) > 0:
+        pessoas_keypoints = result.keypoints.xy.cpu().numpy()[indices]
+    if return_conf:
+        return pessoas_keypoints, pessoas_boxes, conf[indices]
+    return pessoas_keypoints, pessoas_boxes
+
+
+def alert_with_cooldown(client, message="Queda detectada", patient_id=None,
+                        alert_type="FALL_DETECTION", metadata=None, cooldown=None):
+    """
+    Envia o alerta se o par (paciente, tipo) estiver fora do cooldown.
+
+    Retorna True se o alerta foi enviado (ou enfileirado no outbox).
+    """
+    if cooldown is None:
+        cooldown = get_alert_cooldown()
+    permitido, restante = cooldown.try_acquire(patient_id, alert_type)
+    if not permitido:
+        ALERTS_SUPPRESSED.inc(reason="cooldown")
+        print(f"Alerta suprimido por cooldown para o paciente {patient_id} ({int(restante)}s restantes)")
+        return False
 
+    try:
+        client.send_alert(
+            alert_type=alert_type,
+            message=message,
+            metadata=dict({"priority": "high", "patient_id": patient_id}, **(metadata or {}))
+        )
+        return True
+    except Exception as e:
+        print(f"Falha ao enviar alerta: {e}")
+        return False
 
-def analyze_video_file(video_path, headless=True):
-    global model, cap, client, frame_height, prev_y_nariz, estado_atual, frames_suspeita, frames_recuperacao
+
+class MotionGate:
+    """
+    Pré-filtro barato que decide se um frame precisa passar pelo YOLO.
+
+    Compara o frame, reduzido e em tons de cinza, com o último frame inferido:
+    se a diferença absoluta média (0 a 1) ficar abaixo de `threshold`, a cena é
+    considerada estática e a última detecção é reaproveitada. Após `max_skip`
+    frames seguidos sem inferência, o YOLO roda de qualquer forma.
+    """
+
+    __slots__ = ("threshold", "max_skip", "size", "referencia", "pulados")
+
+    def __init__(self, threshold, max_skip=MOTION_GATE_MAX_SKIP, size=MOTION_GATE_SIZE):
+        self.threshold = threshold
+        self.max_skip = max(0, int(max_skip))
+        self.size = size
+        self.referencia = None
+        self.pulados = 0
+
+    def precisa_inferir(self, frame):
+        reduzido = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), self.size,
+                              interpolation=cv2.INTER_AREA)
+        if (self.referencia is not None and self.pulados < self.max_skip
+                and cv2.absdiff(reduzido, self.referencia).mean() / 255.0 < self.threshold):
+            self.pulados += 1
+            return False
+
+        self.referencia = reduzido
+        self.pulados = 0
+        return True
+
+
+def _iter_lotes(cap, stride, batch_size, gate=None, manter_frames=True):
+    """
+    Lê o vídeo, amostra 1 a cada `stride` frames e agrupa-os em lotes.
+
+    Cada item do lote é `(frame_idx, frame, inferir)`. O lote fecha quando acumula
+    `batch_size` frames a inferir, então o motion gate não reduz o tamanho dos
+    forward passes. Frames pulados só são mantidos se `manter_frames` (exibição).
+    """
+    lote = []
+    a_inferir = 0
+    frame_idx = 0
+    while True:
+        if frame_idx % stride == 0:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            inferir = gate is None or gate.precisa_inferir(frame)
+            lote.append((frame_idx, frame if inferir or manter_frames else None, inferir))
+            a_inferir += inferir
+            if a_inferir >= batch_size:
+                yield lote
+                lote = []
+                a_inferir = 0
+        # Frames fora do stride são apenas avançados (sem conversão de cor)
+        elif not cap.grab():
+            break
+        frame_idx += 1
+
+    if lote:
+        yield lote
+
+
+def exibir_estado(frame, estado, n_pessoas):
+    """Desenha o estado atual no frame e retorna True se o usuário pediu para sair."""
+    if n_pessoas > 1:
+        cv2.putText(frame, "SEGURO: ACOMPANHADO", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    elif estado == ESTADO_CAIU:
+        cv2.putText(frame, "ALERTA: QUEDA DETECTADA!", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
+    elif estado == ESTADO_SUSPEITA:
+        cv2.putText(frame, "ANALISANDO MOVIMENTO...", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 165, 255), 2)
+    else:
+        cv2.putText(frame, "MONITORANDO: TUDO OK", (50, 50),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 0), 2)
+
+    cv2.imshow("Monitoramento Inteligente", frame)
+    return cv2.waitKey(1) & 0xFF == ord('q')
+
+
+def analyze_video(video_path, headless=True, stride=1, batch_size=1,
+                  model_name="yolov8n-pose.pt", motion_threshold=0.0,
+                  motion_max_skip=MOTION_GATE_MAX_SKIP, keypoint_log_path=None):
+    """
+    Executa a detecção de quedas em um arquivo de vídeo.
+
+    - **stride**: analisa 1 a cada N frames (limiares escalados proporcionalmente).
+    - **batch_size**: quantidade de frames por forward pass do YOLO.
+    - **motion_threshold**: diferença média mínima (0 a 1) para rodar o YOLO; em
+      frames estáticos a última detecção é reaproveitada (0 desativa o filtro).
+    - **motion_max_skip**: máximo de frames analisados seguidos sem inferência.
+    - **keypoint_log_path**: grava a pose de cada frame analisado em um log de
+      keypoints (`processors.keypoint_log`), permitindo reavaliar limiares sem o YOLO.
+
+    Retorna um dicionário com o resultado e as estatísticas de desempenho.
+    """
+    stride = max(1, int(stride))
+    batch_size = max(1, int(batch_size))
+    resultado = {
+        "fall_detected": False,
+        "frames_read": 0,
+        "frames_analyzed": 0,
+        "frames_skipped": 0,
+        "keypoint_log": None,
+        "elapsed_seconds": 0.0,
+        "fps": 0.0,
+    }
 
     print("Inicializando modelo e captura de vídeo...")
     try:
-        model = YOLO('yolov8n-pose.pt')
+        model = get_pose_model(model_name)
     except Exception as e:
         print(f"Erro ao carregar o modelo: {e}")
-        return False
+        return resultado
 
     cap = cv2.VideoCapture(video_path)
 
-
-    fall_detected_in_video = False
-
     if not cap.isOpened():
         print(
             f"Não foi possível abrir '{video_path}'.")
-        return False
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
+        return resultado
+
+    detector = None
+    log = None
+    fps_video = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    gate = MotionGate(motion_threshold, motion_max_skip) if motion_threshold > 0 else None
+    # Detecção reaproveitada nos frames estáticos
+    keypoints, boxes, confs = [], [], []
+    inicio = time.perf_counter()
+    sair = False
+
+    for lote in _iter_lotes(cap, stride, batch_size, gate=gate, manter_frames=not headless):
+        frames_inferir = [frame for _, frame, inferir in lote if inferir]
+        if detector is None:
+            altura, largura = frames_inferir[0].shape[:2]
+            detector = FallDetector(frame_height=altura, stride=stride)
+            if keypoint_log_path:
+                log = KeypointLogWriter(keypoint_log_path, fps_video, largura, altura, stride=stride)
+
+        results = []
+        if frames_inferir:
+            with pose_lock:
+                t0 = time.perf_counter()
+                results = model(frames_inferir, conf=0.6, iou=0.4, verbose=False)
+                duracao = time.perf_counter() - t0
+            # Uma observação por lote mantém o custo da instrumentação fora do loop por frame
+            YOLO_INFERENCE_SECONDS.observe(duracao / len(frames_inferir), count=len(frames_inferir))
+            FRAMES_PROCESSED.inc(len(frames_inferir))
+        pulados = len(lote) - len(frames_inferir)
+        if pulados:
+            FRAMES_SKIPPED.inc(pulados)
+            resultado["frames_skipped"] += pulados
+
+        results = iter(results)
+        indices, pessoas = [], []
+        for frame_idx, frame, inferir in lote:
+            # A máquina de estados avança em todos os frames, mantendo os limiares em frames
+            if inferir:
+                keypoints, boxes, confs = extrair_pessoas(next(results), return_conf=True)
+            estado = detector.update(keypoints, boxes)
+            resultado["frames_analyzed"] += 1
+            indices.append(frame_idx)
+            pessoas.append((keypoints, boxes, confs))
+
+            if not headless and exibir_estado(frame, estado, len(boxes)):
+                sair = True
+                break
+
+        if log is not None:
+            indices = np.asarray(indices)
+            log.append(build_records(indices, indices / fps_video, pessoas))
+        if sair:
             break
 
-        if frame_height is None:
-            frame_height = frame.shape[0]
-
-
-        results = model(frame, conf=0.6, iou=0.4, verbose=False)
-
-
-        pessoas_detectadas = [
-            box for box in results[0].boxes
-            if box.cls == 0 and box.conf >= 0.6
-        ]
-
-        if len(pessoas_detectadas) > 1:
-            estado_atual = ESTADO_NORMAL
-            frames_suspeita = 0
-            frames_recuperacao = 0
-            cor = (0, 255, 0)  # Verde
-            cv2.putText(frame, "SEGURO: ACOMPANHADO", (50, 50),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, cor, 2)
-
-        elif len(pessoas_detectadas) == 1:
-
-            tem_keypoints = (
-                results[0].keypoints is not None
-                and len(results[0].keypoints.xy) > 0
-                and len(results[0].keypoints.xy[0]) > 0
-            )
-
-            indicadores_queda = False
-
-            if tem_keypoints:
-                keypoints = results[0].keypoints.xy[0]
-
-                nariz_y = keypoints[0][1].item()
-                ombro_esq_y = keypoints[5][1].item()
-                ombro_dir_y = keypoints[6][1].item()
-                quadril_esq_y = keypoints[11][1].item()
-                quadril_dir_y = keypoints[12][1].item()
-
-                media_ombros_y = (ombro_esq_y + ombro_dir_y) / 2
-                media_quadril_y = (quadril_esq_y + quadril_dir_y) / 2
-
-
-                box = pessoas_detectadas[0].xywh[0]
-                w, h = box[2].item(), box[3].item()
-                aspect_ratio = w / h if h > 0 else 0
-                eh_deitado = aspect_ratio > 1.0
-
-
-                diff_ombro_quadril = abs(media_ombros_y - media_quadril_y)
-                corpo_horizontal = diff_ombro_quadril < (frame_height * 0.08)
-
-
-                historico_nariz_y.append(nariz_y)
-                velocidade = nariz_y - prev_y_nariz if prev_y_nariz > 0 else 0
-                queda_rapida = velocidade > 25
-
-
-                esta_baixo = nariz_y > (frame_height * 0.6)
-
-                indicadores_queda = (
-                    (eh_deitado and esta_baixo)
-                    or (corpo_horizontal and esta_baixo)
-                    or (queda_rapida and esta_baixo)
-                )
-
-                prev_y_nariz = nariz_y
-
-
-            if estado_atual == ESTADO_NORMAL:
-                if indicadores_queda:
-                    frames_suspeita += 1
-                    if frames_suspeita >= FRAMES_PARA_CONFIRMAR:
-                        estado_atual = ESTADO_CAIU
-                        fall_detected_in_video = True
-                        frames_suspeita = 0
-                        frames_recuperacao = 0
-                    else:
-                        estado_atual = ESTADO_SUSPEITA
-                else:
-                    frames_suspeita = 0
-
-            elif estado_atual == ESTADO_SUSPEITA:
-                if indicadores_queda:
-                    frames_suspeita += 1
-                    if frames_suspeita >= FRAMES_PARA_CONFIRMAR:
-                        estado_atual = ESTADO_CAIU
-                        frames_suspeita = 0
-                        frames_recuperacao = 0
-                else:
-                    frames_suspeita = 0
-                    estado_atual = ESTADO_NORMAL
-
-            elif estado_atual == ESTADO_CAIU:
-                if not indicadores_queda:
-                    frames_recuperacao += 1
-                    if frames_recuperacao >= FRAMES_PARA_RECUPERAR:
-                        estado_atual = ESTADO_NORMAL
-                        frames_recuperacao = 0
-                else:
-                    frames_recuperacao = 0
-
-
-            if not headless:
-                if estado_atual == ESTADO_CAIU:
-                    cv2.putText(frame, "ALERTA: QUEDA DETECTADA!", (50, 50),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
-                elif estado_atual == ESTADO_SUSPEITA:
-                    cv2.putText(frame, "ANALISANDO MOVIMENTO...", (50, 50),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 165, 255), 2)
-                else:
-                    cv2.putText(frame, "MONITORANDO: TUDO OK", (50, 50),
-                                cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 200, 0), 2)
-
-                cv2.imshow("Monitoramento Inteligente", frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-
+    frames_lidos = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
     cap.release()
-    cv2.destroyAllWindows()
-    
-    return fall_detected_in_video
+    if log is not None:
+        log.close()
+        resultado["keypoint_log"] = str(log.path)
+    if not headless:
+        # Sem janela aberta; no opencv-python-headless a chamada nem existe
+        cv2.destroyAllWindows()
+
+    elapsed = time.perf_counter() - inicio
+    resultado["fall_detected"] = detector.fall_detected if detector else False
+    resultado["frames_read"] = frames_lidos
+    resultado["elapsed_seconds"] = round(elapsed, 3)
+    resultado["fps"] = round(frames_lidos / elapsed, 2) if elapsed > 0 else 0.0
+    print(
+        f"⏱️ [VIDEO] {frames_lidos} frames lidos, {resultado['frames_analyzed']} analisados "
+        f"({resultado['frames_skipped']} sem inferência) em {elapsed:.1f}s ({resultado['fps']} fps, stride={stride}, batch={batch_size})")
+
+    return resultado
+
+
+def analyze_video_file(video_path, headless=True, stride=1, batch_size=1,
+                       model_name="yolov8n-pose.pt", motion_threshold=0.0,
+                       motion_max_skip=MOTION_GATE_MAX_SKIP, keypoint_log_path=None):
+    return analyze_video(
+        video_path, headless=headless, stride=stride,
+        batch_size=batch_size, model_name=model_name, motion_threshold=motion_threshold,
+        motion_max_skip=motion_max_skip, keypoint_log_path=keypoint_log_path)["fall_detected"]
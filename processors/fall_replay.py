@@ -0,0 +1,260 @@
+"""
+Replay offline das regras de queda sobre logs de keypoints e varredura de limiares.
+
+Reavalia a máquina de estados NORMAL/SUSPEITA/CAIU de `FallDetector` sobre
+os logs gravados por `analyze_video` (`processors.keypoint_log`), sem rodar o
+YOLO. Os indicadores são calculados com NumPy para todos os frames de uma vez
+e a máquina de estados avança todas as combinações de limiares em paralelo,
+então milhares de combinações são avaliadas por segundo.
+
+Os rótulos são um JSON que associa cada log às quedas reais do clipe:
+`true` (o clipe inteiro é uma queda), `false` (nenhuma queda) ou a lista de
+intervalos `[[inicio, fim], ...]` em segundos. Cada entrada em CAIU dentro de
+um intervalo (com tolerância) é um acerto; entradas fora dos intervalos ou
+repetidas na mesma queda são falsos alarmes.
+
+Exemplo:
+    python -m processors.fall_replay rotulos.json \\
+        --confirm 3 5 8 --recover 30 60 90 --velocity 15 25 35 \\
+        --low 0.5 0.6 0.7 --horizontal 0.05 0.08 0.12 --output sweep.json
+"""
+import argparse
+import itertools
+import json
+import math
+import time
+from pathlib import Path
+import numpy as np
+from processors.fall_detection import (
+    FRAMES_PARA_CONFIRMAR, FRAMES_PARA_RECUPERAR, LIMIAR_VELOCIDADE,
+    RAZAO_POSICAO_BAIXA, RAZAO_CORPO_HORIZONTAL,
+    KP_NARIZ, KP_OMBRO_ESQ, KP_OMBRO_DIR, KP_QUADRIL_ESQ, KP_QUADRIL_DIR,
+)
+from processors.keypoint_log import KeypointLog
+
+# Colunas de cada combinação, na ordem dos parâmetros de `FallDetector`
+PARAMETROS = (
+    "frames_para_confirmar", "frames_para_recuperar", "limiar_velocidade",
+    "razao_posicao_baixa", "razao_corpo_horizontal",
+)
+TOLERANCIA_SEGUNDOS = 2.0
+# Frames por bloco: limita a matriz de indicadores (limiares x frames) em memória
+BLOCO_FRAMES = 4096
+
+
+def carregar_rotulos(path):
+    """Retorna `[(caminho_do_log, [(inicio, fim), ...]), ...]`; caminhos relativos ao JSON."""
+    path = Path(path)
+    rotulos = json.loads(path.read_text(encoding="utf-8"))
+    clipes = []
+    for log_path, quedas in rotulos.items():
+        if quedas is True:
+            quedas = [(0.0, math.inf)]
+        elif quedas is False:
+            quedas = []
+        clipes.append((path.parent / log_path, [(float(a), float(b)) for a, b in quedas]))
+    return clipes
+
+
+class Clip:
+    """
+    Sinais de um log de keypoints que independem dos limiares.
+
+    Frames sem ninguém não alteram a máquina de estados e são descartados;
+    os demais guardam o que `FallDetector._indicadores_queda` usaria.
+    """
+
+    def __init__(self, log, quedas=(), tolerancia=TOLERANCIA_SEGUNDOS):
+        self.nome = str(log.path)
+        self.stride = max(1, int(log.header["stride"]))
+        self.frame_height = float(log.header["frame_height"])
+
+        n_persons = np.asarray(log.n_persons)
+        presentes = n_persons > 0
+        keypoints = np.asarray(log.keypoints[presentes], dtype=np.float64)
+        boxes = np.asarray(log.boxes[presentes], dtype=np.float64)
+        self.frame_idx = np.asarray(log.frame_idx[presentes]).astype(np.int64)
+        timestamps = np.asarray(log.timestamps[presentes], dtype=np.float64)
+
+        # Regra de segurança: mais de uma pessoa zera a máquina de estados
+        self.varias = n_persons[presentes] > 1
+        self.nariz_y = keypoints[:, KP_NARIZ, 1]
+        # Apenas frames com uma pessoa e keypoints calculam indicadores
+        self.validos = ~self.varias & np.isfinite(self.nariz_y)
+
+        media_ombros_y = (keypoints[:, KP_OMBRO_ESQ, 1] + keypoints[:, KP_OMBRO_DIR, 1]) / 2
+        media_quadril_y = (keypoints[:, KP_QUADRIL_ESQ, 1] + keypoints[:, KP_QUADRIL_DIR, 1]) / 2
+        self.diff_ombro_quadril = np.abs(media_ombros_y - media_quadril_y)
+
+        w, h = boxes[:, 2], boxes[:, 3]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.deitado = np.where(h > 0, w / h, 0) > 1.0
+
+        # A velocidade compara com o nariz do último frame que calculou indicadores
+        y = self.nariz_y[self.validos]
+        anterior = np.concatenate(([0.0], y[:-1]))
+        self.velocidade = np.zeros(len(self.nariz_y))
+        self.velocidade[self.validos] = np.where(anterior > 0, y - anterior, 0.0)
+
+        # Queda rotulada (índice do intervalo) em cada frame, -1 fora das quedas
+        self.n_quedas = len(quedas)
+        self.queda_idx = np.full(len(timestamps), -1, dtype=np.int64)
+        for k, (inicio, fim) in reversed(list(enumerate(quedas))):
+            dentro = (timestamps >= inicio - tolerancia) & (timestamps <= fim + tolerancia)
+            self.queda_idx[dentro] = k
+
+    def __len__(self):
+        return len(self.nariz_y)
+
+    def indicadores(self, inicio, fim, velocidade, posicao_baixa, corpo_horizontal):
+        """Indicador de queda dos frames `[inicio, fim)` para cada trio de limiares, formato (U, B)."""
+        fatia = slice(inicio, fim)
+        with np.errstate(invalid="ignore"):
+            esta_baixo = self.nariz_y[None, fatia] > (self.frame_height * posicao_baixa)[:, None]
+            horizontal = self.diff_ombro_quadril[None, fatia] < (self.frame_height * corpo_horizontal)[:, None]
+        queda_rapida = self.velocidade[None, fatia] > (velocidade * self.stride)[:, None]
+        return self.validos[None, fatia] & esta_baixo & (self.deitado[None, fatia] | horizontal | queda_rapida)
+
+
+def threshold_grid(confirm=(FRAMES_PARA_CONFIRMAR,), recover=(FRAMES_PARA_RECUPERAR,),
+                   velocity=(LIMIAR_VELOCIDADE,), low=(RAZAO_POSICAO_BAIXA,),
+                   horizontal=(RAZAO_CORPO_HORIZONTAL,)):
+    """Produto cartesiano dos limiares, formato (C, 5) na ordem de `PARAMETROS`."""
+    return np.array(list(itertools.product(confirm, recover, velocity, low, horizontal)), dtype=np.float64)
+
+
+def replay_events(clip, combinacoes):
+    """
+    Executa a máquina de estados de todas as combinações sobre o clipe.
+
+    Gera `(posicao, entrou)` para cada frame em que alguma combinação entrou
+    em CAIU; `entrou` é a máscara (C,) dessas combinações.
+    """
+    # Mesmo escalonamento por stride de `FallDetector`
+    confirmar = np.maximum(1, np.ceil(combinacoes[:, 0] / clip.stride)).astype(np.int64)
+    recuperar = np.maximum(1, np.ceil(combinacoes[:, 1] / clip.stride)).astype(np.int64)
+    trios, trio_idx = np.unique(combinacoes[:, 2:], axis=0, return_inverse=True)
+    trio_idx = trio_idx.reshape(-1)
+
+    n = len(combinacoes)
+    caiu = np.zeros(n, dtype=bool)
+    suspeita = np.zeros(n, dtype=np.int64)
+    recuperacao = np.zeros(n, dtype=np.int64)
+
+    for inicio in range(0, len(clip), BLOCO_FRAMES):
+        fim = min(inicio + BLOCO_FRAMES, len(clip))
+        bloco = clip.indicadores(inicio, fim, trios[:, 0], trios[:, 1], trios[:, 2])
+        # (B, C): uma linha contígua por frame
+        bloco = np.ascontiguousarray(bloco[trio_idx].T)
+
+        for j, indicador in enumerate(bloco):
+            posicao = inicio + j
+            if clip.varias[posicao]:
+                caiu[:] = False
+                suspeita[:] = 0
+                recuperacao[:] = 0
+                continue
+
+            # Em CAIU: frames sem indicador contam para a recuperação
+            rec = np.where(indicador, 0, recuperacao + 1)
+            recuperou = caiu & (rec >= recuperar)
+            # Fora de CAIU: frames com indicador contam para a confirmação
+            sus = np.where(indicador, suspeita + 1, 0)
+            entrou = ~caiu & (sus >= confirmar)
+
+            recuperacao = np.where(caiu & ~recuperou, rec, 0)
+            suspeita = np.where(caiu | entrou, 0, sus)
+            caiu = (caiu & ~recuperou) | entrou
+            if entrou.any():
+                yield posicao, entrou
+
+
+def sweep_thresholds(clips, combinacoes):
+    """
+    Avalia cada combinação de limiares sobre os clipes rotulados.
+
+    Retorna arrays (C,) com acertos (`tp`), falsos alarmes (`fp`), quedas não
+    detectadas (`fn`), `precision`, `recall` e `f1`.
+    """
+    n = len(combinacoes)
+    tp = np.zeros(n, dtype=np.int64)
+    fp = np.zeros(n, dtype=np.int64)
+    total_quedas = 0
+
+    for clip in clips:
+        total_quedas += clip.n_quedas
+        detectadas = np.zeros((n, clip.n_quedas), dtype=bool)
+        for posicao, entrou in replay_events(clip, combinacoes):
+            k = clip.queda_idx[posicao]
+            if k < 0:
+                fp += entrou
+                continue
+            # Uma nova entrada em CAIU na mesma queda é um alerta repetido
+            fp += entrou & detectadas[:, k]
+            tp += entrou & ~detectadas[:, k]
+            detectadas[:, k] |= entrou
+
+    fn = total_quedas - tp
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(total_quedas > 0, tp / max(total_quedas, 1), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {"tp": tp, "fp": fp, "fn": fn, "precision": precision, "recall": recall, "f1": f1}
+
+
+def ranking(combinacoes, resultado):
+    """Combinações ordenadas por F1 (desempate: menos falsos alarmes)."""
+    ordem = np.lexsort((resultado["fp"], -resultado["f1"]))
+    linhas = []
+    for i in ordem:
+        linha = {nome: valor for nome, valor in zip(PARAMETROS, combinacoes[i].tolist())}
+        linha["frames_para_confirmar"] = int(linha["frames_para_confirmar"])
+        linha["frames_para_recuperar"] = int(linha["frames_para_recuperar"])
+        for metrica in ("tp", "fp", "fn"):
+            linha[metrica] = int(resultado[metrica][i])
+        for metrica in ("precision", "recall", "f1"):
+            linha[metrica] = round(float(resultado[metrica][i]), 4)
+        linhas.append(linha)
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Varredura de limiares de queda sobre logs de keypoints.")
+    parser.add_argument("labels", type=Path, help="JSON {log: true | false | [[inicio, fim], ...]}")
+    parser.add_argument("--confirm", type=int, nargs="+", default=[FRAMES_PARA_CONFIRMAR],
+                        help="FRAMES_PARA_CONFIRMAR")
+    parser.add_argument("--recover", type=int, nargs="+", default=[FRAMES_PARA_RECUPERAR],
+                        help="FRAMES_PARA_RECUPERAR")
+    parser.add_argument("--velocity", type=float, nargs="+", default=[LIMIAR_VELOCIDADE],
+                        help="Velocidade de queda rápida (px/frame)")
+    parser.add_argument("--low", type=float, nargs="+", default=[RAZAO_POSICAO_BAIXA],
+                        help="Razão de posição baixa do nariz")
+    parser.add_argument("--horizontal", type=float, nargs="+", default=[RAZAO_CORPO_HORIZONTAL],
+                        help="Razão de corpo horizontal")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCIA_SEGUNDOS,
+                        help="Segundos aceitos antes/depois de cada queda rotulada")
+    parser.add_argument("--top", type=int, default=10, help="Combinações exibidas")
+    parser.add_argument("--output", type=Path, help="Ranking completo (JSON)")
+    args = parser.parse_args(argv)
+
+    clips = [Clip(KeypointLog(log_path), quedas, args.tolerance)
+             for log_path, quedas in carregar_rotulos(args.labels)]
+    combinacoes = threshold_grid(args.confirm, args.recover, args.velocity, args.low, args.horizontal)
+    frames = sum(len(clip) for clip in clips)
+    print(f"🔁 {len(combinacoes)} combinações x {len(clips)} clipes ({frames} frames com pessoas)...")
+
+    inicio = time.perf_counter()
+    resultado = sweep_thresholds(clips, combinacoes)
+    elapsed = time.perf_counter() - inicio
+    print(f"⏱️ {elapsed:.2f}s ({len(combinacoes) / elapsed:.0f} combinações/s)")
+
+    linhas = ranking(combinacoes, resultado)
+    for linha in linhas[:args.top]:
+        print(json.dumps(linha))
+    if args.output:
+        args.output.write_text(json.dumps(linhas, indent=2), encoding="utf-8")
+        print(f"📊 Ranking salvo em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Log compacto da série temporal de keypoints de cada vídeo analisado.
+
+Cada frame analisado vira um registro de largura fixa com 42 valores float32
+(168 bytes):
+
+    frame_idx, timestamp, n_persons, 17x2 keypoints (x, y), box (x, y, w, h), conf
+
+Os valores são os da pessoa principal (a de maior confiança; NaN quando não há
+ninguém). O arquivo começa com um cabeçalho de 64 bytes e os registros vêm em
+seguida, então ele pode receber novos registros enquanto o vídeo é analisado e
+ser lido com `np.memmap` sem cópia. Custo em disco: 168 B x 30 fps x 3600 s
+≈ 18 MB por hora de vídeo a 30 fps (metade com INFERENCE_STRIDE=2).
+"""
+import os
+import struct
+from pathlib import Path
+import numpy as np
+
+MAGIC = b"KPLOG\x00\x00\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIddIII20x")  # 64 bytes
+HEADER_SIZE = HEADER.size
+
+N_KEYPOINTS = 17
+COL_FRAME_IDX, COL_TIMESTAMP, COL_N_PERSONS = 0, 1, 2
+COL_KEYPOINTS = slice(3, 3 + N_KEYPOINTS * 2)
+COL_BOX = slice(3 + N_KEYPOINTS * 2, 7 + N_KEYPOINTS * 2)
+COL_CONF = 7 + N_KEYPOINTS * 2
+RECORD_WIDTH = COL_CONF + 1
+RECORD_SIZE = RECORD_WIDTH * 4
+
+
+def build_records(frame_indices, timestamps, pessoas):
+    """
+    Monta os registros de um lote de frames.
+
+    - **pessoas**: lista de `(keypoints, boxes, confs)` por frame, no formato de
+      `extrair_pessoas(..., return_conf=True)`.
+    """
+    records = np.full((len(pessoas), RECORD_WIDTH), np.nan, dtype=np.float32)
+    records[:, COL_FRAME_IDX] = frame_indices
+    records[:, COL_TIMESTAMP] = timestamps
+    for linha, (keypoints, boxes, confs) in zip(records, pessoas):
+        linha[COL_N_PERSONS] = len(boxes)
+        if len(boxes):
+            linha[COL_BOX] = boxes[0]
+            linha[COL_CONF] = confs[0]
+        if len(keypoints):
+            linha[COL_KEYPOINTS] = np.asarray(keypoints[0], dtype=np.float32).reshape(-1)
+    return records
+
+
+class KeypointLogWriter:
+    """
+    Escreve registros em um log de keypoints (somente acréscimo).
+
+    Com `append=True` e o arquivo existente, continua o log (o cabeçalho
+    original é mantido e um registro parcial no fim é descartado).
+    """
+
+    def __init__(self, path, fps, frame_width, frame_height, stride=1, start_time=0.0, append=False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if append and self.path.exists() and self.path.stat().st_size >= HEADER_SIZE:
+            self.header = read_header(self.path)
+            completos = (self.path.stat().st_size - HEADER_SIZE) // RECORD_SIZE
+            self._file = open(self.path, "r+b")
+            self._file.truncate(HEADER_SIZE + completos * RECORD_SIZE)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self.header = {
+                "version": VERSION, "record_width": RECORD_WIDTH, "fps": float(fps),
+                "start_time": float(start_time), "frame_width": int(frame_width),
+                "frame_height": int(frame_height), "stride": int(stride),
+            }
+            self._file = open(self.path, "wb")
+            self._file.write(HEADER.pack(
+                MAGIC, VERSION, RECORD_WIDTH, self.header["fps"], self.header["start_time"],
+                self.header["frame_width"], self.header["frame_height"], self.header["stride"]))
+
+    def append(self, records):
+        """Acrescenta um bloco de registros `(N, RECORD_WIDTH)` e o torna visível aos leitores."""
+        self._file.write(np.ascontiguousarray(records, dtype=np.float32).tobytes())
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        dados = f.read(HEADER_SIZE)
+    if len(dados) < HEADER_SIZE:
+        raise ValueError(f"'{path}' não é um log de keypoints (cabeçalho incompleto)")
+    magic, version, width, fps, start_time, frame_width, frame_height, stride = HEADER.unpack(dados)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' não é um log de keypoints")
+    if version != VERSION or width != RECORD_WIDTH:
+        raise ValueError(f"Versão de log de keypoints não suportada: v{version} ({width} colunas)")
+    return {
+        "version": version, "record_width": width, "fps": fps, "start_time": start_time,
+        "frame_width": frame_width, "frame_height": frame_height, "stride": stride,
+    }
+
+
+def prune_logs(log_dir, max_bytes, manter=None):
+    """Remove os logs mais antigos (por mtime) até o diretório caber em `max_bytes`."""
+    entradas = []
+    for path in Path(log_dir).glob("*.kplog"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entradas.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    removidos = 0
+    for _, tamanho, path in sorted(entradas, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if path == manter:
+            continue
+        path.unlink(missing_ok=True)
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+
+class KeypointLog:
+    """
+    Leitura sem cópia de um log de keypoints.
+
+    `records` é um `np.memmap` somente leitura; as propriedades são views dele.
+    Apenas registros completos são expostos, então o arquivo pode ser lido
+    enquanto ainda está sendo escrito.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.header = read_header(self.path)
+        n = (self.path.stat().st_size - HEADER_SIZE) // RECORD_SIZE
+        if n == 0:
+            self.records = np.empty((0, RECORD_WIDTH), dtype=np.float32)
+        else:
+            self.records = np.memmap(self.path, dtype=np.float32, mode="r",
+                                     offset=HEADER_SIZE, shape=(n, RECORD_WIDTH))
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def frame_idx(self):
+        return self.records[:, COL_FRAME_IDX]
+
+    @property
+    def timestamps(self):
+        return self.records[:, COL_TIMESTAMP]
+
+    @property
+    def n_persons(self):
+        return self.records[:, COL_N_PERSONS]
+
+    @property
+    def keypoints(self):
+        """Formato (N, 17, 2)."""
+        return self.records[:, COL_KEYPOINTS].reshape(-1, N_KEYPOINTS, 2)
+
+    @property
+    def boxes(self):
+        """Formato (N, 4), xywh."""
+        return self.records[:, COL_BOX]
+
+    @property
+    def conf(self):
+        return self.records[:, COL_CONF]
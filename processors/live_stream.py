@@ -0,0 +1,304 @@
+"""
+Monitoramento contínuo de câmeras (RTSP/HTTP ou dispositivo local).
+
+Uma thread de captura mantém apenas os frames mais recentes em uma fila
+limitada (descarta os mais antigos): se a inferência ficar para trás, a
+latência não acumula. Fontes de rede (RTSP/HTTP) são reabertas com backoff
+quando a leitura falha; arquivos e dispositivos locais encerram o monitoramento
+no primeiro frame não lido. As transições da máquina de estados são emitidas como
+eventos em tempo real e a entrada em CAIU dispara o alerta via
+`alert_with_cooldown` pelo outbox de alertas (entrega assíncrona ao SQS).
+
+Exemplo:
+    python -m processors.live_stream --source rtsp://camera-quarto-101/stream
+    python -m processors.live_stream --source video.mp4   # replay no fps nativo
+"""
+import argparse
+import os
+import threading
+import time
+from collections import deque
+import cv2
+from aws_client.alert_cooldown import get_alert_cooldown
+from aws_client.alert_outbox import get_alert_outbox
+from monitoring.metrics import (
+    FRAMES_PROCESSED, YOLO_INFERENCE_SECONDS, STREAM_FRAME_LATENCY_SECONDS,
+    FRAME_TO_ALERT_SECONDS, STREAM_FRAMES_DROPPED, STREAM_RECONNECTS,
+)
+from processors.fall_detection import (
+    ESTADO_CAIU, FallDetector, exibir_estado, pose_lock, alert_with_cooldown,
+    extrair_pessoas,
+)
+from singletons.singletons import get_pose_model
+
+
+# Peso de cada novo intervalo entre frames analisados na média móvel do stride efetivo
+SUAVIZACAO_STRIDE = 0.1
+
+
+def parse_source(source):
+    """'0', '1'... viram índices de dispositivo; o resto é URL ou caminho."""
+    return int(source) if str(source).isdigit() else source
+
+
+def is_live_source(source):
+    """Fontes de rede (URL que não é arquivo local nem índice de dispositivo)."""
+    source = parse_source(source)
+    return isinstance(source, str) and "://" in source and not os.path.exists(source)
+
+
+class FrameGrabber:
+    """
+    Lê frames de um `cv2.VideoCapture` em uma thread dedicada.
+
+    - **queue_size**: frames mantidos na fila; ao encher, o mais antigo é descartado.
+    - **realtime**: limita a leitura ao fps nativo (replay de arquivo como se fosse câmera).
+    - **reconnect**: reabre a fonte quando a leitura falha (padrão: apenas fontes de rede).
+    - **base_backoff** / **max_backoff**: limites (s) da espera entre tentativas de reconexão.
+    """
+
+    def __init__(self, source, queue_size=4, realtime=False, reconnect=None,
+                 base_backoff=0.5, max_backoff=30.0):
+        self.source = source
+        self.reconnect = is_live_source(source) if reconnect is None else reconnect
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.reconnects = 0
+        self.cap = cv2.VideoCapture(parse_source(source))
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Não foi possível abrir a fonte de vídeo '{source}'.")
+
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.realtime = realtime
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.finished = False
+        self._frames = deque(maxlen=max(1, queue_size))
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.cap.release()
+
+    def get_batch(self, max_items, timeout=1.0):
+        """Retira até `max_items` frames (mais antigos primeiro): lista de (frame_idx, capturado_em, frame)."""
+        with self._cond:
+            if not self._frames and not self.finished:
+                self._cond.wait(timeout)
+            lote = []
+            while self._frames and len(lote) < max_items:
+                lote.append(self._frames.popleft())
+            return lote
+
+    def _run(self):
+        intervalo = 1.0 / self.fps
+        proximo = time.monotonic()
+        while not self._stop.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                if self.reconnect and self._reabrir():
+                    proximo = time.monotonic()
+                    continue
+                break
+            capturado_em = time.monotonic()
+
+            with self._cond:
+                if len(self._frames) == self._frames.maxlen:
+                    self.frames_dropped += 1
+                    STREAM_FRAMES_DROPPED.inc()
+                self._frames.append((self.frames_captured, capturado_em, frame))
+                self.frames_captured += 1
+                self._cond.notify()
+
+            if self.realtime:
+                proximo += intervalo
+                espera = proximo - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+
+        with self._cond:
+            self.finished = True
+            self._cond.notify_all()
+
+    def _reabrir(self):
+        """Reabre a fonte com backoff exponencial até conseguir ou `stop()`. Retorna True se reabriu."""
+        tentativa = 0
+        while not self._stop.is_set():
+            espera = min(self.max_backoff, self.base_backoff * 2 ** tentativa)
+            print(f"⚠️ [STREAM] Falha na leitura de '{self.source}'. Reconectando em {espera:.1f}s...")
+            if self._stop.wait(espera):
+                break
+            self.cap.release()
+            self.cap = cv2.VideoCapture(parse_source(self.source))
+            tentativa += 1
+            if self.cap.isOpened():
+                self.reconnects += 1
+                STREAM_RECONNECTS.inc()
+                print(f"🔄 [STREAM] '{self.source}' reconectado.")
+                return True
+        return False
+
+
+def monitor_stream(source, client=None, batch_size=1, queue_size=4, realtime=None,
+                   headless=True, max_seconds=None, on_event=None, stop_event=None,
+                   model_name="yolov8n-pose.pt", patient_id=None, location=None,
+                   cooldown=None):
+    """
+    Analisa um fluxo de vídeo ao vivo até o fim da fonte, `max_seconds` ou `stop_event`.
+
+    - **client**: `SQSClient` usado nos alertas (None apenas registra os eventos).
+    - **patient_id** / **location**: identificam o paciente nos alertas (cooldown por paciente).
+      Sem `patient_id`, a própria fonte é usada como chave do cooldown.
+    - **cooldown**: registro `AlertCooldown` (padrão: o do processo).
+    - **on_event**: callback chamado a cada transição de estado com um dicionário do evento.
+
+    Quando a inferência fica para trás, os frames descartados fazem cada frame
+    analisado representar vários frames da fonte. Os limiares da máquina de
+    estados (em frames e px/frame) são escalados pelo stride efetivo, a média
+    móvel do intervalo entre frames analisados, como no `INFERENCE_STRIDE`.
+
+    Retorna estatísticas do fluxo: frames capturados/descartados/analisados,
+    stride efetivo, eventos e latências frame-alerta.
+    """
+    if realtime is None:
+        # Arquivos locais são reproduzidos no fps nativo para simular uma câmera
+        realtime = os.path.exists(str(source))
+
+    model = get_pose_model(model_name)
+    grabber = FrameGrabber(source, queue_size=queue_size, realtime=realtime).start()
+    detector = None
+    estado_anterior = None
+    eventos = []
+    latencias_alerta = []
+    frames_analisados = 0
+    ultimo_frame_idx = None
+    stride_efetivo = 1.0
+    inicio = time.monotonic()
+
+    print(f"📡 Monitorando '{source}' ({grabber.fps:.0f} fps, fila={queue_size}, lote={batch_size})")
+    try:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if max_seconds is not None and time.monotonic() - inicio >= max_seconds:
+                break
+
+            lote = grabber.get_batch(batch_size)
+            if not lote:
+                if grabber.finished:
+                    break
+                continue
+
+            frames = [frame for _, _, frame in lote]
+            if detector is None:
+                detector = FallDetector(frame_height=frames[0].shape[0])
+
+            with pose_lock:
+                t0 = time.perf_counter()
+                results = model(frames, conf=0.6, iou=0.4, verbose=False)
+                duracao = time.perf_counter() - t0
+            YOLO_INFERENCE_SECONDS.observe(duracao / len(frames), count=len(frames))
+            FRAMES_PROCESSED.inc(len(frames))
+
+            for (frame_idx, capturado_em, frame), result in zip(lote, results):
+                if ultimo_frame_idx is not None:
+                    stride_efetivo += SUAVIZACAO_STRIDE * (frame_idx - ultimo_frame_idx - stride_efetivo)
+                    detector.set_stride(round(stride_efetivo))
+                ultimo_frame_idx = frame_idx
+
+                keypoints, boxes = extrair_pessoas(result)
+                estado = detector.update(keypoints, boxes)
+                frames_analisados += 1
+                STREAM_FRAME_LATENCY_SECONDS.observe(time.monotonic() - capturado_em)
+
+                if estado != estado_anterior:
+                    evento = {
+                        "frame_idx": frame_idx,
+                        "video_time": round(frame_idx / grabber.fps, 3),
+                        "from": estado_anterior,
+                        "to": estado,
+                        "timestamp": time.time(),
+                    }
+                    if estado == ESTADO_CAIU:
+                        if client is not None:
+                            alert_with_cooldown(
+                                client, message=f"Queda detectada em '{source}'",
+                                patient_id=patient_id or str(source),
+                                metadata={"location": location} if location else None,
+                                cooldown=cooldown)
+                        latencia = time.monotonic() - capturado_em
+                        FRAME_TO_ALERT_SECONDS.observe(latencia)
+                        latencias_alerta.append(latencia)
+                        evento["frame_to_alert_seconds"] = round(latencia, 3)
+                        print(f"🚨 [STREAM] Queda detectada (frame {frame_idx}, latência {latencia * 1000:.0f} ms)")
+
+                    eventos.append(evento)
+                    if on_event:
+                        on_event(evento)
+                    estado_anterior = estado
+
+                if not headless and exibir_estado(frame, estado, len(boxes)):
+                    raise KeyboardInterrupt
+    except KeyboardInterrupt:
+        print("⏹️ Monitoramento interrompido.")
+    finally:
+        grabber.stop()
+        if not headless:
+            cv2.destroyAllWindows()
+
+    duracao_total = time.monotonic() - inicio
+    return {
+        "frames_captured": grabber.frames_captured,
+        "frames_dropped": grabber.frames_dropped,
+        "reconnects": grabber.reconnects,
+        "frames_analyzed": frames_analisados,
+        "elapsed_seconds": round(duracao_total, 3),
+        "fps_analyzed": round(frames_analisados / duracao_total, 2) if duracao_total > 0 else 0.0,
+        "effective_stride": round(stride_efetivo, 2),
+        "fall_detected": detector.fall_detected if detector else False,
+        "events": eventos,
+        "frame_to_alert_seconds": [round(l, 3) for l in latencias_alerta],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detecção de quedas em fluxo de vídeo ao vivo.")
+    parser.add_argument("--source", required=True, help="URL RTSP/HTTP, índice de câmera (0) ou arquivo")
+    parser.add_argument("--queue-size", type=int, default=4, help="Frames mantidos na fila (descarta os mais antigos)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames por forward pass do YOLO")
+    parser.add_argument("--max-seconds", type=float, help="Encerra após N segundos")
+    parser.add_argument("--no-realtime", action="store_true", help="Lê arquivos o mais rápido possível")
+    parser.add_argument("--show", action="store_true", help="Exibe a janela do OpenCV")
+    parser.add_argument("--no-alerts", action="store_true", help="Apenas registra os eventos, sem SQS")
+    parser.add_argument("--localstack", action="store_true", help="Envia os alertas ao LocalStack")
+    parser.add_argument("--patient-id", help="Paciente monitorado (padrão: a própria fonte)")
+    parser.add_argument("--location", help="Local da câmera, ex.: 'Quarto 101'")
+    args = parser.parse_args(argv)
+
+    client = None
+    cooldown = None
+    if not args.no_alerts:
+        cooldown = get_alert_cooldown(use_localstack=args.localstack)
+        # O outbox não bloqueia o loop de inferência enquanto o SQS responde
+        client = get_alert_outbox(os.getenv("QUEUE_URL", "FILA-MONITORAMENTO-IDOSOS"),
+                                  use_localstack=args.localstack)
+
+    stats = monitor_stream(
+        args.source, client=client, batch_size=args.batch_size, queue_size=args.queue_size,
+        realtime=False if args.no_realtime else None, headless=not args.show,
+        max_seconds=args.max_seconds, patient_id=args.patient_id, location=args.location,
+        cooldown=cooldown)
+    print(f"📊 {stats['frames_analyzed']}/{stats['frames_captured']} frames analisados, "
+          f"{stats['frames_dropped']} descartados, {len(stats['events'])} eventos")
+
+
+if __name__ == "__main__":
+    main()
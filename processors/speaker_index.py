@@ -0,0 +1,65 @@
+"""
+Atribuição de locutores aos segmentos da transcrição por varredura única.
+
+Segmentos e turnos da diarização são ordenados pelo início e percorridos
+juntos: um turno entra em um heap (ordenado pelo fim) quando começa antes do
+fim do segmento atual e sai quando termina antes do início dele. Cada segmento
+compara apenas os turnos ativos no seu intervalo, então um turno longo (ex.:
+uma sobreposição que cobre a gravação inteira) custa uma comparação a mais por
+segmento, e não uma varredura de todos os turnos. Custo total
+O((segmentos + turnos) log turnos) mais os turnos ativos de cada segmento.
+"""
+import heapq
+
+
+class SpeakerIndex:
+    """Turnos `(start, end, label)` da diarização, ordenados pelo início."""
+
+    def __init__(self, turns):
+        self.turns = sorted(turns, key=lambda t: (t[0], t[1]))
+
+    @classmethod
+    def from_diarization(cls, diarization):
+        return cls(
+            (turn.start, turn.end, label)
+            for turn, _, label in diarization.itertracks(yield_label=True)
+        )
+
+    def assign(self, segments, default="Unknown"):
+        """
+        Locutor de cada segmento `(start, end)`, na ordem recebida.
+
+        Vence o turno com a maior sobreposição temporal (empate: o que começa
+        primeiro). Sem sobreposição positiva, como em um segmento pontual, vale
+        o primeiro turno que contém o início do segmento; sem nenhum, `default`.
+        """
+        locutores = [default] * len(segments)
+        ativos = []  # heap de (fim, posição do turno)
+        proximo = 0
+
+        for i in sorted(range(len(segments)), key=lambda i: segments[i][0]):
+            start, end = segments[i]
+            while proximo < len(self.turns) and self.turns[proximo][0] <= end:
+                heapq.heappush(ativos, (self.turns[proximo][1], proximo))
+                proximo += 1
+            # Os próximos segmentos começam depois deste: turnos encerrados não voltam
+            while ativos and ativos[0][0] < start:
+                heapq.heappop(ativos)
+
+            melhor, maior_sobreposicao, contem_inicio = None, 0.0, None
+            for fim, j in ativos:
+                inicio = self.turns[j][0]
+                if inicio > end:
+                    continue  # entrou por um segmento anterior mais longo
+                sobreposicao = min(end, fim) - max(start, inicio)
+                if sobreposicao > maior_sobreposicao or (
+                        sobreposicao == maior_sobreposicao and melhor is not None and j < melhor):
+                    melhor, maior_sobreposicao = j, sobreposicao
+                if inicio <= start and (contem_inicio is None or j < contem_inicio):
+                    contem_inicio = j
+
+            if melhor is None:
+                melhor = contem_inicio
+            if melhor is not None:
+                locutores[i] = self.turns[melhor][2]
+        return locutores
@@ -2,6 +2,8 @@ from pyannote.audio import Pipeline
 import torch
 from pathlib import Path
 from functools import lru_cache
+from monitoring.metrics import TRANSCRIPTION_SECONDS, DIARIZATION_SECONDS
+from processors.speaker_index import SpeakerIndex
 from singletons.singletons import get_whisper_model
 import os
 from dotenv import load_dotenv
@@ -29,32 +31,30 @@ def transcribe_audio(audio_path: Path, model_name: str) -> str:
 
     # 1. Transcrição com Whisper
     print(f"🎤 Transcrevendo áudio: {audio_path.name}...")
-    result = model.transcribe(str(audio_path), verbose=False)
+    with TRANSCRIPTION_SECONDS.time(engine="whisper"):
+        result = model.transcribe(str(audio_path), verbose=False)
     segments = result.get("segments", [])
 
     # 2. Executa a Diarização
     print("👥 Identificando locutores...")
-    diarization = diarization_pipeline(str(audio_path))
+    with DIARIZATION_SECONDS.time():
+        diarization = diarization_pipeline(str(audio_path))
 
-    final_transcript = []
-
-    # 3. Cruzamento de Timestamps
-    for segment in segments:
-        start, end = segment['start'], segment['end']
-        text = segment['text'].strip()
-
-        speaker = "Unknown"
+    try:
+        speaker_index = SpeakerIndex.from_diarization(diarization)
+    except AttributeError:
+        speaker_index = None
 
+    final_transcript = []
 
-        try:
-            for turn, _, speaker_label in diarization.itertracks(yield_label=True):
-                if turn.start <= start <= turn.end:
-                    speaker = speaker_label
-                    break
-        except AttributeError:
-
-            speaker = "Speaker_Detected"
+    # 3. Cruzamento de Timestamps (uma única varredura de segmentos e turnos)
+    if speaker_index is None:
+        speakers = ["Speaker_Detected"] * len(segments)
+    else:
+        speakers = speaker_index.assign([(segment['start'], segment['end']) for segment in segments])
 
+    for segment, speaker in zip(segments, speakers):
+        text = segment['text'].strip()
         final_transcript.append(f"[{speaker}]: {text}")
 
     return "\n".join(final_transcript)
@@ -1,5 +1,17 @@
+import threading
 from moviepy import VideoFileClip
+import numpy as np
 import speech_recognition as sr
+from monitoring.metrics import TRANSCRIPTION_SECONDS, TRANSCRIPTION_SPEECH_RATIO
+from processors.audio_decode import SAMPLE_RATE, to_pcm16
+from processors.vad import detect_voiced_regions
+from singletons.singletons import get_whisper_model
+
+# Janela nativa do Whisper: cada chunk é decodificado em uma única janela
+WHISPER_CHUNK_SECONDS = 30.0
+
+# O modelo Whisper é compartilhado pelo processo; as decodificações são serializadas
+whisper_lock = threading.Lock()
 
 
 def extract_audio_from_video(video_path, audio_path):
@@ -7,25 +19,101 @@ def extract_audio_from_video(video_path, audio_path):
     video.audio.write_audiofile(audio_path)
 
 
-def transcribe_audio_to_text(audio_path, text_output_path):
+def agrupar_regioes(regioes, max_chunk_seconds=WHISPER_CHUNK_SECONDS):
+    """
+    Agrupa as regiões com voz em chunks de até `max_chunk_seconds` de fala.
+
+    Regiões mais longas que o limite são divididas. Retorna uma lista de chunks,
+    cada um uma lista de (inicio, fim) em segundos.
+    """
+    chunks, atual, duracao_atual = [], [], 0.0
+    for inicio, fim in regioes:
+        while fim > inicio:
+            parte_fim = min(fim, inicio + max_chunk_seconds - duracao_atual)
+            atual.append((inicio, parte_fim))
+            duracao_atual += parte_fim - inicio
+            inicio = parte_fim
+            if duracao_atual >= max_chunk_seconds - 1e-6:
+                chunks.append(atual)
+                atual, duracao_atual = [], 0.0
+    if atual:
+        chunks.append(atual)
+    return chunks
+
+
+def _idioma_whisper(language):
+    """'pt-BR' -> 'pt' (o Whisper usa apenas o código do idioma)."""
+    return language.split("-")[0].lower() if language else None
+
+
+def transcribe_speech(audio, text_output_path, model_name="base", language="en-US",
+                      sample_rate=SAMPLE_RATE, max_chunk_seconds=WHISPER_CHUNK_SECONDS):
+    """
+    Transcreve localmente com o Whisper, decodificando apenas os trechos com voz.
+
+    O VAD (`processors.vad`) descarta os silêncios e as regiões com voz são
+    concatenadas em chunks de até 30 s, cada um decodificado em uma janela do
+    Whisper: o custo acompanha a duração da fala, não a da gravação.
+
+    - **audio**: buffer float32 mono a 16 kHz (ver `processors.audio_decode.decode_audio`).
+    """
+    duracao_total = len(audio) / sample_rate
+    regioes = detect_voiced_regions(audio, sample_rate)
+    duracao_fala = sum(fim - inicio for inicio, fim in regioes)
+    if duracao_total > 0:
+        TRANSCRIPTION_SPEECH_RATIO.observe(duracao_fala / duracao_total)
+
+    textos = []
+    if regioes:
+        model = get_whisper_model(model_name)
+        for chunk in agrupar_regioes(regioes, max_chunk_seconds):
+            trecho = np.concatenate([
+                audio[int(inicio * sample_rate):int(fim * sample_rate)] for inicio, fim in chunk
+            ]).astype(np.float32, copy=False)
+            with whisper_lock, TRANSCRIPTION_SECONDS.time(engine="whisper"):
+                result = model.transcribe(
+                    trecho, language=_idioma_whisper(language), fp16=False,
+                    condition_on_previous_text=False, verbose=None)
+            textos.append(result.get("text", "").strip())
+
+    text = " ".join(t for t in textos if t)
+    print(f"🎤 Transcrição ({duracao_fala:.1f}s de voz em {duracao_total:.1f}s de áudio): {text}")
+
+    with open(text_output_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+    return text
+
+
+def transcribe_audio_to_text(audio, text_output_path, sample_rate=SAMPLE_RATE, language="en-US"):
+    """
+    Transcreve o áudio com o Google Speech Recognition (requer rede).
+
+    - **audio**: caminho de um arquivo WAV ou buffer float32 mono já decodificado
+      (ver `processors.audio_decode.decode_audio`).
+    """
     recognizer = sr.Recognizer()
 
-    with sr.AudioFile(audio_path) as source:
-        audio = recognizer.record(source)
+    if isinstance(audio, np.ndarray):
+        audio = sr.AudioData(to_pcm16(audio), sample_rate, 2)
+    else:
+        with sr.AudioFile(audio) as source:
+            audio = recognizer.record(source)
 
-        try:
-            text = recognizer.recognize_google(audio, language="en-US")
-            print("Transcrição: " + text)
+    try:
+        with TRANSCRIPTION_SECONDS.time(engine="google"):
+            text = recognizer.recognize_google(audio, language=language)
+        print("Transcrição: " + text)
 
-            with open(text_output_path, 'w', encoding='utf-8') as file:
-                file.write(text)
+        with open(text_output_path, 'w', encoding='utf-8') as file:
+            file.write(text)
 
-            return text
+        return text
 
-        except sr.UnknownValueError:
-            print("Google Speech Recognition não conseguiu entender o áudio")
-            return ""
-        except sr.RequestError as e:
-            print(
-                "Erro ao solicitar resultados do serviço de reconhecimento de fala do Google; {0}".format(e))
-            return ""
+    except sr.UnknownValueError:
+        print("Google Speech Recognition não conseguiu entender o áudio")
+        return ""
+    except sr.RequestError as e:
+        print(
+            "Erro ao solicitar resultados do serviço de reconhecimento de fala do Google; {0}".format(e))
+        return ""
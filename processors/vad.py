@@ -0,0 +1,50 @@
+"""
+Detecção de atividade de voz (VAD) por energia, vetorizada em NumPy.
+
+Leve o bastante para rodar antes de qualquer modelo: o áudio é dividido em
+quadros de 30 ms e um quadro é considerado voz quando sua energia supera o
+piso de ruído estimado da gravação (ou um limiar absoluto mínimo).
+"""
+import numpy as np
+
+SAMPLE_RATE = 16000
+QUADRO_SEGUNDOS = 0.03
+LIMIAR_MINIMO_RMS = 0.01
+FATOR_RUIDO = 3.0
+
+
+def detect_voiced_regions(audio, sample_rate=SAMPLE_RATE, min_speech=0.2, min_silence=0.3, padding=0.2):
+    """
+    Retorna as regiões com voz como lista de (inicio, fim) em segundos.
+
+    - **min_speech**: regiões menores são descartadas.
+    - **min_silence**: pausas menores unem regiões vizinhas.
+    - **padding**: margem adicionada a cada região (não corta início/fim das palavras).
+    """
+    quadro = int(QUADRO_SEGUNDOS * sample_rate)
+    n_quadros = len(audio) // quadro
+    if n_quadros == 0:
+        return []
+
+    quadros = np.asarray(audio[:n_quadros * quadro], dtype=np.float32).reshape(n_quadros, quadro)
+    rms = np.sqrt(np.mean(np.square(quadros, dtype=np.float64), axis=1))
+    piso_ruido = np.percentile(rms, 10)
+    ativos = rms > max(LIMIAR_MINIMO_RMS, piso_ruido * FATOR_RUIDO)
+    if not ativos.any():
+        return []
+
+    # Bordas das sequências de quadros ativos
+    bordas = np.diff(np.concatenate(([0], ativos.astype(np.int8), [0])))
+    inicios = np.flatnonzero(bordas == 1) * QUADRO_SEGUNDOS
+    fins = np.flatnonzero(bordas == -1) * QUADRO_SEGUNDOS
+
+    duracao_total = len(audio) / sample_rate
+    regioes = []
+    for inicio, fim in zip(inicios, fins):
+        inicio, fim = max(0.0, inicio - padding), min(duracao_total, fim + padding)
+        if regioes and inicio - regioes[-1][1] < min_silence:
+            regioes[-1] = (regioes[-1][0], fim)
+        else:
+            regioes.append((inicio, fim))
+
+    return [(round(float(i), 3), round(float(f), 3)) for i, f in regioes if f - i >= min_speech]
@@ -0,0 +1,200 @@
+"""
+Backends de inferência em CPU para os modelos do pipeline.
+
+- **pytorch**: execução padrão (ultralytics / transformers em modo eager).
+- **onnx**: modelo exportado para ONNX e executado pelo ONNX Runtime.
+- **int8**: o ONNX exportado com quantização dinâmica INT8 dos pesos.
+
+A exportação é feita uma única vez e reaproveitada a partir de
+`MODEL_EXPORT_DIR`. Cada artefato é gerado em um caminho temporário e
+renomeado ao final, sob um lock de arquivo: processos que sobem juntos (ex.:
+workers do batch_runner) não exportam em paralelo nem leem um ONNX parcial.
+Para exportar antecipadamente (ex.: no build da imagem):
+
+    python -m singletons.backends
+"""
+import os
+import re
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+BACKEND_PYTORCH = "pytorch"
+BACKEND_ONNX = "onnx"
+BACKEND_INT8 = "int8"
+BACKENDS = (BACKEND_PYTORCH, BACKEND_ONNX, BACKEND_INT8)
+
+_HF_ORT_CLASSES = {
+    "text-classification": "ORTModelForSequenceClassification",
+    "audio-classification": "ORTModelForAudioClassification",
+}
+
+
+def validar_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend '{backend}' inválido. Opções: {', '.join(BACKENDS)}")
+    return backend
+
+
+def _slug(model_id):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "--", model_id)
+
+
+@contextmanager
+def _lock_exportacao(lock_path):
+    """Serializa a exportação de um modelo entre processos."""
+    lock_path = Path(lock_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as f:
+        try:
+            import fcntl
+        except ImportError:
+            # Sem fcntl (Windows) não há lock, mas a renomeação atômica evita artefatos parciais
+            yield
+            return
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _tmp(path):
+    return path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+
+def _publicar_dir(tmp_dir, destino):
+    """Substitui `destino` pelo diretório temporário (restos de exportações antigas são removidos)."""
+    if destino.exists():
+        shutil.rmtree(destino)
+    os.replace(tmp_dir, destino)
+
+
+def _quantizar_onnx(origem, destino):
+    """Quantização dinâmica INT8 (pesos) preservando os metadados do modelo."""
+    import onnx
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(origem), str(destino), weight_type=QuantType.QUInt8)
+
+    # O ultralytics lê task, kpt_shape e imgsz dos metadados do ONNX
+    original = onnx.load(str(origem), load_external_data=False)
+    quantizado = onnx.load(str(destino))
+    del quantizado.metadata_props[:]
+    quantizado.metadata_props.extend(original.metadata_props)
+    onnx.save(quantizado, str(destino))
+
+
+# --- Pose (YOLOv8) ---
+def export_pose_model(model_name, backend, export_dir):
+    """Exporta o modelo de pose para o backend pedido e retorna o caminho do arquivo."""
+    validar_backend(backend)
+    if backend == BACKEND_PYTORCH:
+        return Path(model_name)
+
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(model_name).stem
+    onnx_path = export_dir / f"{stem}.onnx"
+    int8_path = export_dir / f"{stem}.int8.onnx"
+
+    with _lock_exportacao(export_dir / f"{stem}.lock"):
+        if not onnx_path.exists():
+            from ultralytics import YOLO
+            print(f"📦 Exportando {model_name} para ONNX...")
+            # dynamic=True permite lotes de tamanho variável (INFERENCE_BATCH_SIZE)
+            exportado = YOLO(model_name).export(format="onnx", dynamic=True, simplify=True)
+            shutil.move(str(exportado), str(_tmp(onnx_path)))
+            os.replace(_tmp(onnx_path), onnx_path)
+
+        if backend == BACKEND_ONNX:
+            return onnx_path
+
+        if not int8_path.exists():
+            print(f"📦 Quantizando {onnx_path.name} para INT8...")
+            tmp_path = int8_path.with_name(f"{stem}.int8.{os.getpid()}.tmp.onnx")
+            _quantizar_onnx(onnx_path, tmp_path)
+            os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+def load_pose_model(model_name, backend, export_dir):
+    from ultralytics import YOLO
+    path = export_pose_model(model_name, backend, export_dir)
+    # O ultralytics executa arquivos .onnx com o ONNX Runtime, com a mesma API de resultados
+    return YOLO(str(path), task="pose")
+
+
+# --- Classificadores Hugging Face (DistilBERT / Wav2Vec2) ---
+def export_hf_model(task, model_id, backend, export_dir):
+    """Exporta um modelo do Hugging Face via optimum e retorna o diretório exportado."""
+    validar_backend(backend)
+    if backend == BACKEND_PYTORCH:
+        return None
+
+    import optimum.onnxruntime as ort
+
+    ort_class = getattr(ort, _HF_ORT_CLASSES[task])
+    base_dir = Path(export_dir) / _slug(model_id)
+    onnx_dir = base_dir / "onnx"
+    int8_dir = base_dir / "int8"
+    base_dir.mkdir(parents=True, exist_ok=True)
+
+    with _lock_exportacao(base_dir / "export.lock"):
+        if not (onnx_dir / "model.onnx").exists():
+            print(f"📦 Exportando {model_id} para ONNX...")
+            ort_class.from_pretrained(model_id, export=True).save_pretrained(_tmp(onnx_dir))
+            _publicar_dir(_tmp(onnx_dir), onnx_dir)
+
+        if backend == BACKEND_ONNX:
+            return onnx_dir
+
+        if not (int8_dir / "model_quantized.onnx").exists():
+            print(f"📦 Quantizando {model_id} para INT8...")
+            quantizer = ort.ORTQuantizer.from_pretrained(onnx_dir)
+            qconfig = ort.AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=_tmp(int8_dir), quantization_config=qconfig)
+            _publicar_dir(_tmp(int8_dir), int8_dir)
+    return int8_dir
+
+
+def load_hf_pipeline(task, model_id, backend, export_dir):
+    """Pipeline do transformers com o mesmo formato de saída em qualquer backend."""
+    from transformers import pipeline
+
+    model_dir = export_hf_model(task, model_id, backend, export_dir)
+    if model_dir is None:
+        return pipeline(task, model=model_id)
+
+    import optimum.onnxruntime as ort
+    from transformers import AutoFeatureExtractor, AutoTokenizer
+
+    ort_class = getattr(ort, _HF_ORT_CLASSES[task])
+    file_name = "model_quantized.onnx" if backend == BACKEND_INT8 else "model.onnx"
+    model = ort_class.from_pretrained(model_dir, file_name=file_name)
+
+    # Tokenizer / feature extractor continuam os do modelo original
+    if task == "text-classification":
+        return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_id))
+    return pipeline(task, model=model, feature_extractor=AutoFeatureExtractor.from_pretrained(model_id))
+
+
+def export_models(config):
+    """Etapa única de exportação para os backends configurados em `PipelineConfig`."""
+    from singletons.singletons import TEXT_ANALYSIS_MODEL_ID, AUDIO_ANALYSIS_MODEL_ID
+
+    exportados = {
+        "pose": export_pose_model(config.pose_model, config.pose_backend, config.model_export_dir),
+        "text_analysis": export_hf_model(
+            "text-classification", TEXT_ANALYSIS_MODEL_ID, config.text_backend, config.model_export_dir),
+        "audio_analysis": export_hf_model(
+            "audio-classification", AUDIO_ANALYSIS_MODEL_ID, config.audio_backend, config.model_export_dir),
+    }
+    return {nome: str(path) if path else None for nome, path in exportados.items()}
+
+
+if __name__ == "__main__":
+    from config.pipeline_config import PipelineConfig
+
+    for nome, path in export_models(PipelineConfig()).items():
+        print(f"✅ {nome}: {path or 'pytorch (sem exportação)'}")
@@ -0,0 +1,87 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Agrupa chamadas concorrentes de um modelo em um único forward pass.
+
+    Cada chamada entra em uma fila; uma thread dedicada coleta até
+    `max_batch_size` entradas ou espera no máximo `max_wait_ms` desde a
+    primeira, executa `batch_fn(lista_de_entradas)` e devolve a cada chamador
+    o resultado correspondente (mesma ordem da lista). Se o lote falhar, as
+    entradas são repetidas uma a uma: apenas a entrada problemática falha.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=8, max_wait_ms=10, name="micro-batcher", on_batch=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item):
+        return self.submit(item).result()
+
+    def _coletar(self):
+        lote = [self._queue.get()]
+        prazo = time.monotonic() + self.max_wait
+        while len(lote) < self.max_batch_size:
+            restante = prazo - time.monotonic()
+            try:
+                lote.append(self._queue.get(timeout=restante) if restante > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _executar(self, entradas):
+        saidas = list(self.batch_fn(entradas))
+        if len(saidas) != len(entradas):
+            # Sem a correspondência 1:1 os chamadores ficariam esperando para sempre
+            raise RuntimeError(
+                f"batch_fn retornou {len(saidas)} resultado(s) para {len(entradas)} entrada(s)")
+        return saidas
+
+    def _notificar(self, tamanho):
+        if self.on_batch:
+            # Uma falha na instrumentação não invalida um lote já processado
+            try:
+                self.on_batch(tamanho)
+            except Exception as e:
+                print(f"⚠️ on_batch falhou: {e}")
+
+    def _loop(self):
+        while True:
+            lote = self._coletar()
+            try:
+                saidas = self._executar([item for item, _ in lote])
+            except Exception as e:
+                if len(lote) == 1:
+                    lote[0][1].set_exception(e)
+                else:
+                    # Uma entrada inválida não derruba as demais: repete uma a uma
+                    self._individualmente(lote)
+                continue
+
+            for (_, future), saida in zip(lote, saidas):
+                future.set_result(saida)
+            self._notificar(len(lote))
+
+    def _individualmente(self, lote):
+        for item, future in lote:
+            try:
+                saida, = self._executar([item])
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            future.set_result(saida)
+            self._notificar(1)
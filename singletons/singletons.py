@@ -1,20 +1,124 @@
-import whisper
+import os
+import time
 from functools import lru_cache
-from transformers import pipeline
+from config.pipeline_config import PipelineConfig
+from singletons.batching import MicroBatcher
+
+# Os imports de whisper/transformers/ultralytics são feitos dentro das funções:
+# importar este módulo é barato e o custo só é pago por quem carrega o modelo.
+
+TEXT_ANALYSIS_MODEL_ID = "bhadresh-savani/distilbert-base-uncased-emotion"
+AUDIO_ANALYSIS_MODEL_ID = "ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition"
+
+# Backends de inferência (pytorch, onnx, int8) definidos por POSE/TEXT/AUDIO_BACKEND
+config = PipelineConfig()
 
 
 @lru_cache(maxsize=1)
 def get_whisper_model(model_name: str):
+    import whisper
     return whisper.load_model(model_name)
 
 
-@lru_cache(maxsize=1)
-def get_text_analysis_model():
+@lru_cache(maxsize=2)
+def get_pose_model(model_name: str = "yolov8n-pose.pt", backend: str = None):
+    """Modelo YOLOv8-Pose carregado uma única vez por processo"""
+    from singletons.backends import load_pose_model
+    return load_pose_model(model_name, backend or config.pose_backend, config.model_export_dir)
+
+
+@lru_cache(maxsize=2)
+def get_text_analysis_model(backend: str = None):
     """Modelo DistilBERT para classificação de emoções em texto"""
-    return pipeline("text-classification", model="bhadresh-savani/distilbert-base-uncased-emotion")
+    from singletons.backends import load_hf_pipeline
+    return load_hf_pipeline(
+        "text-classification", TEXT_ANALYSIS_MODEL_ID,
+        backend or config.text_backend, config.model_export_dir)
 
 
-@lru_cache(maxsize=1)
-def get_audio_analysis_model():
+@lru_cache(maxsize=2)
+def get_audio_analysis_model(backend: str = None):
     """Modelo Wav2Vec2 para análise acústica de emoções no som"""
-    return pipeline("audio-classification", model="ehcalabres/wav2vec2-lg-xlsr-en-speech-emotion-recognition")
+    from singletons.backends import load_hf_pipeline
+    return load_hf_pipeline(
+        "audio-classification", AUDIO_ANALYSIS_MODEL_ID,
+        backend or config.audio_backend, config.model_export_dir)
+
+
+def _registrar_lote(modalidade):
+    from monitoring.metrics import EMOTION_BATCH_SIZE
+    return lambda tamanho: EMOTION_BATCH_SIZE.observe(tamanho, modality=modalidade)
+
+
+@lru_cache(maxsize=1)
+def get_text_analysis_batcher():
+    """
+    Micro-batching do classificador de texto. Cada chamada retorna o mesmo
+    formato de `get_text_analysis_model()(texto)`.
+    """
+    def classificar(textos):
+        # Transcrições longas passam do limite de 512 tokens do DistilBERT
+        saidas = get_text_analysis_model()(textos, batch_size=len(textos), truncation=True)
+        return [[saida] for saida in saidas]
+
+    return MicroBatcher(
+        classificar,
+        max_batch_size=int(os.getenv("EMOTION_BATCH_MAX_SIZE", "8")),
+        max_wait_ms=float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "10")),
+        name="text-emotion-batcher",
+        on_batch=_registrar_lote("text"))
+
+
+@lru_cache(maxsize=1)
+def get_audio_analysis_batcher():
+    """
+    Micro-batching do classificador de áudio. Cada chamada retorna o mesmo
+    formato de `get_audio_analysis_model()(audio)`.
+    """
+    def classificar(audios):
+        return get_audio_analysis_model()(audios, batch_size=len(audios))
+
+    return MicroBatcher(
+        classificar,
+        max_batch_size=int(os.getenv("EMOTION_BATCH_MAX_SIZE", "8")),
+        max_wait_ms=float(os.getenv("EMOTION_BATCH_MAX_WAIT_MS", "10")),
+        name="audio-emotion-batcher",
+        on_batch=_registrar_lote("audio"))
+
+
+def model_versions():
+    """Identificadores dos modelos usados no pipeline (compõem a chave do cache de resultados)."""
+    return {
+        "text_analysis": TEXT_ANALYSIS_MODEL_ID,
+        "audio_analysis": AUDIO_ANALYSIS_MODEL_ID,
+    }
+
+
+def warmup_models(pose_model_name: str = "yolov8n-pose.pt"):
+    """
+    Carrega os modelos usados pelo pipeline e executa uma inferência mínima em
+    cada um (inicializa kernels e alocações). Retorna a duração de cada carga (s).
+    """
+    import numpy as np
+
+    duracoes = {}
+
+    inicio = time.perf_counter()
+    get_pose_model(pose_model_name)(np.zeros((320, 320, 3), dtype=np.uint8), verbose=False)
+    duracoes["pose"] = round(time.perf_counter() - inicio, 3)
+
+    inicio = time.perf_counter()
+    get_text_analysis_model()("warm up")
+    duracoes["text_analysis"] = round(time.perf_counter() - inicio, 3)
+
+    inicio = time.perf_counter()
+    get_audio_analysis_model()(np.zeros(16000, dtype=np.float32))
+    duracoes["audio_analysis"] = round(time.perf_counter() - inicio, 3)
+
+    if config.transcription_engine == "whisper":
+        inicio = time.perf_counter()
+        get_whisper_model(config.whisper_model).transcribe(
+            np.zeros(16000, dtype=np.float32), language="en", fp16=False)
+        duracoes["whisper"] = round(time.perf_counter() - inicio, 3)
+
+    return duracoes
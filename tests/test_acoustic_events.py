@@ -0,0 +1,56 @@
+import json
+import numpy as np
+from processors.acoustic_events import (
+    EVENTO_EMERGENCIA, EVENTO_IMPACTO, MAX_EVENTOS_RESUMO, detect_acoustic_events, summarize_events,
+)
+
+
+def _eventos(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "type": EVENTO_IMPACTO if i % 3 else EVENTO_EMERGENCIA,
+        "start": round(i * 1.5, 3),
+        "end": round(i * 1.5 + 0.2, 3),
+        "peak_rms": round(float(rng.uniform(0.05, 1.0)), 4),
+        "peak_duration": 0.1,
+    } for i in range(n)]
+
+
+def test_resumo_tem_tamanho_limitado():
+    # Uma hora de áudio com rajadas: milhares de eventos
+    eventos = _eventos(2400)
+
+    resumo = summarize_events(eventos)
+
+    assert resumo["count"] == 2400
+    assert resumo["count_by_type"] == {EVENTO_EMERGENCIA: 800, EVENTO_IMPACTO: 1600}
+    assert resumo["first_start"] == eventos[0]["start"]
+    assert resumo["last_end"] == eventos[-1]["end"]
+    assert len(resumo["top_events"]) == MAX_EVENTOS_RESUMO
+    assert len(json.dumps(resumo)) < 4096 < len(json.dumps(eventos))
+
+
+def test_resumo_mantem_os_maiores_picos_em_ordem_cronologica():
+    eventos = _eventos(50, seed=1)
+
+    top = summarize_events(eventos, top_n=5)["top_events"]
+
+    esperados = sorted(eventos, key=lambda e: e["peak_rms"], reverse=True)[:5]
+    assert sorted(e["peak_rms"] for e in top) == sorted(e["peak_rms"] for e in esperados)
+    assert [e["start"] for e in top] == sorted(e["start"] for e in top)
+
+
+def test_resumo_sem_eventos():
+    assert summarize_events([]) == {
+        "count": 0, "count_by_type": {}, "first_start": None, "last_end": None, "top_events": []}
+
+
+def test_resumo_de_eventos_detectados():
+    audio = np.zeros(16000 * 3, dtype=np.float32)
+    audio[16000:16000 + 1600] = 0.5  # 0.1 s: impacto
+    audio[32000:32000 + 16000] = 0.5  # 1 s: emergência sustentada
+
+    resumo = summarize_events(detect_acoustic_events(audio))
+
+    assert resumo["count_by_type"] == {EVENTO_IMPACTO: 1, EVENTO_EMERGENCIA: 1}
+    assert resumo["first_start"] < 1.1 and resumo["last_end"] > 2.9
@@ -0,0 +1,59 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+from aws_client.alert_cooldown import AlertCooldown
+from processors.fall_detection import alert_with_cooldown
+
+
+class BackendForaDoAr:
+    def try_acquire(self, key, cooldown, now):
+        raise RuntimeError("ProvisionedThroughputExceededException")
+
+
+class BackendOcupado:
+    """Outro worker já enviou o alerta de todos os eventos."""
+
+    def try_acquire(self, key, cooldown, now):
+        return False
+
+
+class FakeClient:
+    def __init__(self):
+        self.alertas = []
+
+    def send_alert(self, alert_type, message, metadata=None):
+        self.alertas.append(metadata)
+
+
+def test_cooldown_por_paciente_e_tipo():
+    cooldown = AlertCooldown(cooldown=60)
+
+    assert cooldown.try_acquire("101", "FALL", now=0) == (True, 0.0)
+    assert cooldown.try_acquire("101", "FALL", now=10) == (False, 50)
+    assert cooldown.try_acquire("102", "FALL", now=10)[0]
+    assert cooldown.try_acquire("101", "DISTRESS", now=10)[0]
+    assert cooldown.try_acquire("101", "FALL", now=61)[0]
+
+
+def test_backend_recusa_suprime_o_alerta():
+    cooldown = AlertCooldown(cooldown=60, backend=BackendOcupado())
+
+    assert cooldown.try_acquire("101", "FALL", now=0) == (False, 60)
+
+
+def test_falha_do_backend_libera_o_alerta_pelo_registro_local():
+    cooldown = AlertCooldown(cooldown=60, backend=BackendForaDoAr())
+
+    assert cooldown.try_acquire("101", "FALL", now=0) == (True, 0.0)
+    # O registro local continua valendo enquanto o backend está fora do ar
+    assert cooldown.try_acquire("101", "FALL", now=10)[0] is False
+
+
+def test_alert_with_cooldown_envia_com_backend_fora_do_ar():
+    client = FakeClient()
+    cooldown = AlertCooldown(cooldown=60, backend=BackendForaDoAr())
+
+    assert alert_with_cooldown(client, patient_id="101", cooldown=cooldown)
+    assert not alert_with_cooldown(client, patient_id="101", cooldown=cooldown)
+    assert [m["patient_id"] for m in client.alertas] == ["101"]
@@ -0,0 +1,201 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("boto3")
+
+from aws_client.alert_outbox import AlertOutbox
+
+TIMEOUT = 5
+
+
+class BatchRequestTooLong(Exception):
+    response = {"Error": {"Code": "AWS.SimpleQueueService.BatchRequestTooLong"}}
+
+
+class FakeSQS:
+    """Imita `SQSClient.send_alert_batch`; `falhas` mapeia a chave do alerta para o tipo de falha."""
+
+    def __init__(self, falhas=None, max_entradas=None):
+        self.falhas = dict(falhas or {})
+        self.max_entradas = max_entradas
+        self.chamadas = []
+        self.entregues = []
+        self._lock = threading.Lock()
+
+    def send_alert_batch(self, payloads):
+        with self._lock:
+            self.chamadas.append([p["idempotency_key"] for p in payloads])
+            if self.max_entradas and len(payloads) > self.max_entradas:
+                raise BatchRequestTooLong("lote grande demais")
+
+            response = {"Successful": [], "Failed": []}
+            for payload in payloads:
+                key = payload["idempotency_key"]
+                falha = self.falhas.get(key)
+                if falha == "transitoria":
+                    # Falha apenas uma vez
+                    del self.falhas[key]
+                    response["Failed"].append({"Id": key, "SenderFault": False, "Message": "throttled"})
+                elif falha == "sender":
+                    response["Failed"].append({"Id": key, "SenderFault": True, "Message": "inválido"})
+                else:
+                    self.entregues.append(key)
+                    response["Successful"].append({"Id": key})
+            return response
+
+
+def _outbox(sqs, **kwargs):
+    kwargs.setdefault("linger_ms", 20)
+    kwargs.setdefault("base_backoff", 0.01)
+    return AlertOutbox(sqs, **kwargs)
+
+
+def test_entrega_em_lotes_de_ate_10():
+    sqs = FakeSQS()
+    outbox = _outbox(sqs, linger_ms=200)
+
+    keys = [outbox.enqueue("FALL", f"alerta {i}") for i in range(23)]
+
+    assert outbox.flush(TIMEOUT)
+    assert sorted(sqs.entregues) == sorted(keys)
+    assert all(len(chamada) <= 10 for chamada in sqs.chamadas)
+    outbox.close()
+
+
+def test_falha_parcial_reenvia_apenas_os_que_falharam():
+    sqs = FakeSQS(falhas={"b": "transitoria"})
+    outbox = _outbox(sqs)
+
+    for key in ("a", "b", "c"):
+        outbox.enqueue("FALL", key, idempotency_key=key)
+
+    assert outbox.flush(TIMEOUT)
+    assert sorted(sqs.entregues) == ["a", "b", "c"]
+    # "a" e "c" não são reenviados após a falha de "b"
+    assert sum(chamada.count("a") for chamada in sqs.chamadas) == 1
+    assert sum(chamada.count("b") for chamada in sqs.chamadas) == 2
+    outbox.close()
+
+
+def test_sender_fault_vai_para_dead_letters_sem_bloquear_a_fila(tmp_path):
+    persist_path = tmp_path / "outbox.jsonl"
+    sqs = FakeSQS(falhas={"ruim": "sender"})
+    outbox = _outbox(sqs, persist_path=str(persist_path))
+
+    outbox.enqueue("FALL", "ruim", idempotency_key="ruim")
+    outbox.enqueue("FALL", "bom", idempotency_key="bom")
+
+    assert outbox.flush(TIMEOUT)
+    assert sqs.entregues == ["bom"]
+    assert [d["payload"]["idempotency_key"] for d in outbox.dead_letters] == ["ruim"]
+    outbox.close()
+
+    # Dead letters sobrevivem ao reinício e não são reenviados
+    sqs_novo = FakeSQS()
+    reiniciado = _outbox(sqs_novo, persist_path=str(persist_path))
+    assert [d["payload"]["idempotency_key"] for d in reiniciado.dead_letters] == ["ruim"]
+    assert reiniciado.pending() == 0
+    reiniciado.close()
+    assert sqs_novo.chamadas == []
+
+
+def test_reinicio_reenvia_alertas_pendentes(tmp_path):
+    persist_path = str(tmp_path / "outbox.jsonl")
+
+    class SQSForaDoAr:
+        def send_alert_batch(self, payloads):
+            raise ConnectionError("sem rede")
+
+    outbox = _outbox(SQSForaDoAr(), persist_path=persist_path, base_backoff=10)
+    keys = [outbox.enqueue("FALL", f"alerta {i}") for i in range(3)]
+    outbox.close(timeout=0.1)
+    assert outbox.pending() == 3
+
+    sqs = FakeSQS()
+    reiniciado = _outbox(sqs, persist_path=persist_path)
+
+    assert reiniciado.flush(TIMEOUT)
+    assert sorted(sqs.entregues) == sorted(keys)
+    reiniciado.close()
+
+    # Após a entrega, um novo reinício não reenvia nada
+    terceiro = _outbox(FakeSQS(), persist_path=persist_path)
+    assert terceiro.pending() == 0
+    terceiro.close()
+
+
+def test_lote_grande_demais_e_dividido():
+    sqs = FakeSQS(max_entradas=2)
+    outbox = _outbox(sqs, linger_ms=200)
+
+    keys = [outbox.enqueue("FALL", f"alerta {i}") for i in range(7)]
+
+    assert outbox.flush(TIMEOUT)
+    assert sorted(sqs.entregues) == sorted(keys)
+    assert outbox.dead_letters == []
+    outbox.close()
+
+
+def test_mensagem_acima_do_limite_vai_para_dead_letters():
+    sqs = FakeSQS()
+    outbox = _outbox(sqs)
+
+    grande = outbox.enqueue("FALL", "x" * 300 * 1024)
+    pequeno = outbox.enqueue("FALL", "ok")
+
+    assert outbox.flush(TIMEOUT)
+    assert sqs.entregues == [pequeno]
+    assert [d["payload"]["idempotency_key"] for d in outbox.dead_letters] == [grande]
+    outbox.close()
+
+
+def test_enqueue_idempotente():
+    sqs = FakeSQS()
+    outbox = _outbox(sqs, linger_ms=500)
+
+    outbox.enqueue("FALL", "a", idempotency_key="mesma")
+    outbox.enqueue("FALL", "a", idempotency_key="mesma")
+
+    assert outbox.flush(TIMEOUT)
+    assert sqs.entregues == ["mesma"]
+    outbox.close()
+
+
+def test_backoff_nao_e_interrompido_por_novos_alertas():
+    chamadas = []
+
+    class SQSForaDoAr:
+        def send_alert_batch(self, payloads):
+            chamadas.append(len(payloads))
+            raise ConnectionError("sem rede")
+
+    outbox = _outbox(SQSForaDoAr(), base_backoff=2)
+    outbox.enqueue("FALL", "primeiro")
+    for i in range(20):
+        time.sleep(0.02)
+        outbox.enqueue("FALL", f"alerta {i}")
+
+    # Uma tentativa e o backoff de 1-2 s em andamento, apesar dos 20 alertas novos
+    assert len(chamadas) == 1
+    outbox.close(timeout=0.1)
+
+
+def test_url_da_fila_resolvida_na_thread_de_envio():
+    tentativas = []
+    sqs = FakeSQS()
+
+    def criar_cliente():
+        tentativas.append(threading.current_thread().name)
+        if len(tentativas) < 3:
+            raise ConnectionError("get_queue_url falhou")
+        return sqs
+
+    outbox = _outbox(criar_cliente)
+    # O enqueue não resolve a fila nem propaga a falha
+    key = outbox.enqueue("FALL", "queda")
+
+    assert outbox.flush(TIMEOUT)
+    assert sqs.entregues == [key]
+    assert tentativas == ["alert-outbox"] * 3
+    outbox.close()
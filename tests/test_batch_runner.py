@@ -0,0 +1,37 @@
+import sys
+import types
+import pytest
+
+pytest.importorskip("boto3")
+
+import aws_client.alert_outbox as alert_outbox
+from orchestrator import batch_runner
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    # O orquestrador real carrega os modelos; aqui só o resultado importa
+    orquestrador = types.ModuleType("orchestrator.cloud_orchestrator")
+    orquestrador.process_patient_video = lambda video_key, **kwargs: {"status": "alert_sent"}
+    monkeypatch.setitem(sys.modules, "orchestrator.cloud_orchestrator", orquestrador)
+    monkeypatch.setattr(batch_runner, "_opcoes_worker", {
+        "use_s3": False, "use_localstack": False, "send_alerts": True, "warmup": False})
+
+
+def test_alertas_entregues_concluem_o_video(worker, monkeypatch):
+    monkeypatch.setattr(alert_outbox, "flush_all_outboxes", lambda: True)
+
+    registro = batch_runner._processar({"video_key": "quarto-101.mp4"})
+
+    assert registro["status"] == "done"
+
+
+def test_alertas_pendentes_marcam_o_video_como_falho(worker, monkeypatch):
+    monkeypatch.setattr(alert_outbox, "flush_all_outboxes", lambda: False)
+
+    registro = batch_runner._processar({"video_key": "quarto-101.mp4"})
+
+    # Falhas não entram no checkpoint: o vídeo é refeito na próxima execução
+    assert registro["status"] == "failed"
+    assert "SQS" in registro["error"]
+    assert registro["result"] == {"status": "alert_sent"}
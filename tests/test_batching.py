@@ -0,0 +1,106 @@
+import threading
+import pytest
+from singletons.batching import MicroBatcher
+
+TIMEOUT = 5
+
+
+def test_resultados_na_ordem_das_entradas():
+    lotes = []
+
+    def dobrar(entradas):
+        lotes.append(list(entradas))
+        return [x * 2 for x in entradas]
+
+    batcher = MicroBatcher(dobrar, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(10)]
+
+    assert [f.result(timeout=TIMEOUT) for f in futures] == [i * 2 for i in range(10)]
+    assert all(len(lote) <= 4 for lote in lotes)
+    assert sorted(x for lote in lotes for x in lote) == list(range(10))
+
+
+def test_chamadas_concorrentes_sao_agrupadas():
+    tamanhos = []
+    liberar = threading.Event()
+
+    def identidade(entradas):
+        liberar.wait(TIMEOUT)
+        tamanhos.append(len(entradas))
+        return list(entradas)
+
+    batcher = MicroBatcher(identidade, max_batch_size=8, max_wait_ms=200)
+    futures = [batcher.submit(i) for i in range(8)]
+    liberar.set()
+
+    assert [f.result(timeout=TIMEOUT) for f in futures] == list(range(8))
+    assert tamanhos == [8]
+
+
+def test_excecao_do_batch_fn_falha_apenas_a_entrada_invalida():
+    lotes = []
+
+    def classificar(entradas):
+        lotes.append(list(entradas))
+        if any(x < 0 for x in entradas):
+            raise ValueError("entrada inválida")
+        return [x * 10 for x in entradas]
+
+    liberar = threading.Event()
+    batcher = MicroBatcher(lambda entradas: liberar.wait(TIMEOUT) and classificar(entradas),
+                           max_batch_size=4, max_wait_ms=200)
+    futures = [batcher.submit(x) for x in (1, -1, 2)]
+    liberar.set()
+
+    assert futures[0].result(timeout=TIMEOUT) == 10
+    with pytest.raises(ValueError, match="entrada inválida"):
+        futures[1].result(timeout=TIMEOUT)
+    assert futures[2].result(timeout=TIMEOUT) == 20
+    assert lotes == [[1, -1, 2], [1], [-1], [2]]
+
+
+def test_excecao_em_todas_as_entradas_falha_todos_os_futures():
+    def falhar(entradas):
+        raise ValueError("modelo indisponível")
+
+    batcher = MicroBatcher(falhar, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="modelo indisponível"):
+            future.result(timeout=TIMEOUT)
+
+
+def test_saidas_a_menos_falham_todos_os_futures():
+    batcher = MicroBatcher(lambda entradas: entradas[:-1], max_batch_size=4, max_wait_ms=100)
+    futures = [batcher.submit(i) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="0 resultado"):
+            future.result(timeout=TIMEOUT)
+
+
+def test_worker_continua_apos_lote_com_erro():
+    chamadas = []
+
+    def falhar_primeiro(entradas):
+        chamadas.append(entradas)
+        if len(chamadas) == 1:
+            raise ValueError("falha transitória")
+        return list(entradas)
+
+    batcher = MicroBatcher(falhar_primeiro, max_batch_size=1)
+
+    with pytest.raises(ValueError):
+        batcher(1)
+    assert batcher(2) == 2
+
+
+def test_falha_no_on_batch_nao_afeta_resultados():
+    def on_batch(tamanho):
+        raise RuntimeError("métrica quebrada")
+
+    batcher = MicroBatcher(lambda entradas: [x + 1 for x in entradas], on_batch=on_batch)
+
+    assert batcher(1) == 2
+    assert batcher(2) == 3
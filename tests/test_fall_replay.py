@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("boto3")
+
+from processors.fall_detection import ESTADO_CAIU, FallDetector
+from processors.fall_replay import PARAMETROS, Clip, replay_events, sweep_thresholds, threshold_grid
+from processors.keypoint_log import KeypointLog, KeypointLogWriter, build_records
+
+ALTURA = 480
+
+
+def _pessoa(nariz_y, deitado=False, rng=None):
+    keypoints = np.zeros((17, 2), dtype=np.float32)
+    keypoints[:, 0] = 320
+    keypoints[:, 1] = nariz_y + (rng.normal(0, 5, 17) if rng is not None else 0)
+    keypoints[0, 1] = nariz_y
+    keypoints[5:7, 1] = nariz_y + (10 if deitado else 60)
+    keypoints[11:13, 1] = nariz_y + (20 if deitado else 160)
+    box = np.array([320, nariz_y, 200, 80] if deitado else [320, nariz_y, 80, 200], dtype=np.float32)
+    return keypoints, box
+
+
+def _gravar(path, pessoas, stride=1):
+    indices = np.arange(len(pessoas)) * stride
+    with KeypointLogWriter(path, fps=30, frame_width=640, frame_height=ALTURA, stride=stride) as writer:
+        writer.append(build_records(indices, indices / 30, pessoas))
+    return KeypointLog(path)
+
+
+def _clipe_aleatorio(n_frames, seed):
+    """Trajetórias de subida/descida com frames sem ninguém e com duas pessoas."""
+    rng = np.random.default_rng(seed)
+    pessoas, nariz_y, modo = [], 100.0, 0
+    for _ in range(n_frames):
+        if rng.random() < 0.03:
+            modo = rng.integers(0, 3)
+        if modo == 1:
+            nariz_y = min(460.0, nariz_y + rng.uniform(0, 40))
+        elif modo == 2:
+            nariz_y = max(50.0, nariz_y - rng.uniform(0, 30))
+
+        n = rng.choice([0, 1, 1, 1, 2]) if rng.random() < 0.2 else 1
+        keypoints, box = _pessoa(nariz_y, deitado=rng.random() < 0.3, rng=rng)
+        pessoas.append((np.repeat(keypoints[None], n, 0), np.repeat(box[None], n, 0), np.full(n, 0.9)))
+    return pessoas
+
+
+def _entradas_em_caiu(log, combinacao):
+    """Frames em que `FallDetector.update` entra em CAIU, alimentado pelo mesmo log."""
+    detector = FallDetector(ALTURA, stride=log.header["stride"], **dict(zip(PARAMETROS, combinacao)))
+    entradas, anterior = [], None
+    for i in range(len(log)):
+        n = int(log.n_persons[i])
+        # O log guarda a pessoa principal; as demais só importam pela contagem
+        keypoints = np.repeat(log.keypoints[i][None], n, 0)
+        boxes = np.repeat(log.boxes[i][None], n, 0)
+        estado = detector.update(keypoints, boxes)
+        if estado == ESTADO_CAIU and anterior != ESTADO_CAIU:
+            entradas.append(int(log.frame_idx[i]))
+        anterior = estado
+    return entradas
+
+
+@pytest.mark.parametrize("stride", [1, 3])
+def test_replay_entra_em_caiu_nos_mesmos_frames_que_o_fall_detector(tmp_path, stride):
+    log = _gravar(tmp_path / "clipe.kplog", _clipe_aleatorio(800, seed=stride), stride=stride)
+    clip = Clip(log)
+    combinacoes = threshold_grid(
+        confirm=[2, 5, 8], recover=[10, 60], velocity=[10, 25], low=[0.5, 0.6], horizontal=[0.05, 0.2])
+
+    replay = {c: [] for c in range(len(combinacoes))}
+    for posicao, entrou in replay_events(clip, combinacoes):
+        for c in np.flatnonzero(entrou):
+            replay[c].append(int(clip.frame_idx[posicao]))
+
+    assert sum(len(frames) for frames in replay.values()) > 0
+    for c, combinacao in enumerate(combinacoes):
+        assert replay[c] == _entradas_em_caiu(log, combinacao), dict(zip(PARAMETROS, combinacao))
+
+
+def test_sweep_precision_recall(tmp_path):
+    em_pe = [_pessoa(100) for _ in range(60)]
+    caido = [_pessoa(400, deitado=True) for _ in range(60)]
+
+    def pessoas(sequencia):
+        return [(k[None], b[None], np.array([0.9])) for k, b in sequencia]
+
+    # 0-2 s em pé, 2-4 s caído, 4-6 s em pé e 6-8 s caído sem queda rotulada
+    log = _gravar(tmp_path / "queda.kplog", pessoas(em_pe + caido + em_pe + caido))
+    clip = Clip(log, quedas=[(2.0, 4.0)], tolerancia=0.5)
+    combinacoes = threshold_grid(confirm=[5, 90], recover=[30])
+
+    resultado = sweep_thresholds([clip], combinacoes)
+
+    # confirm=5: detecta a queda rotulada e dá um falso alarme na segunda
+    assert resultado["tp"].tolist() == [1, 0]
+    assert resultado["fp"].tolist() == [1, 0]
+    assert resultado["fn"].tolist() == [0, 1]
+    np.testing.assert_allclose(resultado["precision"], [0.5, 0.0])
+    np.testing.assert_allclose(resultado["recall"], [1.0, 0.0])
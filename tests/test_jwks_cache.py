@@ -0,0 +1,69 @@
+import base64
+import json
+import pytest
+
+pytest.importorskip("jose")
+pytest.importorskip("requests")
+
+from aws_client.jwks_cache import JWKSCache
+
+
+def _chave(kid):
+    segredo = base64.urlsafe_b64encode(f"segredo-{kid}".encode()).decode().rstrip("=")
+    return {"kty": "oct", "kid": kid, "alg": "HS256", "k": segredo}
+
+
+def _gravar_jwks(path, *kids):
+    path.write_text(json.dumps({"keys": [_chave(kid) for kid in kids]}), encoding="utf-8")
+
+
+@pytest.fixture
+def jwks_path(tmp_path):
+    path = tmp_path / "jwks.json"
+    _gravar_jwks(path, "k1")
+    return path
+
+
+def test_carrega_chaves_de_arquivo_file_url(jwks_path):
+    cache = JWKSCache(f"file://{jwks_path}", algorithm="HS256")
+
+    assert cache.get_key("k1") is not None
+    assert cache.get_key("desconhecido") is None
+
+
+def test_kid_desconhecido_forca_refresh(jwks_path):
+    cache = JWKSCache(f"file://{jwks_path}", min_refresh_interval=0, algorithm="HS256")
+    assert cache.get_key("k1") is not None
+
+    # Rotação de chaves: o novo kid aparece no JWKS antes do TTL expirar
+    _gravar_jwks(jwks_path, "k1", "k2")
+
+    assert cache.get_key("k2") is not None
+
+
+def test_refresh_por_kid_respeita_intervalo_minimo(jwks_path):
+    cache = JWKSCache(f"file://{jwks_path}", min_refresh_interval=3600, algorithm="HS256")
+    assert cache.get_key("k1") is not None
+
+    _gravar_jwks(jwks_path, "k1", "k2")
+
+    assert cache.get_key("k2") is None
+
+
+def test_ttl_expirado_recarrega(jwks_path):
+    cache = JWKSCache(str(jwks_path), ttl=0, min_refresh_interval=3600, algorithm="HS256")
+    assert cache.get_key("k1") is not None
+
+    _gravar_jwks(jwks_path, "k2")
+
+    assert cache.get_key("k2") is not None
+    assert cache.get_key("k1") is None
+
+
+def test_falha_no_refresh_mantem_chaves_em_cache(jwks_path):
+    cache = JWKSCache(str(jwks_path), ttl=0, algorithm="HS256")
+    assert cache.get_key("k1") is not None
+
+    jwks_path.write_text("{inválido", encoding="utf-8")
+
+    assert cache.get_key("k1") is not None
@@ -0,0 +1,109 @@
+import os
+import numpy as np
+import pytest
+from processors.keypoint_log import (
+    HEADER_SIZE, RECORD_SIZE, KeypointLog, KeypointLogWriter, build_records, prune_logs, read_header,
+)
+
+
+def _pessoas(n_frames):
+    """Frames alternando entre ninguém, uma e duas pessoas."""
+    pessoas = []
+    for i in range(n_frames):
+        n = i % 3
+        keypoints = np.arange(n * 34, dtype=np.float32).reshape(n, 17, 2) + i
+        boxes = np.tile(np.array([10, 20, 30, 40], dtype=np.float32) + i, (n, 1))
+        confs = np.linspace(0.9, 0.7, n, dtype=np.float32)
+        pessoas.append((keypoints, boxes, confs))
+    return pessoas
+
+
+def test_ida_e_volta(tmp_path):
+    path = tmp_path / "video.kplog"
+    pessoas = _pessoas(6)
+    indices = np.arange(6) * 2
+
+    with KeypointLogWriter(path, fps=30, frame_width=640, frame_height=480, stride=2) as writer:
+        writer.append(build_records(indices[:4], indices[:4] / 30, pessoas[:4]))
+        writer.append(build_records(indices[4:], indices[4:] / 30, pessoas[4:]))
+
+    assert path.stat().st_size == HEADER_SIZE + 6 * RECORD_SIZE
+    log = KeypointLog(path)
+    assert len(log) == 6
+    assert isinstance(log.records, np.memmap)
+    assert log.header["fps"] == 30 and log.header["stride"] == 2
+    assert (log.header["frame_width"], log.header["frame_height"]) == (640, 480)
+
+    np.testing.assert_array_equal(log.frame_idx, indices)
+    np.testing.assert_allclose(log.timestamps, indices / 30, rtol=1e-6)
+    np.testing.assert_array_equal(log.n_persons, [0, 1, 2, 0, 1, 2])
+    assert log.keypoints.shape == (6, 17, 2)
+
+    for i, (keypoints, boxes, confs) in enumerate(pessoas):
+        if len(boxes):
+            # Apenas a pessoa principal (a primeira) é gravada
+            np.testing.assert_array_equal(log.keypoints[i], keypoints[0])
+            np.testing.assert_array_equal(log.boxes[i], boxes[0])
+            assert log.conf[i] == pytest.approx(confs[0])
+        else:
+            assert np.isnan(log.keypoints[i]).all()
+            assert np.isnan(log.conf[i])
+
+
+def test_leitura_durante_a_escrita(tmp_path):
+    path = tmp_path / "stream.kplog"
+    writer = KeypointLogWriter(path, fps=25, frame_width=320, frame_height=240)
+    writer.append(build_records(np.arange(3), np.arange(3) / 25, _pessoas(3)))
+
+    assert len(KeypointLog(path)) == 3
+
+    writer.append(build_records(np.arange(3, 5), np.arange(3, 5) / 25, _pessoas(2)))
+    writer.close()
+    assert len(KeypointLog(path)) == 5
+
+
+def test_append_descarta_registro_parcial(tmp_path):
+    path = tmp_path / "video.kplog"
+    with KeypointLogWriter(path, fps=30, frame_width=640, frame_height=480) as writer:
+        writer.append(build_records(np.arange(2), np.arange(2) / 30, _pessoas(2)))
+    # Escrita interrompida no meio de um registro
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (RECORD_SIZE // 2))
+
+    assert len(KeypointLog(path)) == 2
+
+    with KeypointLogWriter(path, fps=0, frame_width=0, frame_height=0, append=True) as writer:
+        assert writer.header["fps"] == 30
+        writer.append(build_records(np.array([2]), np.array([2 / 30]), _pessoas(1)))
+
+    log = KeypointLog(path)
+    np.testing.assert_array_equal(log.frame_idx, [0, 1, 2])
+
+
+def test_log_vazio(tmp_path):
+    path = tmp_path / "vazio.kplog"
+    KeypointLogWriter(path, fps=30, frame_width=640, frame_height=480).close()
+
+    log = KeypointLog(path)
+    assert len(log) == 0
+    assert log.keypoints.shape == (0, 17, 2)
+
+
+def test_arquivo_invalido(tmp_path):
+    path = tmp_path / "outro.bin"
+    path.write_bytes(b"x" * HEADER_SIZE)
+
+    with pytest.raises(ValueError):
+        read_header(path)
+
+
+def test_prune_logs_remove_os_mais_antigos(tmp_path):
+    for i in range(4):
+        path = tmp_path / f"{i}.kplog"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (i, i))
+
+    removidos = prune_logs(tmp_path, 250, manter=tmp_path / "0.kplog")
+
+    assert removidos == 2
+    assert sorted(p.name for p in tmp_path.glob("*.kplog")) == ["0.kplog", "3.kplog"]
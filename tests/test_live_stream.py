@@ -0,0 +1,172 @@
+import time
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("boto3")
+
+import processors.live_stream as live_stream
+from aws_client.alert_cooldown import AlertCooldown
+from benchmarks.stub_models import StubPoseModel
+from processors.fall_detection import ESTADO_CAIU
+
+
+class FakeClient:
+    def __init__(self):
+        self.alertas = []
+
+    def send_alert(self, alert_type, message, metadata=None):
+        self.alertas.append({"alert_type": alert_type, "message": message, "metadata": metadata})
+
+
+def _video_queda(path, fps=30):
+    """Bloco claro em pé por 1 s e deitado na parte de baixo do quadro por 2 s."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (320, 240))
+    for i in range(3 * fps):
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        if i < fps:
+            frame[40:160, 140:180] = 255
+        else:
+            frame[180:220, 100:220] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def pose_stub(monkeypatch):
+    monkeypatch.setattr(live_stream, "get_pose_model", lambda *args, **kwargs: StubPoseModel())
+
+
+def test_replay_de_arquivo_detecta_queda_e_alerta(tmp_path, pose_stub):
+    video = _video_queda(tmp_path / "queda.avi")
+    client = FakeClient()
+    cooldown = AlertCooldown(cooldown=60)
+    eventos = []
+
+    stats = live_stream.monitor_stream(
+        str(video), client=client, realtime=False, queue_size=1000, batch_size=4,
+        on_event=eventos.append, patient_id="quarto-101", location="Quarto 101", cooldown=cooldown)
+
+    assert stats["frames_captured"] == 90
+    assert stats["frames_dropped"] == 0
+    assert stats["fall_detected"]
+    assert [e["to"] for e in eventos][-1] == ESTADO_CAIU
+    assert len(client.alertas) == 1
+    assert client.alertas[0]["metadata"]["patient_id"] == "quarto-101"
+    assert client.alertas[0]["metadata"]["location"] == "Quarto 101"
+    # O registro de cooldown passado pelo chamador é o usado, mesmo começando vazio
+    assert len(cooldown) == 1
+
+
+def test_fila_cheia_descarta_os_frames_mais_antigos(tmp_path):
+    video = _video_queda(tmp_path / "queda.avi")
+    grabber = live_stream.FrameGrabber(str(video), queue_size=4, realtime=False).start()
+    grabber._thread.join(timeout=10)
+
+    lote = grabber.get_batch(10)
+    grabber.stop()
+
+    assert grabber.frames_captured == 90
+    assert grabber.frames_dropped == 86
+    assert [frame_idx for frame_idx, _, _ in lote] == [86, 87, 88, 89]
+
+
+class CapturaInstavel:
+    """`cv2.VideoCapture` falso: cada conexão entrega `frames_por_conexao` frames e cai."""
+
+    conexoes = 0
+
+    def __init__(self, source, frames_por_conexao=5, falhas_ao_abrir=1):
+        type(self).conexoes += 1
+        self.restantes = frames_por_conexao
+        # A primeira reconexão falha ao abrir
+        self.aberta = type(self).conexoes != 2 or falhas_ao_abrir == 0
+
+    def isOpened(self):
+        return self.aberta
+
+    def get(self, prop):
+        return 30.0
+
+    def read(self):
+        if not self.aberta or self.restantes == 0:
+            return False, None
+        self.restantes -= 1
+        return True, np.zeros((240, 320, 3), dtype=np.uint8)
+
+    def release(self):
+        self.aberta = False
+
+
+def test_fonte_de_rede_reconecta_apos_falha(monkeypatch):
+    CapturaInstavel.conexoes = 0
+    monkeypatch.setattr(live_stream.cv2, "VideoCapture", CapturaInstavel)
+
+    grabber = live_stream.FrameGrabber("rtsp://camera/stream", queue_size=100, base_backoff=0.01).start()
+    prazo = time.monotonic() + 5
+    while grabber.frames_captured < 15 and time.monotonic() < prazo:
+        time.sleep(0.01)
+    grabber.stop()
+
+    assert grabber.frames_captured >= 15
+    assert grabber.reconnects >= 2
+    assert CapturaInstavel.conexoes >= 4  # inclui a tentativa que falhou ao abrir
+
+
+def test_arquivo_e_dispositivo_encerram_na_primeira_falha(tmp_path, monkeypatch):
+    video = _video_queda(tmp_path / "queda.avi")
+    assert not live_stream.is_live_source(str(video))
+    assert not live_stream.is_live_source("0")
+    assert live_stream.is_live_source("rtsp://camera/stream")
+
+    CapturaInstavel.conexoes = 0
+    monkeypatch.setattr(live_stream.cv2, "VideoCapture", CapturaInstavel)
+    grabber = live_stream.FrameGrabber("0", queue_size=100, base_backoff=0.01).start()
+    grabber._thread.join(timeout=5)
+
+    assert grabber.finished
+    assert grabber.frames_captured == 5
+    assert grabber.reconnects == 0
+
+
+def test_limiares_escalados_pelo_stride_efetivo(tmp_path, monkeypatch):
+    video = _video_queda(tmp_path / "queda.avi")
+
+    class PoseLento(StubPoseModel):
+        def __call__(self, frames, **kwargs):
+            time.sleep(0.1)
+            return super().__call__(frames, **kwargs)
+
+    detectores = []
+    original = live_stream.FallDetector
+
+    def registrar(*args, **kwargs):
+        detectores.append(original(*args, **kwargs))
+        return detectores[-1]
+
+    monkeypatch.setattr(live_stream, "get_pose_model", lambda *args, **kwargs: PoseLento())
+    monkeypatch.setattr(live_stream, "FallDetector", registrar)
+
+    # Replay a 30 fps com inferência a ~10 fps: ~2 de cada 3 frames são descartados
+    stats = live_stream.monitor_stream(str(video), realtime=True, queue_size=1)
+
+    assert stats["frames_dropped"] > 0
+    assert stats["effective_stride"] >= 2
+    detector = detectores[0]
+    assert detector.stride == round(stats["effective_stride"])
+    assert detector.frames_para_confirmar < 5
+    assert detector.limiar_velocidade == 25 * detector.stride
+
+
+def test_set_stride_mantem_o_estado():
+    detector = live_stream.FallDetector(frame_height=480)
+    detector.frames_suspeita = 2
+
+    detector.set_stride(3)
+
+    assert (detector.frames_para_confirmar, detector.frames_para_recuperar) == (2, 20)
+    assert detector.limiar_velocidade == 75
+    assert detector.frames_suspeita == 2
+    detector.set_stride(1)
+    assert (detector.frames_para_confirmar, detector.limiar_velocidade) == (5, 25)
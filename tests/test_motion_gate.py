@@ -0,0 +1,90 @@
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("boto3")
+
+import processors.fall_detection as fall_detection
+from benchmarks.stub_models import StubPoseModel
+from processors.fall_detection import MotionGate
+from processors.keypoint_log import KeypointLog
+
+
+def _frame(y0=40, y1=160, ruido=0, rng=None):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    frame[y0:y1, 140:180] = 255
+    if ruido:
+        frame = np.clip(frame.astype(int) + rng.integers(-ruido, ruido + 1, frame.shape), 0, 255).astype(np.uint8)
+    return frame
+
+
+def _video_parado_e_queda(path, fps=30):
+    """3 s em pé parado, queda em 5 frames e 3 s deitado parado."""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (320, 240))
+    for _ in range(3 * fps):
+        writer.write(_frame())
+    for i in range(5):
+        writer.write(_frame(40 + i * 30, 160 + i * 12))
+    for _ in range(3 * fps):
+        frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        frame[180:220, 100:220] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+class PoseContador(StubPoseModel):
+    def __init__(self):
+        self.frames = 0
+
+    def __call__(self, frames, **kwargs):
+        self.frames += len(frames) if isinstance(frames, list) else 1
+        return super().__call__(frames, **kwargs)
+
+
+def test_frames_estaticos_sao_pulados():
+    gate = MotionGate(threshold=0.01, max_skip=1000)
+
+    assert gate.precisa_inferir(_frame())
+    assert not any(gate.precisa_inferir(_frame()) for _ in range(10))
+    assert gate.precisa_inferir(_frame(100, 220))
+
+
+def test_ruido_abaixo_do_limiar_nao_dispara_inferencia():
+    rng = np.random.default_rng(0)
+    gate = MotionGate(threshold=0.02, max_skip=1000)
+    gate.precisa_inferir(_frame())
+
+    assert not any(gate.precisa_inferir(_frame(ruido=8, rng=rng)) for _ in range(10))
+
+
+def test_max_skip_forca_a_inferencia():
+    gate = MotionGate(threshold=0.01, max_skip=3)
+
+    decisoes = [gate.precisa_inferir(_frame()) for _ in range(9)]
+
+    assert decisoes == [True, False, False, False, True, False, False, False, True]
+
+
+@pytest.mark.parametrize("batch_size", [1, 4])
+def test_gate_mantem_a_maquina_de_estados(tmp_path, monkeypatch, batch_size):
+    video = str(_video_parado_e_queda(tmp_path / "quarto.avi"))
+
+    def analisar(nome, **kwargs):
+        modelo = PoseContador()
+        monkeypatch.setattr(fall_detection, "get_pose_model", lambda *args, **kw: modelo)
+        resultado = fall_detection.analyze_video(
+            video, batch_size=batch_size, keypoint_log_path=tmp_path / f"{nome}.kplog", **kwargs)
+        return resultado, modelo.frames, KeypointLog(resultado["keypoint_log"])
+
+    sem_gate, inferidos_sem_gate, log_sem_gate = analisar("sem_gate")
+    com_gate, inferidos_com_gate, log_com_gate = analisar("com_gate", motion_threshold=0.01, motion_max_skip=30)
+
+    assert sem_gate["fall_detected"] and com_gate["fall_detected"]
+    assert com_gate["frames_analyzed"] == sem_gate["frames_analyzed"] == 185
+    assert com_gate["frames_skipped"] == 185 - inferidos_com_gate
+    # Uma ordem de grandeza menos inferências em vídeo majoritariamente parado
+    assert inferidos_com_gate * 10 <= inferidos_sem_gate
+    # Frames pulados reaproveitam a última detecção: a pose por frame é a mesma
+    np.testing.assert_array_equal(log_com_gate.n_persons, log_sem_gate.n_persons)
+    np.testing.assert_allclose(log_com_gate.keypoints, log_sem_gate.keypoints, atol=4)
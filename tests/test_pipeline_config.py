@@ -0,0 +1,18 @@
+from config.pipeline_config import PipelineConfig
+
+
+def test_parametros_da_emocao_acustica_entram_na_chave_do_cache(monkeypatch):
+    base = PipelineConfig().fingerprint()
+
+    for nome, valor in (("AUDIO_EMOTION_WINDOW_SECONDS", "3.0"), ("AUDIO_EMOTION_HOP_SECONDS", "1.0"),
+                        ("AUDIO_EMOTION_VOICED_ONLY", "false")):
+        with monkeypatch.context() as m:
+            m.setenv(nome, valor)
+            assert PipelineConfig().fingerprint() != base, nome
+
+
+def test_tamanho_do_lote_nao_entra_na_chave_do_cache(monkeypatch):
+    base = PipelineConfig().fingerprint()
+    monkeypatch.setenv("AUDIO_EMOTION_BATCH_SIZE", "32")
+
+    assert PipelineConfig().fingerprint() == base
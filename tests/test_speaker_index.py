@@ -0,0 +1,75 @@
+import random
+import time
+from processors.speaker_index import SpeakerIndex
+
+
+def _forca_bruta(turns, start, end, default="Unknown"):
+    """Referência O(turnos) por segmento, com o mesmo critério de desempate."""
+    turns = sorted(turns, key=lambda t: (t[0], t[1]))
+    melhor, maior = None, 0.0
+    for j, (inicio, fim, _) in enumerate(turns):
+        sobreposicao = min(end, fim) - max(start, inicio)
+        if sobreposicao > maior:
+            melhor, maior = j, sobreposicao
+    if melhor is None:
+        melhor = next((j for j, (inicio, fim, _) in enumerate(turns) if inicio <= start <= fim), None)
+    return default if melhor is None else turns[melhor][2]
+
+
+def _gravacao(n_turnos, n_segmentos, seed):
+    rng = random.Random(seed)
+    duracao = n_turnos * 2.0
+    turns = []
+    for _ in range(n_turnos):
+        inicio = round(rng.uniform(0, duracao), 2)
+        turns.append((inicio, round(inicio + rng.uniform(0, 6), 2), f"SPEAKER_{rng.randrange(4)}"))
+    # Turno sobreposto que cobre a gravação inteira
+    turns.append((0.0, duracao + 10, "SPEAKER_LONGO"))
+    segments = []
+    for _ in range(n_segmentos):
+        inicio = round(rng.uniform(-5, duracao + 15), 2)
+        # Inclui segmentos pontuais (start == end)
+        segments.append((inicio, inicio if rng.random() < 0.1 else round(inicio + rng.uniform(0, 8), 2)))
+    return turns, segments
+
+
+def test_igual_a_forca_bruta_com_turnos_sobrepostos():
+    for seed in range(5):
+        turns, segments = _gravacao(300, 500, seed)
+        index = SpeakerIndex(turns)
+
+        assert index.assign(segments) == [_forca_bruta(turns, s, e) for s, e in segments]
+
+
+def test_casos_de_borda():
+    index = SpeakerIndex([(0.0, 2.0, "A"), (2.0, 5.0, "B"), (1.0, 3.0, "C")])
+
+    assert index.assign([(0.5, 1.5)]) == ["A"]
+    # Empate de sobreposição: vence o turno que começa primeiro
+    assert index.assign([(1.5, 2.0)]) == ["A"]
+    assert index.assign([(1.5, 2.5)]) == ["C"]
+    assert index.assign([(2.5, 4.5)]) == ["B"]
+    # Segmento pontual na fronteira: primeiro turno que contém o instante
+    assert index.assign([(2.0, 2.0)]) == ["A"]
+    assert index.assign([(6.0, 7.0)]) == ["Unknown"]
+    assert SpeakerIndex([]).assign([(0.0, 1.0)], default="X") == ["X"]
+
+
+def test_ordem_dos_segmentos_preservada():
+    index = SpeakerIndex([(0.0, 1.0, "A"), (1.0, 2.0, "B")])
+
+    assert index.assign([(1.2, 1.8), (0.1, 0.9)]) == ["B", "A"]
+
+
+def test_turno_longo_nao_torna_a_busca_quadratica():
+    def tempo(n):
+        turns = [(i * 1.0, i * 1.0 + 0.9, f"S{i % 3}") for i in range(n)]
+        turns.append((0.0, float(n), "LONGO"))
+        segments = [(i * 1.0 + 0.1, i * 1.0 + 0.8) for i in range(n)]
+        inicio = time.perf_counter()
+        SpeakerIndex(turns).assign(segments)
+        return time.perf_counter() - inicio
+
+    tempo(1000)
+    # Quadrático: 16x mais dados custariam ~256x mais tempo
+    assert tempo(32000) < 64 * max(tempo(2000), 1e-3)
@@ -0,0 +1,78 @@
+import os
+from orchestrator.video_cache import VideoCache
+
+
+def _video(path, tamanho):
+    path.write_bytes(b"v" * tamanho)
+    return path
+
+
+def test_get_vincula_o_video_no_diretorio_do_job(tmp_path):
+    cache = VideoCache(tmp_path / "cache", max_bytes=1000)
+    download = _video(tmp_path / "download.mp4", 100)
+    job = tmp_path / "job"
+    job.mkdir()
+
+    assert cache.put("s3:etag", download) == download
+    assert download.exists()
+
+    local = cache.get("s3:etag", ".mp4", dest_dir=job)
+    assert local.parent == job
+    assert local.read_bytes() == download.read_bytes()
+
+
+def test_remocao_do_cache_nao_afeta_o_job(tmp_path):
+    cache = VideoCache(tmp_path / "cache", max_bytes=250)
+    job = tmp_path / "job"
+    job.mkdir()
+    cache.put("s3:a", _video(tmp_path / "a.mp4", 100))
+    local = cache.get("s3:a", ".mp4", dest_dir=job)
+
+    # Novos vídeos empurram "a" para fora do cache
+    cache.put("s3:b", _video(tmp_path / "b.mp4", 100))
+    cache.put("s3:c", _video(tmp_path / "c.mp4", 100))
+
+    assert cache.get("s3:a", ".mp4") is None
+    assert local.exists() and local.stat().st_size == 100
+
+
+def test_remove_os_menos_acessados(tmp_path):
+    cache = VideoCache(tmp_path / "cache", max_bytes=250)
+    for i, nome in enumerate(("a", "b")):
+        cache.put(f"s3:{nome}", _video(tmp_path / f"{nome}.mp4", 100))
+        os.utime(cache._path(f"s3:{nome}", ".mp4"), (i, i))
+
+    cache.get("s3:a", ".mp4")  # "a" passa a ser o mais recente
+    cache.put("s3:c", _video(tmp_path / "c.mp4", 100))
+
+    assert cache.get("s3:a", ".mp4") is not None
+    assert cache.get("s3:b", ".mp4") is None
+    assert cache.get("s3:c", ".mp4") is not None
+
+
+def test_video_maior_que_o_limite_nao_entra_no_cache(tmp_path):
+    cache = VideoCache(tmp_path / "cache", max_bytes=250)
+    cache.put("s3:a", _video(tmp_path / "a.mp4", 100))
+    grande = _video(tmp_path / "grande.mp4", 300)
+
+    assert cache.put("s3:grande", grande) == grande
+    assert cache.get("s3:grande", ".mp4") is None
+    assert cache.get("s3:a", ".mp4") is not None
+
+
+def test_remocao_entre_o_vinculo_e_o_acesso(tmp_path, monkeypatch):
+    cache = VideoCache(tmp_path / "cache", max_bytes=1000)
+    cache.put("s3:a", _video(tmp_path / "a.mp4", 100))
+    job = tmp_path / "job"
+    job.mkdir()
+
+    vincular = cache._vincular
+
+    def vincular_e_remover(origem, destino):
+        vincular(origem, destino)
+        origem.unlink()  # outro job remove a entrada do cache
+
+    monkeypatch.setattr(cache, "_vincular", vincular_e_remover)
+
+    local = cache.get("s3:a", ".mp4", dest_dir=job)
+    assert local.parent == job and local.stat().st_size == 100